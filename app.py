@@ -9,13 +9,13 @@ PPE 個人防護設備檢測系統
 - 手動控制功能
 """
 import streamlit as st
-import time
-from core.session_manager import init_session_state
+from core.session_manager import init_session_state, refresh_gate_state
 from core.logger import Logger
-from core.database import Database
-from core.detector import PPEDetector
+from core.engine import DetectionEngine
+from core.metrics import MetricsExporter
+from core.profiler import RunProfiler
 from ui.app_ui import AppUI
-from config.settings import Config
+from ui.components.gate_selector import render_gate_selector
 
 # 設定頁面
 st.set_page_config(
@@ -32,33 +32,25 @@ def main():
     # 初始化日誌系統
     logger = Logger()
     
-    # 檢查資料庫連接
-    try:
-        status = Database.get_status()
-        if status is None:
-            st.error("❌ 無法連接到資料庫，請確認 ppe_detection.db 存在")
-            st.info("💡 請先執行 ppe_simulator.py 創建資料庫")
-            Logger.add_log("資料庫連接失敗", "ERROR")
-            return
-    except Exception as e:
-        st.error(f"❌ 資料庫錯誤: {str(e)}")
-        Logger.add_log(f"資料庫錯誤: {str(e)}", "ERROR")
-        return
+    # 啟動效能指標輸出（整個行程只啟動一次）
+    MetricsExporter()
     
-    # 系統啟動日誌（只在第一次運行時記錄）
-    if not st.session_state.system_started:
-        Logger.add_log("PPE檢測系統啟動（模組化架構）", "INFO")
-        st.session_state.system_started = True
+    # 選擇閘口後取得檢測引擎發布的狀態（狀態機在引擎執行緒中推進）
+    render_gate_selector()
+    DetectionEngine()
+    gate_state = refresh_gate_state()
     
-    # 更新檢測狀態
-    PPEDetector.update_detection_state()
+    # 檢查資料庫連接
+    if gate_state.status is None:
+        st.error("❌ 無法連接到資料庫，請確認 ppe_detection.db 存在")
+        st.info("💡 請先執行 ppe_simulator.py 創建資料庫")
+        Logger.add_log("資料庫連接失敗", "ERROR")
+        return
     
-    # 渲染UI
+    # 渲染UI：靜態部分只在完整重新執行時渲染，
+    # 即時區塊由 fragment 在檢測引擎發布新快照時單獨重新執行
     AppUI.render()
-    
-    # 自動刷新
-    time.sleep(Config.REFRESH_INTERVAL)
-    st.rerun()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # PROFILE_RUNS（或環境變數 PPE_PROFILE_RUNS）大於 0 時剖析接下來幾次重新執行（即時區塊的 fragment 另外計入）
+    RunProfiler.run(main)
@@ -2,10 +2,56 @@
 PPE 檢測系統配置模組
 包含所有系統配置參數和常數
 """
+import os
 
 class Config:
     """系統配置類"""
     DB_PATH = "ppe_detection.db"
-    REFRESH_INTERVAL = 5.0
+    GATE_IDS = [1]  # 檢測閘口編號（對應 ppe_detection.id）
+    DB_TIMEOUT = 5.0  # 資料庫鎖定等待秒數
+    DB_POOL_SIZE = 8  # 唯讀連線池上限（約等於同時讀取的執行緒數）
+    LIVE_REFRESH_INTERVAL = 0.2  # 即時區塊每次 fragment 執行等待新快照的秒數（也是計時器更新與操作元件的最長延遲）
+    LIVE_IDLE_INTERVAL = 1.0  # 等待人員且沒有新快照時 fragment 每次執行的等待秒數（閒置時操作元件的最長延遲）
+    WATCH_INTERVAL = 0.1  # 資料變更檢查間隔（秒）
+    STATUS_COMMIT_INTERVAL = 0.2  # 檢測結果最短提交間隔（秒），期間內的畫面合併為一次提交
+    STATUS_CACHE_TTL = 5.0  # 檢測狀態快取的最長有效秒數（資料版本改變時立即失效）
+    ENGINE_TICK_INTERVAL = 1.0  # 檢測引擎處理逾時重置的週期（秒）
     PERSON_TIMEOUT = 30  # 人員離開30秒後重置
-    COMPLETION_TIMEOUT = 30  # 完成檢查30秒後重置
\ No newline at end of file
+    COMPLETION_TIMEOUT = 30  # 完成檢查30秒後重置
+    LOG_DIR = "logs"  # 日誌目錄
+    LOG_MAX_BYTES = 10 * 1024 * 1024  # 單一日誌檔上限，超過即輪替壓縮
+    LOG_RETENTION_DAYS = 30  # 日誌與封存檔保留天數
+    LOG_QUEUE_SIZE = 10000  # 日誌佇列上限，滿了會捨棄新日誌並記錄捨棄數量
+    LOG_BATCH_SIZE = 500  # 每批最多寫入筆數
+    LOG_FLUSH_INTERVAL = 0.5  # 背景寫入執行緒的等待間隔（秒）
+    LOG_REPEAT_SUMMARY_INTERVAL = 60  # 持續重複的日誌每隔多少秒寫出一次摘要
+    LOG_PAGE_SIZE = 100  # 歷史日誌每頁行數
+    LOG_SEARCH_LIMIT = 200  # 日誌搜尋最多顯示筆數
+    LOG_SEARCH_COUNT_LIMIT = 10000  # 日誌搜尋計數上限，超過只顯示「至少」
+    EVENT_QUEUE_SIZE = 10000  # 事件佇列上限，滿了會捨棄新事件並記錄捨棄數量
+    EVENT_BATCH_SIZE = 500  # 每個交易最多寫入的事件數
+    EVENT_FLUSH_INTERVAL = 1.0  # 事件批次寫入間隔（秒）
+    METRICS_ENABLED = True  # 是否記錄熱路徑執行時間
+    METRICS_FILE = "logs/metrics.prom"  # Prometheus 文字格式指標檔，空字串表示不寫檔
+    METRICS_EXPORT_INTERVAL = 15.0  # 指標檔更新間隔（秒）
+    METRICS_PORT = 0  # HTTP /metrics 連接埠，0 表示不啟動
+    PROFILE_RUNS = int(os.environ.get("PPE_PROFILE_RUNS", "0"))  # 剖析接下來幾次頁面與即時區塊重新執行，0 表示關閉
+    PROFILE_MODE = os.environ.get("PPE_PROFILE_MODE", "sample")  # "sample"（堆疊取樣）或 "cprofile"
+    PROFILE_SAMPLE_INTERVAL = 0.005  # 堆疊取樣間隔（秒）
+    PROFILE_DIR = "logs/profiles"  # 剖析結果目錄
+    INFERENCE_BACKEND = "opencv"  # 推論後端："opencv"（OpenCV DNN）或 "onnx"（ONNX Runtime）
+    INFERENCE_MODELS = {"weights/ppe.onnx": None}  # 模型路徑 -> 輸出對應的項目，None 表示依 ITEM_KEYS 順序
+    INFERENCE_INPUT_SIZE = (224, 224)  # 模型輸入寬高
+    INFERENCE_THRESHOLD = 0.5  # 項目分數達到此值視為 "pass"
+    INFERENCE_THREADS = 0  # 推論使用的 CPU 執行緒數，0 表示由推論函式庫決定
+    PIPELINE_QUEUE_SIZE = 2  # 推論管線各階段之間的佇列長度
+    INFERENCE_FRAME_BUDGET = 1 / 30  # 每個擷取畫面的推論時間預算（秒），推論較慢時按比例跳過畫面
+    SCHEDULER_MAX_STRIDE = 10  # 最多每幾個畫面推論一次
+    SCHEDULER_PERSON_INTERVAL = 0.5  # 檢測階段中確認 has_person 的間隔（秒）
+    SCHEDULER_STAGE_INTERVAL = 0.5  # 推論排程讀取檢測引擎階段（ppe_events 最新事件）的間隔（秒）
+    SMOOTHING_ENABLED = True  # 有 realtime_detection 分數時以平滑後的判斷取代各項目的 pass/fail
+    SMOOTHING_WINDOW = 5  # 取中位數的最近分數筆數（每個閘口、每個項目固定長度）
+    SMOOTHING_ALPHA = 0.5  # 中位數的指數移動平均係數，越大反應越快
+    SMOOTHING_PASS_THRESHOLD = 0.6  # 平滑分數達到此值才由 fail 轉為 pass
+    SMOOTHING_FAIL_THRESHOLD = 0.4  # 平滑分數降到此值才由 pass 轉為 fail
+    SMOOTHING_STALE_AFTER = 5.0  # 分數比檢測結果舊超過此秒數時不使用分數
@@ -0,0 +1,129 @@
+"""
+PPE 檢測統計分析模組
+從事件彙總表計算通過人次、完成時間、各階段停留時間與失敗率
+"""
+from datetime import datetime
+from typing import Optional
+import pandas as pd
+from models.ppe_event import (
+    EVENT_ENTER, EVENT_STAGE_PASS, EVENT_STAGE_FAIL,
+    EVENT_COMPLETE, EVENT_MANUAL_PASS, EVENT_RESET
+)
+from models.stage_config import STAGE_NAMES
+from models.stage_rules import COMPLETE_STAGE
+from core.database import Database
+from core.rollups import ROLLUP_COLUMNS
+
+class Analytics:
+    """統計分析類
+
+    所有平均值都由彙總表中的總和與筆數計算，因此可以跨閘口、跨區段直接相加。
+    """
+
+    @staticmethod
+    def load(granularity: str, start: datetime, end: datetime,
+             gate_id: Optional[int] = None) -> Optional[pd.DataFrame]:
+        """
+        讀取彙總資料
+
+        Args:
+            granularity: 彙總粒度 ("minute" / "hour" / "day")
+            start: 起始時間（含）
+            end: 結束時間（不含）
+            gate_id: 只讀取指定閘口，None 表示全部
+
+        Returns:
+            pd.DataFrame: ROLLUP_COLUMNS 欄位加上本地時間欄位 time，如果讀取失敗返回None
+        """
+        rows = Database.get_rollups(granularity, start.timestamp(), end.timestamp(), gate_id)
+        if rows is None:
+            return None
+        frame = pd.DataFrame(rows, columns=list(ROLLUP_COLUMNS))
+        frame["time"] = [datetime.fromtimestamp(bucket) for bucket in frame["bucket"]]
+        return frame
+
+    @staticmethod
+    def throughput(frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        各時間區段的進入人次、完成人次與平均完成時間
+
+        Args:
+            frame: load() 的結果
+
+        Returns:
+            pd.DataFrame: 以時間為索引
+        """
+        def per_bucket(event_type: str) -> pd.DataFrame:
+            rows = frame[frame["event_type"] == event_type]
+            return rows.groupby("time")[["events", "duration_sum", "duration_count"]].sum()
+
+        entered = per_bucket(EVENT_ENTER)
+        completed = per_bucket(EVENT_COMPLETE)
+        result = pd.DataFrame({
+            "進入人次": entered["events"],
+            "完成人次": completed["events"],
+            "平均完成時間(秒)": completed["duration_sum"] / completed["duration_count"].where(completed["duration_count"] > 0),
+        })
+        result[["進入人次", "完成人次"]] = result[["進入人次", "完成人次"]].fillna(0).astype(int)
+        return result.sort_index()
+
+    @staticmethod
+    def completion_summary(frame: pd.DataFrame) -> dict:
+        """
+        整段期間的完成統計
+
+        Args:
+            frame: load() 的結果
+
+        Returns:
+            dict: 完成人次、平均/最短/最長完成秒數（沒有資料時為None）
+        """
+        rows = frame[frame["event_type"] == EVENT_COMPLETE]
+        count = int(rows["duration_count"].sum())
+        return {
+            "completed": int(rows["events"].sum()),
+            "average": rows["duration_sum"].sum() / count if count else None,
+            "shortest": rows["duration_min"].min() if count else None,
+            "longest": rows["duration_max"].max() if count else None,
+        }
+
+    @staticmethod
+    def stage_summary(frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        各檢測階段的進入次數、平均停留時間、失敗提示與未通過率
+
+        進入第 k 階段的次數為第 k-1 階段的通過次數（第一階段為進入人次）；
+        未通過率為停在該階段直到重置的比例。
+
+        Args:
+            frame: load() 的結果
+
+        Returns:
+            pd.DataFrame: 以階段名稱為索引
+        """
+        totals = frame.groupby(["event_type", "stage"])[["events", "duration_sum", "duration_count"]].sum()
+
+        def total(event_type: str, stage: int, column: str = "events") -> float:
+            key = (event_type, stage)
+            return totals.at[key, column] if key in totals.index else 0
+
+        records = []
+        for stage in range(1, COMPLETE_STAGE):
+            if stage == 1:
+                # 進入事件記錄轉換前的階段 0；舊版記錄為 1，一併計入
+                entries = total(EVENT_ENTER, 0) + total(EVENT_ENTER, 1)
+            else:
+                entries = total(EVENT_STAGE_PASS, stage - 1) + total(EVENT_MANUAL_PASS, stage - 1)
+            passes = total(EVENT_STAGE_PASS, stage) + total(EVENT_MANUAL_PASS, stage)
+            timed = total(EVENT_STAGE_PASS, stage, "duration_count") + total(EVENT_MANUAL_PASS, stage, "duration_count")
+            dwell = total(EVENT_STAGE_PASS, stage, "duration_sum") + total(EVENT_MANUAL_PASS, stage, "duration_sum")
+            records.append({
+                "階段": STAGE_NAMES[stage],
+                "進入次數": int(entries),
+                "通過次數": int(passes),
+                "手動通過": int(total(EVENT_MANUAL_PASS, stage)),
+                "平均停留(秒)": dwell / timed if timed else None,
+                "每人失敗提示": total(EVENT_STAGE_FAIL, stage) / entries if entries else None,
+                "未通過率": total(EVENT_RESET, stage) / entries if entries else None,
+            })
+        return pd.DataFrame(records).set_index("階段")
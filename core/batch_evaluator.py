@@ -0,0 +1,154 @@
+"""
+PPE 批次檢測評估模組
+以 NumPy 向量化方式一次評估大量檢測結果（稽核重播、多閘口評估）
+"""
+from typing import Iterable, Tuple
+import numpy as np
+import pandas as pd
+from models.ppe_status import AnyStatus
+from models.stage_config import ITEM_KEYS
+from models.stage_rules import STAGE_RULES, PERSON_BIT, COMPLETE_STAGE
+
+class BatchEvaluator:
+    """批次檢測評估類
+
+    readings 為 (N, len(ITEM_KEYS)) 的 bool/uint8 陣列，欄位順序同 ITEM_KEYS，
+    1 代表 "pass"。每筆結果先壓成一個位元遮罩，階段判斷即為遮罩比較。
+    """
+
+    # 各項目對應的位元值（與 models.stage_rules.ITEM_BITS 相同）
+    _ITEM_BITS = (1 << np.arange(len(ITEM_KEYS))).astype(np.uint32)
+
+    # 每個階段需要通過的項目遮罩，索引為階段編號（0 與完成階段沒有需求）
+    _STAGE_MASKS = np.array([rule.mask if rule else 0 for rule in STAGE_RULES], dtype=np.uint32)
+
+    @staticmethod
+    def readings_from_statuses(statuses: Iterable[AnyStatus]) -> np.ndarray:
+        """
+        將 PPEStatus / PackedStatus 序列轉換為批次陣列
+
+        Args:
+            statuses: PPE狀態物件序列
+
+        Returns:
+            np.ndarray: (N, len(ITEM_KEYS)) 的 uint8 陣列
+        """
+        bits = np.fromiter((status.to_bits() for status in statuses), dtype=np.uint32)
+        return BatchEvaluator.unpack(bits)
+
+    @staticmethod
+    def readings_from_frame(frame: pd.DataFrame) -> np.ndarray:
+        """
+        將含 ITEM_KEYS 欄位的 DataFrame 轉換為批次陣列
+
+        欄位可為 "pass"/"fail" 字串，或已編碼的 bool/整數。
+
+        Args:
+            frame: 檢測結果資料表（例如 SELECT * FROM ppe_detection 的結果）
+
+        Returns:
+            np.ndarray: (N, len(ITEM_KEYS)) 的 uint8 陣列
+        """
+        columns = frame[ITEM_KEYS]
+        if any(dtype == object for dtype in columns.dtypes):
+            return (columns.to_numpy() == "pass").astype(np.uint8)
+        return (columns.to_numpy() != 0).astype(np.uint8)
+
+    @staticmethod
+    def pack(readings: np.ndarray) -> np.ndarray:
+        """
+        將批次陣列壓縮為每筆一個位元遮罩
+
+        Args:
+            readings: (N, len(ITEM_KEYS)) 的 bool/uint8 陣列
+
+        Returns:
+            np.ndarray: (N,) 的 uint32 位元遮罩
+        """
+        return (np.asarray(readings, dtype=bool) @ BatchEvaluator._ITEM_BITS).astype(np.uint32)
+
+    @staticmethod
+    def unpack(bits: np.ndarray) -> np.ndarray:
+        """
+        將位元遮罩陣列（例如大量 PackedStatus.bits）展開為批次陣列
+
+        Args:
+            bits: (N,) 位元遮罩
+
+        Returns:
+            np.ndarray: (N, len(ITEM_KEYS)) 的 uint8 陣列
+        """
+        bits = np.asarray(bits, dtype=np.uint32).reshape(-1, 1)
+        return ((bits & BatchEvaluator._ITEM_BITS) != 0).astype(np.uint8)
+
+    @staticmethod
+    def stage_masks(stages: np.ndarray, readings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        計算每筆結果在其所在階段的通過/失敗遮罩
+
+        等同對每筆結果呼叫 check_stage_completion / check_stage_failure。
+
+        Args:
+            stages: (N,) 階段編號陣列，或單一階段編號
+            readings: (N, len(ITEM_KEYS)) 的 bool/uint8 陣列
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (通過遮罩, 失敗遮罩)，非檢測階段兩者皆為False
+        """
+        bits = BatchEvaluator.pack(readings)
+        stages = np.broadcast_to(np.asarray(stages, dtype=np.intp), bits.shape)
+        in_check = (stages >= 1) & (stages < COMPLETE_STAGE)
+        required = BatchEvaluator._STAGE_MASKS[np.clip(stages, 0, COMPLETE_STAGE)]
+        passed = in_check & ((bits & required) == required)
+        failed = in_check & ~passed
+        return passed, failed
+
+    @staticmethod
+    def next_stages(stages: np.ndarray, readings: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        計算多個閘口各自套用一筆結果後的階段轉換（不含逾時重置）
+
+        Args:
+            stages: (N,) 各閘口目前的階段編號
+            readings: (N, len(ITEM_KEYS)) 各閘口的最新結果
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: (新階段, 通過遮罩, 失敗遮罩)
+        """
+        stages = np.asarray(stages, dtype=np.intp)
+        passed, failed = BatchEvaluator.stage_masks(stages, readings)
+        entered = (stages == 0) & ((BatchEvaluator.pack(readings) & PERSON_BIT) != 0)
+        return stages + (passed | entered), passed, failed
+
+    @staticmethod
+    def replay(readings: np.ndarray, start_stage: int = 0) -> np.ndarray:
+        """
+        重播單一閘口的時間序列結果，得到每筆結果處理後的階段（不含逾時重置）
+
+        階段最多前進 COMPLETE_STAGE 次，因此每個階段只做一次向量化搜尋。
+
+        Args:
+            readings: (N, len(ITEM_KEYS)) 依時間排序的結果
+            start_stage: 起始階段
+
+        Returns:
+            np.ndarray: (N,) 的 uint8 階段陣列
+        """
+        bits = BatchEvaluator.pack(readings)
+        stages = np.full(bits.shape, start_stage, dtype=np.uint8)
+        stage, position = start_stage, 0
+
+        while stage < COMPLETE_STAGE and position < len(bits):
+            if stage == 0:
+                hits = np.flatnonzero(bits[position:] & PERSON_BIT)
+            else:
+                required = BatchEvaluator._STAGE_MASKS[stage]
+                hits = np.flatnonzero((bits[position:] & required) == required)
+            if not hits.size:
+                break
+            index = position + hits[0]
+            stage += 1
+            stages[index:] = stage
+            position = index + 1
+
+        return stages
@@ -1,48 +1,283 @@
 """
 PPE 檢測系統資料庫操作模組
 """
+import queue
 import sqlite3
-from typing import Optional
-from models.ppe_status import PPEStatus
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from models.ppe_event import PPEEvent
+from models.ppe_status import PPEStatus, PackedStatus
+from models.stage_config import ITEM_KEYS, SCORE_KEYS
 from config.settings import Config
+from core.rollups import GRANULARITIES, ROLLUP_COLUMNS
+from core.metrics import Metrics
+
+DB_READ_SECONDS = Metrics.histogram(
+    "ppe_db_read_seconds", "檢測狀態讀取時間（含等待連線與資料庫鎖定）", ("query", "gate")
+)
 
 class Database:
     """資料庫操作類"""
-    
+
+    # 唯讀連線池：每條連線同一時間只借給一個執行緒使用
+    _pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=Config.DB_POOL_SIZE)
+    _pool_path: Optional[str] = None
+
+    # ppe_detection 的狀態欄位，順序同 ITEM_KEYS，最後為 last_updated
+    STATUS_COLUMNS = ", ".join(ITEM_KEYS + ["last_updated"])
+
+    @staticmethod
+    def connect(db_path: str) -> sqlite3.Connection:
+        """
+        建立唯讀資料庫連線
+
+        Args:
+            db_path: 資料庫檔案路徑
+
+        Returns:
+            sqlite3.Connection: 以唯讀模式開啟的連線
+        """
+        uri = f"{Path(db_path).resolve().as_uri()}?mode=ro"
+        return sqlite3.connect(
+            uri,
+            uri=True,
+            timeout=Config.DB_TIMEOUT,
+            check_same_thread=False
+        )
+
+    @staticmethod
+    @contextmanager
+    def _reader() -> Iterator[sqlite3.Connection]:
+        """
+        從連線池借出一條唯讀連線，用完自動歸還
+
+        發生錯誤的連線不會放回池中，避免重複使用損壞的連線。
+        """
+        db_path = Config.DB_PATH
+        if Database._pool_path != db_path:
+            # 資料庫路徑變更時丟棄舊連線
+            Database.close_all()
+            Database._pool_path = db_path
+
+        try:
+            conn = Database._pool.get_nowait()
+        except queue.Empty:
+            conn = Database.connect(db_path)
+
+        try:
+            yield conn
+        except Exception:
+            conn.close()
+            raise
+
+        try:
+            Database._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
     @staticmethod
-    def get_status() -> Optional[PPEStatus]:
+    def close_all():
+        """關閉連線池中所有閒置連線"""
+        while True:
+            try:
+                Database._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+    @staticmethod
+    def _to_status(row) -> PPEStatus:
+        """將 STATUS_COLUMNS 欄位轉換為 PPEStatus"""
+        items = {item_key: value or "fail" for item_key, value in zip(ITEM_KEYS, row)}
+        return PPEStatus(**items, last_updated=row[len(ITEM_KEYS)] or "")
+
+    @staticmethod
+    def get_status(gate_id: int = 1) -> Optional[PPEStatus]:
         """
         從資料庫讀取PPE檢測狀態
-        
+
+        Args:
+            gate_id: 閘口編號 (ppe_detection.id)
+
         Returns:
             PPEStatus: 檢測狀態物件，如果讀取失敗返回None
         """
         try:
-            conn = sqlite3.connect(Config.DB_PATH)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT has_person, helmet, goggles, gloves, boots, suit, mask, last_updated
-                FROM ppe_detection WHERE id = 1
-            ''')
-            
-            result = cursor.fetchone()
-            conn.close()
-            
+            with DB_READ_SECONDS.time("get_status", gate_id), Database._reader() as conn:
+                result = conn.execute(f'''
+                    SELECT {Database.STATUS_COLUMNS}
+                    FROM ppe_detection WHERE id = ?
+                ''', (gate_id,)).fetchone()
+
             if result:
-                return PPEStatus(
-                    has_person=result[0] or "fail",
-                    helmet=result[1] or "fail",
-                    goggles=result[2] or "fail",
-                    gloves=result[3] or "fail",
-                    boots=result[4] or "fail",
-                    suit=result[5] or "fail",
-                    mask=result[6] or "fail",
-                    last_updated=result[7] or ""
-                )
+                return Database._to_status(result)
             return None
         except Exception as e:
             # 避免循環導入，使用基本的錯誤處理
             import sys
             print(f"讀取資料庫失敗: {str(e)}", file=sys.stderr)
-            return None
\ No newline at end of file
+            return None
+
+    @staticmethod
+    def get_all_status(gate_ids: Iterable[int]) -> Optional[Dict[int, PackedStatus]]:
+        """
+        以單一查詢讀取多個閘口的PPE檢測狀態
+
+        Args:
+            gate_ids: 閘口編號列表
+
+        Returns:
+            Dict[int, PackedStatus]: 閘口編號對應的緊湊檢測狀態（資料庫中沒有的閘口不會出現），
+            如果讀取失敗返回None
+        """
+        gate_ids = list(gate_ids)
+        placeholders = ",".join("?" * len(gate_ids))
+        try:
+            with DB_READ_SECONDS.time("get_all_status", "all"), Database._reader() as conn:
+                rows = conn.execute(f'''
+                    SELECT id, {Database.STATUS_COLUMNS}
+                    FROM ppe_detection WHERE id IN ({placeholders})
+                ''', gate_ids).fetchall()
+
+            return {row[0]: PackedStatus.from_row(row[1:]) for row in rows}
+        except Exception as e:
+            import sys
+            print(f"讀取資料庫失敗: {str(e)}", file=sys.stderr)
+            return None
+
+    @staticmethod
+    def get_all_scores(gate_ids: Iterable[int]) -> Optional[Dict[int, Tuple[Tuple[float, ...], float]]]:
+        """
+        以單一查詢讀取多個閘口的即時檢測分數 (realtime_detection)
+
+        Args:
+            gate_ids: 閘口編號列表
+
+        Returns:
+            Dict[int, Tuple[Tuple[float, ...], float]]: 閘口編號對應 (分數（順序同 SCORE_KEYS）, 分數時間 epoch 秒，含小數)，
+            沒有 realtime_detection 資料表時為空字典，如果讀取失敗返回None
+        """
+        gate_ids = list(gate_ids)
+        placeholders = ",".join("?" * len(gate_ids))
+        try:
+            with DB_READ_SECONDS.time("get_all_scores", "all"), Database._reader() as conn:
+                rows = conn.execute(f'''
+                    SELECT id, {", ".join(f"{item_key}_score" for item_key in SCORE_KEYS)},
+                           (julianday(last_updated) - 2440587.5) * 86400.0
+                    FROM realtime_detection WHERE id IN ({placeholders})
+                ''', gate_ids).fetchall()
+
+            return {row[0]: (tuple(score or 0.0 for score in row[1:-1]), row[-1] or 0.0) for row in rows}
+        except sqlite3.OperationalError as e:
+            # 只寫入 ppe_detection 的檢測器不會建立 realtime_detection，視為沒有分數
+            if "no such table" in str(e):
+                return {}
+            import sys
+            print(f"讀取檢測分數失敗: {str(e)}", file=sys.stderr)
+            return None
+        except Exception as e:
+            import sys
+            print(f"讀取檢測分數失敗: {str(e)}", file=sys.stderr)
+            return None
+
+    @staticmethod
+    def get_events(start: float, end: float, gate_id: Optional[int] = None,
+                   event_type: Optional[str] = None) -> Optional[List[PPEEvent]]:
+        """
+        讀取時間範圍內的結構化事件（使用 ppe_events 的時間索引）
+
+        Args:
+            start: 起始時間（epoch 秒，含）
+            end: 結束時間（epoch 秒，不含）
+            gate_id: 只讀取指定閘口，None 表示全部
+            event_type: 只讀取指定事件類型，None 表示全部
+
+        Returns:
+            List[PPEEvent]: 依時間排序的事件，如果讀取失敗返回None
+        """
+        conditions = ["timestamp >= ?", "timestamp < ?"]
+        params = [start, end]
+        if gate_id is not None:
+            conditions.append("gate_id = ?")
+            params.append(gate_id)
+        if event_type is not None:
+            conditions.append("event_type = ?")
+            params.append(event_type)
+        try:
+            with Database._reader() as conn:
+                rows = conn.execute(f'''
+                    SELECT gate_id, event_type, stage, items, timestamp, duration, detail
+                    FROM ppe_events WHERE {" AND ".join(conditions)}
+                    ORDER BY timestamp
+                ''', params).fetchall()
+
+            return [PPEEvent(*row) for row in rows]
+        except Exception as e:
+            import sys
+            print(f"讀取事件失敗: {str(e)}", file=sys.stderr)
+            return None
+
+    @staticmethod
+    def get_latest_event(gate_id: int) -> Optional[PPEEvent]:
+        """
+        讀取閘口最新的一筆結構化事件（使用 ppe_events 的閘口時間索引）
+
+        Args:
+            gate_id: 閘口編號
+
+        Returns:
+            PPEEvent: 最新事件，沒有事件、沒有 ppe_events 資料表或讀取失敗時為None
+        """
+        try:
+            with Database._reader() as conn:
+                row = conn.execute('''
+                    SELECT gate_id, event_type, stage, items, timestamp, duration, detail
+                    FROM ppe_events WHERE gate_id = ?
+                    ORDER BY timestamp DESC, id DESC LIMIT 1
+                ''', (gate_id,)).fetchone()
+
+            return PPEEvent(*row) if row else None
+        except sqlite3.OperationalError as e:
+            # 檢測引擎尚未執行過時沒有 ppe_events
+            if "no such table" not in str(e):
+                import sys
+                print(f"讀取事件失敗: {str(e)}", file=sys.stderr)
+            return None
+        except Exception as e:
+            import sys
+            print(f"讀取事件失敗: {str(e)}", file=sys.stderr)
+            return None
+
+    @staticmethod
+    def get_rollups(granularity: str, start: float, end: float,
+                    gate_id: Optional[int] = None) -> Optional[List[tuple]]:
+        """
+        讀取事件彙總表（core.rollups 以事件增量累加）
+
+        Args:
+            granularity: 彙總粒度 ("minute" / "hour" / "day")
+            start: 起始時間（epoch 秒，含）
+            end: 結束時間（epoch 秒，不含）
+            gate_id: 只讀取指定閘口，None 表示全部
+
+        Returns:
+            List[tuple]: 欄位順序同 ROLLUP_COLUMNS 的資料列，如果讀取失敗返回None
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"未知的彙總粒度: {granularity}")
+        conditions = ["bucket >= ?", "bucket < ?"]
+        params = [start, end]
+        if gate_id is not None:
+            conditions.append("gate_id = ?")
+            params.append(gate_id)
+        try:
+            with Database._reader() as conn:
+                return conn.execute(f'''
+                    SELECT {", ".join(ROLLUP_COLUMNS)}
+                    FROM ppe_rollup_{granularity} WHERE {" AND ".join(conditions)}
+                    ORDER BY bucket
+                ''', params).fetchall()
+        except Exception as e:
+            import sys
+            print(f"讀取彙總資料失敗: {str(e)}", file=sys.stderr)
+            return None
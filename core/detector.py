@@ -1,132 +1,233 @@
 """
 PPE 檢測邏輯模組
 """
-import streamlit as st
 from datetime import datetime
-from models.ppe_status import PPEStatus
+from typing import Dict, Optional
+from models.ppe_status import AnyStatus
+from models.ppe_event import (
+    PPEEvent, EVENT_ENTER, EVENT_STAGE_PASS, EVENT_STAGE_FAIL,
+    EVENT_COMPLETE, EVENT_MANUAL_PASS, EVENT_RESET
+)
+from models.gate_state import GateState
+from models.stage_config import COMPLETION_MESSAGE
+from models.stage_rules import STAGE_RULES, PERSON_BIT, COMPLETE_STAGE
 from config.settings import Config
-from core.database import Database
 from core.logger import Logger
+from core.event_log import EdgeTriggeredLog
+from core.event_store import EventStore
+from core.metrics import Metrics
+
+TICK_SECONDS = Metrics.histogram("ppe_detector_tick_seconds", "單一閘口狀態機推進一次的時間", ("gate",))
 
 class PPEDetector:
     """PPE檢測邏輯類"""
     
     @staticmethod
-    def check_stage_completion(stage: int, status: PPEStatus) -> bool:
+    def check_stage_completion(stage: int, status: AnyStatus) -> bool:
         """
         檢查指定階段是否完成
         
         Args:
-            stage: 階段編號 (1, 2, 3)
+            stage: 階段編號 (1 ~ COMPLETE_STAGE-1)
             status: PPE狀態物件
             
         Returns:
             bool: 階段是否完成
         """
-        if stage == 1:
-            return status.helmet == "pass" and status.goggles == "pass"
-        elif stage == 2:
-            return status.gloves == "pass" and status.boots == "pass"
-        elif stage == 3:
-            return status.suit == "pass" and status.mask == "pass"
-        return False
+        rule = STAGE_RULES[stage] if 0 <= stage < len(STAGE_RULES) else None
+        return rule is not None and status.to_bits() & rule.mask == rule.mask
     
     @staticmethod
-    def check_stage_failure(stage: int, status: PPEStatus) -> bool:
+    def check_stage_failure(stage: int, status: AnyStatus) -> bool:
         """
         檢查指定階段是否失敗
         
         Args:
-            stage: 階段編號 (1, 2, 3)
+            stage: 階段編號 (1 ~ COMPLETE_STAGE-1)
             status: PPE狀態物件
             
         Returns:
             bool: 階段是否失敗
         """
-        if stage == 1:
-            return status.helmet == "fail" or status.goggles == "fail"
-        elif stage == 2:
-            return status.gloves == "fail" or status.boots == "fail"
-        elif stage == 3:
-            return status.suit == "fail" or status.mask == "fail"
-        return False
+        rule = STAGE_RULES[stage] if 0 <= stage < len(STAGE_RULES) else None
+        return rule is not None and status.to_bits() & rule.mask != rule.mask
+    
+    @staticmethod
+    def _log(state: GateState, message: str, level: str = "INFO",
+             current_time: Optional[datetime] = None):
+        """
+        記錄閘口日誌 - 同時寫入閘口即時日誌和日誌檔案
+        
+        連續相同的訊息只在第一次寫出，之後合併為重複摘要。
+        
+        Args:
+            state: 閘口狀態
+            message: 日誌訊息
+            level: 日誌等級 (INFO, SUCCESS, WARNING, ERROR)
+            current_time: 日誌時間，預設為現在
+        """
+        if current_time is None:
+            current_time = datetime.now()
+        for entry_message, entry_level in EdgeTriggeredLog.filter(state.repeat, message, level, current_time):
+            state.logs.append(Logger.format_entry(entry_message, entry_level))
+            Logger.write_file(f"[閘口{state.gate_id}] {entry_message}", entry_level)
+    
+    @staticmethod
+    def _record(state: GateState, event_type: str, current_time: datetime,
+                since: Optional[datetime] = None, detail: str = ""):
+        """
+        寫入一筆結構化事件（階段為事件發生時、狀態變更前的階段）
+        
+        Args:
+            state: 閘口狀態
+            event_type: 事件類型 (models.ppe_event.EVENT_*)
+            current_time: 事件時間
+            since: 計算經過時間的起點，None 表示不適用
+            detail: 補充說明
+        """
+        EventStore().record(PPEEvent(
+            gate_id=state.gate_id,
+            event_type=event_type,
+            stage=state.current_stage,
+            items=state.status.to_bits() if state.status else 0,
+            timestamp=current_time.timestamp(),
+            duration=(current_time - since).total_seconds() if since else None,
+            detail=detail
+        ))
+    
+    @staticmethod
+    def _advance(state: GateState, event_type: str, current_time: datetime):
+        """
+        通過目前階段並進入下一階段，全部完成時記錄完成事件
+        
+        Args:
+            state: 閘口狀態
+            event_type: EVENT_STAGE_PASS 或 EVENT_MANUAL_PASS
+            current_time: 通過時間
+        """
+        PPEDetector._record(state, event_type, current_time, state.stage_entered_time)
+        state.current_stage += 1
+        state.stage_entered_time = current_time
+        state.failed_items = None
+        if state.current_stage == COMPLETE_STAGE:
+            state.completion_time = current_time
+            PPEDetector._record(state, EVENT_COMPLETE, current_time, state.stage_start_time,
+                                "manual" if event_type == EVENT_MANUAL_PASS else "")
     
     @staticmethod
-    def update_detection_state():
-        """更新檢測狀態的主邏輯"""
-        status = Database.get_status()
+    @TICK_SECONDS.timed(lambda state, *args, **kwargs: state.gate_id)
+    def update_detection_state(state: GateState, status: Optional[AnyStatus],
+                               current_time: Optional[datetime] = None):
+        """
+        更新檢測狀態的主邏輯
+        
+        Args:
+            state: 要推進的閘口狀態
+            status: 最新的檢測結果
+            current_time: 判斷逾時用的時間，預設為現在
+        """
+        state.status = status
         if not status:
             return
         
-        current_time = datetime.now()
+        if current_time is None:
+            current_time = datetime.now()
+        
+        bits = status.to_bits()
         
         # 檢查是否有人
-        if status.has_person == "pass":
-            st.session_state.last_person_seen = current_time
+        if bits & PERSON_BIT:
+            state.last_person_seen = current_time
         
         # 檢查人員離開超時
-        if (st.session_state.last_person_seen and 
-            (current_time - st.session_state.last_person_seen).total_seconds() > Config.PERSON_TIMEOUT):
-            PPEDetector.reset_system("人員離開超過30秒，系統重置")
+        if (state.last_person_seen and 
+            (current_time - state.last_person_seen).total_seconds() > Config.PERSON_TIMEOUT):
+            PPEDetector.reset_system(state, "人員離開超過30秒，系統重置", current_time)
             return
         
         # 檢查完成超時
-        if (st.session_state.completion_time and 
-            (current_time - st.session_state.completion_time).total_seconds() > Config.COMPLETION_TIMEOUT):
-            PPEDetector.reset_system("完成檢查30秒後，系統重置")
+        if (state.completion_time and 
+            (current_time - state.completion_time).total_seconds() > Config.COMPLETION_TIMEOUT):
+            PPEDetector.reset_system(state, "完成檢查30秒後，系統重置", current_time)
             return
         
-        # 狀態機邏輯
-        if st.session_state.current_stage == 0:  # 等待階段
-            if status.has_person == "pass":
-                st.session_state.current_stage = 1
-                st.session_state.stage_start_time = current_time
-                Logger.add_log("檢測到人員，進入第一階段", "INFO")
-        
-        elif st.session_state.current_stage == 1:  # 第一階段
-            if PPEDetector.check_stage_completion(1, status):
-                st.session_state.current_stage = 2
-                Logger.add_log("第一階段通過 - 安全帽和護目鏡", "SUCCESS")
-            elif PPEDetector.check_stage_failure(1, status):
-                Logger.add_log("第一階段失敗 - 請檢查安全帽和護目鏡", "ERROR")
-        
-        elif st.session_state.current_stage == 2:  # 第二階段
-            if PPEDetector.check_stage_completion(2, status):
-                st.session_state.current_stage = 3
-                Logger.add_log("第二階段通過 - 手套和安全靴", "SUCCESS")
-            elif PPEDetector.check_stage_failure(2, status):
-                Logger.add_log("第二階段失敗 - 請檢查手套和安全靴", "ERROR")
-        
-        elif st.session_state.current_stage == 3:  # 第三階段
-            if PPEDetector.check_stage_completion(3, status):
-                st.session_state.current_stage = 4
-                st.session_state.completion_time = current_time
-                Logger.add_log("第三階段通過 - 防護衣和防護面罩", "SUCCESS")
-                Logger.add_log("🎉 所有PPE檢測完成！可以進入工作區域", "SUCCESS")
-            elif PPEDetector.check_stage_failure(3, status):
-                Logger.add_log("第三階段失敗 - 請檢查防護衣和防護面罩", "ERROR")
+        # 狀態機邏輯（規則表由 STAGE_CONFIG 編譯，每個階段只比較一次位元遮罩）
+        stage = state.current_stage
+        if stage == 0:  # 等待階段
+            if bits & PERSON_BIT:
+                # 事件記錄轉換前的階段（0），先記錄再進入第一階段
+                PPEDetector._record(state, EVENT_ENTER, current_time)
+                state.current_stage = 1
+                state.stage_start_time = current_time
+                state.stage_entered_time = current_time
+                PPEDetector._log(state, STAGE_RULES[1].enter_message, "INFO", current_time)
+        
+        elif stage < COMPLETE_STAGE:  # 檢測階段
+            rule = STAGE_RULES[stage]
+            if bits & rule.mask == rule.mask:
+                PPEDetector._advance(state, EVENT_STAGE_PASS, current_time)
+                PPEDetector._log(state, rule.pass_message, "SUCCESS", current_time)
+                if state.current_stage == COMPLETE_STAGE:
+                    PPEDetector._log(state, COMPLETION_MESSAGE, "SUCCESS", current_time)
+            else:
+                # 未通過的項目改變時才記錄一次失敗事件
+                if bits & rule.mask != state.failed_items:
+                    state.failed_items = bits & rule.mask
+                    PPEDetector._record(state, EVENT_STAGE_FAIL, current_time, state.stage_entered_time)
+                PPEDetector._log(state, rule.fail_message, "ERROR", current_time)
     
     @staticmethod
-    def reset_system(reason: str = "手動重置"):
+    def update_gates(states: Dict[int, GateState], statuses: Optional[Dict[int, AnyStatus]],
+                     current_time: Optional[datetime] = None):
+        """
+        以同一批檢測結果一次推進多個閘口
+        
+        Args:
+            states: 閘口編號對應的閘口狀態
+            statuses: 閘口編號對應的最新檢測結果，讀取失敗時為None
+            current_time: 判斷逾時用的時間，預設為現在
+        """
+        if current_time is None:
+            current_time = datetime.now()
+        if statuses is None:
+            statuses = {}
+        
+        for gate_id, state in states.items():
+            PPEDetector.update_detection_state(state, statuses.get(gate_id), current_time)
+    
+    @staticmethod
+    def reset_system(state: GateState, reason: str = "手動重置",
+                     current_time: Optional[datetime] = None):
         """
         重置系統到初始狀態
         
         Args:
+            state: 要重置的閘口狀態
             reason: 重置原因
+            current_time: 重置時間，預設為現在
         """
-        st.session_state.current_stage = 0
-        st.session_state.stage_start_time = None
-        st.session_state.last_person_seen = None
-        st.session_state.completion_time = None
-        Logger.add_log(f"系統重置: {reason}", "INFO")
+        if current_time is None:
+            current_time = datetime.now()
+        PPEDetector._record(state, EVENT_RESET, current_time, state.stage_start_time, reason)
+        state.current_stage = 0
+        state.stage_start_time = None
+        state.stage_entered_time = None
+        state.last_person_seen = None
+        state.completion_time = None
+        state.failed_items = None
+        PPEDetector._log(state, f"系統重置: {reason}", "INFO", current_time)
     
     @staticmethod
-    def manual_pass_stage():
-        """手動通過當前階段"""
-        if st.session_state.current_stage in [1, 2, 3]:
-            st.session_state.current_stage += 1
-            if st.session_state.current_stage == 4:
-                st.session_state.completion_time = datetime.now()
-                Logger.add_log("🎉 手動通過所有檢測！", "SUCCESS")
+    def manual_pass_stage(state: GateState):
+        """
+        手動通過當前階段
+        
+        Args:
+            state: 要推進的閘口狀態
+        """
+        if 1 <= state.current_stage < COMPLETE_STAGE:
+            PPEDetector._advance(state, EVENT_MANUAL_PASS, datetime.now())
+            if state.current_stage == COMPLETE_STAGE:
+                PPEDetector._log(state, "🎉 手動通過所有檢測！", "SUCCESS")
             else:
-                Logger.add_log(f"手動通過階段{st.session_state.current_stage-1}", "INFO")
\ No newline at end of file
+                PPEDetector._log(state, f"手動通過階段{state.current_stage-1}", "INFO")
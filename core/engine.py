@@ -0,0 +1,182 @@
+"""
+PPE 檢測引擎模組
+在背景執行緒中統一推進各閘口的狀態機，Streamlit 頁面只讀取發布的快照
+"""
+import copy
+import threading
+from typing import Dict, Optional, Tuple
+from models.gate_state import GateState
+from models.ppe_status import PackedStatus
+from models.stage_rules import COMPLETE_STAGE
+from config.settings import Config
+from core.detector import PPEDetector
+from core.logger import Logger
+from core.smoothing import ScoreSmoother, smooth_statuses
+from core.status_cache import StatusCache
+from core.watcher import StatusWatcher
+
+class DetectionEngine:
+    """無介面檢測引擎類 - 單例模式
+
+    每個行程只有一份狀態機（每個閘口一份狀態），不論開啟多少個瀏覽器分頁。
+    引擎在資料變更時立即推進，並以 ENGINE_TICK_INTERVAL 處理逾時重置。
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance.setup_engine()
+        return cls._instance
+
+    def setup_engine(self):
+        """建立閘口狀態並啟動背景執行緒"""
+        self._lock = threading.Lock()
+        self._states: Dict[int, GateState] = {
+            gate_id: GateState(gate_id=gate_id) for gate_id in Config.GATE_IDS
+        }
+        self._updated: Dict[int, threading.Condition] = {
+            gate_id: threading.Condition(self._lock) for gate_id in Config.GATE_IDS
+        }
+        self._published: Dict[int, GateState] = {}
+        self._smoothers: Dict[int, ScoreSmoother] = {}
+        self._stop = threading.Event()
+        self._watcher = StatusWatcher()
+
+        Logger.write_file("PPE檢測系統啟動（檢測引擎）", "INFO")
+        statuses = self._read_statuses()
+        with self._lock:
+            self._tick(statuses)
+
+        self._thread = threading.Thread(target=self._run, name="PPE_DetectionEngine", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _signature(state: GateState) -> Tuple:
+        """畫面關心的狀態欄位，用來判斷是否需要發布新版本"""
+        return (
+            state.current_stage,
+            state.stage_start_time,
+            state.completion_time,
+            state.last_person_seen is None,
+            state.status,
+            len(state.logs),
+            state.logs[-1] if state.logs else None
+        )
+
+    def _publish(self, gate_id: int):
+        """發布閘口狀態快照並喚醒等待中的頁面（需持有 self._lock）"""
+        state = self._states[gate_id]
+        state.version += 1
+        snapshot = copy.copy(state)
+        snapshot.logs = copy.copy(state.logs)
+        self._published[gate_id] = snapshot
+        self._updated[gate_id].notify_all()
+
+    def _tick(self, statuses: Optional[Dict[int, PackedStatus]]):
+        """
+        以最新檢測結果推進所有閘口（需持有 self._lock）
+
+        Args:
+            statuses: 閘口編號對應的最新檢測結果，讀取失敗時為None
+        """
+        before = {gate_id: self._signature(state) for gate_id, state in self._states.items()}
+        PPEDetector.update_gates(self._states, statuses)
+        for gate_id, state in self._states.items():
+            if gate_id not in self._published or self._signature(state) != before[gate_id]:
+                self._publish(gate_id)
+
+    def _read_statuses(self) -> Optional[Dict[int, PackedStatus]]:
+        """
+        讀取所有閘口的檢測結果，有 realtime_detection 分數時以平滑後的判斷取代各項目
+
+        Returns:
+            Dict[int, PackedStatus]: 閘口編號對應的檢測結果，讀取失敗時為None
+        """
+        # 所有閘口以單一查詢讀取，資料未變更時由快取提供
+        statuses = StatusCache.get_all_status(Config.GATE_IDS)
+        if Config.SMOOTHING_ENABLED and statuses:
+            scores = StatusCache.get_all_scores(Config.GATE_IDS)
+            statuses = smooth_statuses(self._smoothers, statuses, scores)
+        return statuses
+
+    def _run(self):
+        """背景推進迴圈"""
+        # 檢測結果或檢測分數任一改變時都立即推進（分數改變可能讓平滑後的判斷改變）
+        seen_versions = self._watcher.data_versions()
+        while not self._stop.is_set():
+            seen_versions = self._watcher.wait_for_data_change(
+                seen_versions, timeout=Config.ENGINE_TICK_INTERVAL
+            )
+            statuses = self._read_statuses()
+            with self._lock:
+                self._tick(statuses)
+
+    def snapshot(self, gate_id: int = 1) -> GateState:
+        """
+        取得閘口最新發布的狀態快照
+
+        Args:
+            gate_id: 閘口編號
+
+        Returns:
+            GateState: 唯讀快照，修改它不會影響引擎
+        """
+        with self._lock:
+            return self._published[gate_id]
+
+    def wait_for_update(self, gate_id: int, since_version: int, timeout: float) -> GateState:
+        """
+        阻塞直到閘口發布新版本或逾時
+
+        Args:
+            gate_id: 閘口編號
+            since_version: 呼叫端最後看到的版本
+            timeout: 最長等待秒數
+
+        Returns:
+            GateState: 返回時的最新快照
+        """
+        with self._lock:
+            self._updated[gate_id].wait_for(
+                lambda: self._published[gate_id].version != since_version,
+                timeout
+            )
+            return self._published[gate_id]
+
+    def reset(self, gate_id: int = 1, reason: str = "手動重置"):
+        """
+        重置閘口狀態機
+
+        Args:
+            gate_id: 閘口編號
+            reason: 重置原因
+        """
+        with self._lock:
+            PPEDetector.reset_system(self._states[gate_id], reason)
+            self._publish(gate_id)
+
+    def manual_pass(self, gate_id: int = 1) -> bool:
+        """
+        手動通過閘口當前階段
+
+        Args:
+            gate_id: 閘口編號
+
+        Returns:
+            bool: 當前階段是否可手動通過
+        """
+        with self._lock:
+            state = self._states[gate_id]
+            if not 1 <= state.current_stage < COMPLETE_STAGE:
+                return False
+            PPEDetector.manual_pass_stage(state)
+            self._publish(gate_id)
+            return True
+
+    def stop(self):
+        """停止背景推進執行緒"""
+        self._stop.set()
+        self._thread.join()
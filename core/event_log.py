@@ -0,0 +1,80 @@
+"""
+PPE 檢測事件日誌模組
+邊緣觸發：只在訊息改變時寫出，連續重複的訊息合併為一筆摘要
+"""
+from datetime import datetime
+from typing import List, Tuple
+from models.gate_state import RepeatRecord
+from config.settings import Config
+
+class EdgeTriggeredLog:
+    """邊緣觸發日誌過濾類"""
+    
+    @staticmethod
+    def summary(record: RepeatRecord) -> Tuple[str, str]:
+        """
+        產生重複摘要
+        
+        Args:
+            record: 重複狀態
+            
+        Returns:
+            Tuple[str, str]: (摘要訊息, 日誌等級)
+        """
+        duration = (record.last_time - record.window_start).total_seconds()
+        return f"{record.message}（重複 {record.repeats} 次，歷時 {duration:.0f} 秒）", record.level
+    
+    @staticmethod
+    def filter(record: RepeatRecord, message: str, level: str,
+               current_time: datetime) -> List[Tuple[str, str]]:
+        """
+        判斷一則日誌是否需要寫出
+        
+        相同訊息連續出現時只記錄次數；訊息改變時先寫出上一則的重複摘要。
+        持續重複超過 LOG_REPEAT_SUMMARY_INTERVAL 秒時也會寫出一次摘要，
+        讓長時間的失敗在日誌中仍然可見。
+        
+        Args:
+            record: 閘口的重複狀態（會被更新）
+            message: 日誌訊息
+            level: 日誌等級
+            current_time: 日誌時間
+            
+        Returns:
+            List[Tuple[str, str]]: 需要寫出的 (訊息, 等級)，可能為空
+        """
+        if record.window_start and record.level == level and record.message == message:
+            record.repeats += 1
+            record.last_time = current_time
+            if (current_time - record.window_start).total_seconds() >= Config.LOG_REPEAT_SUMMARY_INTERVAL:
+                entry = EdgeTriggeredLog.summary(record)
+                record.window_start = current_time
+                record.repeats = 0
+                return [entry]
+            return []
+        
+        entries = EdgeTriggeredLog.flush(record)
+        record.level = level
+        record.message = message
+        record.window_start = current_time
+        record.last_time = current_time
+        record.repeats = 0
+        entries.append((message, level))
+        return entries
+    
+    @staticmethod
+    def flush(record: RepeatRecord) -> List[Tuple[str, str]]:
+        """
+        取出尚未寫出的重複摘要
+        
+        Args:
+            record: 閘口的重複狀態（會被更新）
+            
+        Returns:
+            List[Tuple[str, str]]: 有略過的重複時返回一筆摘要，否則為空
+        """
+        entries = []
+        if record.repeats:
+            entries.append(EdgeTriggeredLog.summary(record))
+            record.repeats = 0
+        return entries
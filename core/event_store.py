@@ -0,0 +1,169 @@
+"""
+PPE 檢測事件儲存模組
+將階段轉換、失敗、重置與手動通過寫入 ppe_events 表（只附加），
+由背景執行緒批次寫入，並在同一交易中累加分鐘/小時/日彙總表
+"""
+import atexit
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from typing import List, Optional
+from models.ppe_event import PPEEvent
+from config.settings import Config
+from core.rollups import EventRollups
+
+class EventStore:
+    """結構化事件寫入類 - 單例模式
+
+    溢位策略與 AsyncLogWriter 相同：佇列已滿時捨棄新事件並記錄數量。
+    寫入失敗（例如資料庫暫時被鎖定）的批次會保留到下一輪重試。
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    SCHEMA = '''
+        PRAGMA journal_mode = WAL;
+        CREATE TABLE IF NOT EXISTS ppe_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            gate_id INTEGER NOT NULL,
+            event_type TEXT NOT NULL,
+            stage INTEGER NOT NULL,
+            items INTEGER NOT NULL,
+            timestamp REAL NOT NULL,
+            duration REAL,
+            detail TEXT NOT NULL DEFAULT ''
+        );
+        CREATE INDEX IF NOT EXISTS idx_ppe_events_time ON ppe_events (timestamp);
+        CREATE INDEX IF NOT EXISTS idx_ppe_events_gate_time ON ppe_events (gate_id, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_ppe_events_type_time ON ppe_events (event_type, timestamp);
+    '''
+
+    COLUMNS = ("gate_id", "event_type", "stage", "items", "timestamp", "duration", "detail")
+
+    def __new__(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance.setup_store()
+        return cls._instance
+
+    def setup_store(self):
+        """建立佇列並啟動背景寫入執行緒"""
+        self._queue: "queue.Queue[PPEEvent]" = queue.Queue(maxsize=Config.EVENT_QUEUE_SIZE)
+        self._pending: List[PPEEvent] = []
+        self._write_lock = threading.Lock()
+        self._dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_path: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="PPE_EventStore", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, event: PPEEvent):
+        """
+        非阻塞地加入一筆事件
+
+        Args:
+            event: 檢測事件
+        """
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            with self._dropped_lock:
+                self._dropped += 1
+
+    def _connection(self) -> sqlite3.Connection:
+        """取得寫入連線，第一次使用時建立資料表、索引與彙總表"""
+        if self._conn is None or self._db_path != Config.DB_PATH:
+            if self._conn is not None:
+                self._conn.close()
+            self._db_path = Config.DB_PATH
+            self._conn = sqlite3.connect(self._db_path, timeout=Config.DB_TIMEOUT, check_same_thread=False)
+            self._conn.executescript(EventStore.SCHEMA + EventRollups.SCHEMA)
+            EventRollups.backfill(self._conn)
+        return self._conn
+
+    def _take_batch(self, timeout: float) -> List[PPEEvent]:
+        """等待第一筆事件，再取出佇列中已有的事件（最多 EVENT_BATCH_SIZE 筆）"""
+        try:
+            batch = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while len(batch) < Config.EVENT_BATCH_SIZE:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self) -> bool:
+        """以單一交易寫入待寫入的事件，返回是否成功（需持有 self._write_lock）"""
+        with self._dropped_lock:
+            dropped, self._dropped = self._dropped, 0
+        if dropped:
+            print(f"事件佇列已滿，捨棄 {dropped} 筆事件", file=sys.stderr)
+        if not self._pending:
+            return True
+
+        rows = [
+            (e.gate_id, e.event_type, e.stage, e.items, e.timestamp, e.duration, e.detail)
+            for e in self._pending
+        ]
+        try:
+            conn = self._connection()
+            with conn:
+                conn.executemany(f'''
+                    INSERT INTO ppe_events ({", ".join(EventStore.COLUMNS)})
+                    VALUES ({", ".join("?" * len(EventStore.COLUMNS))})
+                ''', rows)
+                EventRollups.apply(conn, self._pending)
+        except Exception as e:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            print(f"寫入事件失敗: {str(e)}", file=sys.stderr)
+            # 保留待寫入事件，但不超過佇列上限
+            del self._pending[:-Config.EVENT_QUEUE_SIZE]
+            return False
+        self._pending.clear()
+        return True
+
+    def _run(self):
+        """背景寫入迴圈：累積滿一批或距上次寫入超過 EVENT_FLUSH_INTERVAL 秒時寫入"""
+        last_write = time.monotonic()
+        while not self._stop.is_set():
+            batch = self._take_batch(Config.EVENT_FLUSH_INTERVAL)
+            with self._write_lock:
+                self._pending.extend(batch)
+                due = time.monotonic() - last_write >= Config.EVENT_FLUSH_INTERVAL
+                if self._pending and (due or len(self._pending) >= Config.EVENT_BATCH_SIZE):
+                    self._write()
+                    last_write = time.monotonic()
+
+    def flush(self):
+        """立即寫出佇列中所有事件（供結束或產生報表前使用）"""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        with self._write_lock:
+            self._pending.extend(batch)
+            self._write()
+
+    def close(self):
+        """停止背景執行緒，寫出剩餘事件並關閉連線"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join(timeout=Config.EVENT_FLUSH_INTERVAL + 1)
+        self.flush()
+        with self._write_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,165 @@
+"""
+PPE 檢測推論後端模組
+以 CPU 執行 PPE 檢測模型（OpenCV DNN 或 ONNX Runtime），輸出各檢測項目的分數
+
+模型約定：輸入為 INFERENCE_INPUT_SIZE 的 RGB 影像（NCHW float32，0~1），
+輸出為各項目的機率（0~1）。INFERENCE_MODELS 設定每個模型輸出對應的項目，
+可以是一個多標籤模型輸出全部項目，也可以每個項目一個模型（只需要部分項目時只執行對應模型）。
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Sequence
+import numpy as np
+from models.stage_config import ITEM_KEYS
+from models.stage_rules import ITEM_BITS
+from config.settings import Config
+
+try:
+    import cv2
+except ImportError:  # opencv-python 只有攝影機推論需要
+    cv2 = None
+
+class InferenceBackend(ABC):
+    """推論後端基底類別：前處理與依項目選擇要執行的模型
+
+    子類別必須實作 load 與 run，未實作時建立實例即失敗。
+    """
+    name = ""
+
+    def __init__(self, models: Optional[Dict[str, Optional[Sequence[str]]]] = None):
+        """
+        Args:
+            models: 模型路徑 -> 輸出對應的項目（None 表示依 ITEM_KEYS 順序），預設 INFERENCE_MODELS
+        """
+        if cv2 is None:
+            raise RuntimeError("攝影機推論需要 opencv-python（pip install -r requirements.txt）")
+        models = Config.INFERENCE_MODELS if models is None else models
+        self.models = []  # (已載入的模型, 輸出項目)
+        self.item_model: Dict[str, int] = {}  # 項目 -> self.models 索引（後設定的模型優先）
+        for path, items in models.items():
+            items = list(ITEM_KEYS if items is None else items)
+            unknown = [item_key for item_key in items if item_key not in ITEM_KEYS]
+            if unknown:
+                raise ValueError(f"模型 {path} 的輸出項目不存在: {', '.join(unknown)}")
+            self.models.append((self.load(path), items))
+            for item_key in items:
+                self.item_model[item_key] = len(self.models) - 1
+        missing = [item_key for item_key in ITEM_KEYS if item_key not in self.item_model]
+        if missing:
+            raise ValueError(f"沒有模型輸出以下項目: {', '.join(missing)}")
+
+    @abstractmethod
+    def load(self, path: str):
+        """載入模型（由子類別實作）"""
+
+    @abstractmethod
+    def run(self, model, blob: np.ndarray) -> np.ndarray:
+        """執行一個模型，返回攤平的輸出（由子類別實作）"""
+
+    @staticmethod
+    def preprocess(image: np.ndarray) -> np.ndarray:
+        """
+        將 BGR 影像轉為模型輸入
+
+        Args:
+            image: 攝影機畫面（BGR，HWC uint8）
+
+        Returns:
+            np.ndarray: 1x3xHxW float32，RGB，0~1
+        """
+        return cv2.dnn.blobFromImage(
+            image, scalefactor=1 / 255.0, size=tuple(Config.INFERENCE_INPUT_SIZE), swapRB=True
+        )
+
+    def infer(self, blob: np.ndarray, items: Optional[Sequence[str]] = None) -> Dict[str, float]:
+        """
+        執行推論
+
+        Args:
+            blob: preprocess 的結果
+            items: 需要的項目，None 表示全部；只執行輸出這些項目的模型
+
+        Returns:
+            Dict[str, float]: 項目 -> 分數（包含所執行模型的全部輸出項目）
+        """
+        needed = sorted({self.item_model[item_key] for item_key in (ITEM_KEYS if items is None else items)})
+        scores: Dict[str, float] = {}
+        for index in needed:
+            model, model_items = self.models[index]
+            output = self.run(model, blob)
+            if output.size < len(model_items):
+                raise ValueError(f"模型輸出 {output.size} 個值，少於設定的 {len(model_items)} 個項目")
+            for item_key, score in zip(model_items, output.tolist()):
+                scores[item_key] = score
+        return scores
+
+class OpenCVDnnBackend(InferenceBackend):
+    """OpenCV DNN 後端（可讀取 ONNX、Caffe、TensorFlow 等格式）"""
+    name = "opencv"
+
+    def load(self, path: str):
+        net = cv2.dnn.readNet(path)
+        net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        return net
+
+    def run(self, model, blob: np.ndarray) -> np.ndarray:
+        model.setInput(blob)
+        return np.asarray(model.forward()).ravel()
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """ONNX Runtime 後端（需要另外安裝 onnxruntime）"""
+    name = "onnx"
+
+    def load(self, path: str):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise RuntimeError("onnx 後端需要 onnxruntime（pip install onnxruntime）")
+        options = onnxruntime.SessionOptions()
+        if Config.INFERENCE_THREADS:
+            options.intra_op_num_threads = Config.INFERENCE_THREADS
+        session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        return session, session.get_inputs()[0].name
+
+    def run(self, model, blob: np.ndarray) -> np.ndarray:
+        session, input_name = model
+        return np.asarray(session.run(None, {input_name: blob})[0]).ravel()
+
+BACKENDS = {backend.name: backend for backend in (OpenCVDnnBackend, OnnxRuntimeBackend)}
+
+def create_backend(name: Optional[str] = None,
+                   models: Optional[Dict[str, Optional[Sequence[str]]]] = None) -> InferenceBackend:
+    """
+    建立推論後端
+
+    Args:
+        name: "opencv" 或 "onnx"，預設 INFERENCE_BACKEND
+        models: 模型設定，預設 INFERENCE_MODELS
+
+    Returns:
+        InferenceBackend: 已載入模型的後端
+    """
+    name = name or Config.INFERENCE_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"未知的推論後端: {name}（可用: {', '.join(BACKENDS)}）")
+    if cv2 is not None and Config.INFERENCE_THREADS:
+        cv2.setNumThreads(Config.INFERENCE_THREADS)
+    return BACKENDS[name](models)
+
+def scores_to_bits(scores: Dict[str, float], threshold: Optional[float] = None) -> int:
+    """
+    將分數轉為項目位元（分數達到門檻為 "pass"）
+
+    Args:
+        scores: 項目 -> 分數
+        threshold: 門檻，預設 INFERENCE_THRESHOLD
+
+    Returns:
+        int: 項目位元
+    """
+    threshold = Config.INFERENCE_THRESHOLD if threshold is None else threshold
+    bits = 0
+    for item_key, score in scores.items():
+        if score >= threshold:
+            bits |= ITEM_BITS[item_key]
+    return bits
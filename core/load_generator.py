@@ -0,0 +1,306 @@
+"""
+PPE 檢測合成負載產生模組
+模擬多個閘口的人員到達、排隊與穿戴過程，以固定畫面率經由 StatusWriter 寫入 ppe_detection，
+並量測寫入到檢測引擎可見的端到端延遲與讀取端的資料庫競爭
+"""
+import random
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional
+import numpy as np
+from models.ppe_status import PackedStatus
+from models.stage_config import ITEM_KEYS
+from models.stage_rules import ITEM_BITS, PERSON_BIT
+from core.database import Database
+from core.status_writer import StatusWriter
+from core.watcher import StatusWatcher
+
+# 需要穿戴的項目（has_person 以外）
+WEAR_KEYS = [item_key for item_key in ITEM_KEYS if item_key != "has_person"]
+
+@dataclass
+class LoadProfile:
+    """負載設定"""
+    gates: int = 1  # 閘口數（閘口編號 1 ~ gates）
+    fps: float = 30.0  # 每個閘口每秒寫入的畫面數
+    arrival_rate: float = 2.0  # 每個閘口每分鐘平均到達人數（卜瓦松過程）
+    shift_interval: float = 0.0  # 交班尖峰間隔秒數，0 表示沒有尖峰
+    shift_length: float = 60.0  # 每次尖峰持續秒數
+    shift_multiplier: float = 10.0  # 尖峰期間到達率倍數
+    compliance: Dict[str, float] = field(default_factory=lambda: {key: 0.8 for key in WEAR_KEYS})  # 到達時已穿戴的機率
+    fix_time: float = 5.0  # 未穿戴的項目平均幾秒後補上（指數分布）
+    miss_rate: float = 0.0  # 每個畫面把已穿戴項目誤判為未通過的機率
+    dwell: float = 3.0  # 全部穿戴完成後停留秒數
+    walk_gap: float = 1.0  # 前一人離開到下一人進入的間隔秒數
+    seed: Optional[int] = None  # 亂數種子（重現同一段負載）
+
+    def arrival_rate_at(self, elapsed: float) -> float:
+        """
+        取得某一時間點每個閘口的到達率
+
+        Args:
+            elapsed: 模擬開始後經過的秒數
+
+        Returns:
+            float: 每秒到達人數
+        """
+        rate = self.arrival_rate / 60
+        if self.shift_interval > 0 and elapsed % self.shift_interval < self.shift_length:
+            rate *= self.shift_multiplier
+        return rate
+
+@dataclass
+class Person:
+    """正在閘口檢測的人員"""
+    entered: float  # 進入閘口的時間（模擬秒數）
+    ready: Dict[str, float]  # 各項目穿戴完成的時間
+    leave: float  # 離開閘口的時間
+
+class GateSimulator:
+    """單一閘口的人員佇列與穿戴過程"""
+
+    def __init__(self, gate_id: int, profile: LoadProfile, rng: random.Random):
+        self.gate_id = gate_id
+        self.profile = profile
+        self.rng = rng
+        self.queue: Deque[float] = deque()  # 排隊中人員的到達時間
+        self.person: Optional[Person] = None
+        self.free_at = 0.0  # 下一位可以進入閘口的時間
+        self.served = 0
+
+    def _enter(self, now: float) -> Person:
+        """排隊的第一位進入閘口，決定各項目何時穿戴完成"""
+        self.queue.popleft()
+        ready = {}
+        for item_key in WEAR_KEYS:
+            worn = self.rng.random() < self.profile.compliance.get(item_key, 1.0)
+            ready[item_key] = now if worn else now + self.rng.expovariate(1 / self.profile.fix_time)
+        return Person(entered=now, ready=ready, leave=max(ready.values()) + self.profile.dwell)
+
+    def step(self, now: float, dt: float) -> int:
+        """
+        推進一個畫面
+
+        Args:
+            now: 模擬開始後經過的秒數
+            dt: 畫面間隔秒數
+
+        Returns:
+            int: 此畫面的檢測項目位元
+        """
+        if self.rng.random() < self.profile.arrival_rate_at(now) * dt:
+            self.queue.append(now)
+
+        if self.person and now >= self.person.leave:
+            self.person = None
+            self.served += 1
+            self.free_at = now + self.profile.walk_gap
+        if self.person is None and self.queue and now >= self.free_at:
+            self.person = self._enter(now)
+        if self.person is None:
+            return 0
+
+        bits = PERSON_BIT
+        for item_key, ready in self.person.ready.items():
+            if now >= ready and self.rng.random() >= self.profile.miss_rate:
+                bits |= ITEM_BITS[item_key]
+        return bits
+
+class LatencyProbe:
+    """端到端延遲量測：畫面送出到資料庫中可讀到相同結果的時間"""
+
+    def __init__(self, gate_ids: List[int]):
+        self._lock = threading.Lock()
+        self._pending: Dict[int, tuple] = {}  # 閘口編號 -> (項目位元, 送出時間)
+        self._samples: List[float] = []
+        self._gate_ids = gate_ids
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="PPE_LatencyProbe", daemon=True)
+
+    def start(self):
+        """啟動量測執行緒"""
+        self._thread.start()
+
+    def expect(self, gate_id: int, bits: int, sent: float):
+        """
+        記錄一個會改變資料列內容的畫面
+
+        Args:
+            gate_id: 閘口編號
+            bits: 送出的項目位元
+            sent: 送出時間（time.monotonic()）
+        """
+        with self._lock:
+            self._pending[gate_id] = (bits, sent)
+
+    def _run(self):
+        """等待監看到資料變更後讀取，比對尚未確認的畫面"""
+        watcher = StatusWatcher()
+        version = watcher.any_version()
+        while not self._stop.is_set():
+            version = watcher.wait_for_any_change(version, timeout=0.5)
+            statuses = Database.get_all_status(self._gate_ids) or {}
+            now = time.monotonic()
+            with self._lock:
+                for gate_id, status in statuses.items():
+                    pending = self._pending.get(gate_id)
+                    if pending and pending[0] == status.bits:
+                        self._samples.append(now - pending[1])
+                        del self._pending[gate_id]
+
+    def take_samples(self) -> List[float]:
+        """取出目前累積的延遲樣本（秒）"""
+        with self._lock:
+            samples, self._samples = self._samples, []
+        return samples
+
+    def stop(self):
+        """停止量測執行緒"""
+        self._stop.set()
+        self._thread.join(timeout=1)
+
+class ReadContention:
+    """模擬多個頁面同時讀取，量測讀取延遲與失敗次數"""
+
+    def __init__(self, readers: int, gate_ids: List[int]):
+        self._lock = threading.Lock()
+        self._samples: List[float] = []
+        self._failures = 0
+        self._gate_ids = gate_ids
+        self._stop = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"PPE_Reader{index}", daemon=True)
+            for index in range(readers)
+        ]
+
+    def start(self):
+        """啟動讀取執行緒"""
+        for thread in self._threads:
+            thread.start()
+
+    def _run(self):
+        """以 Database.get_all_status 持續讀取（每次間隔 10 毫秒）"""
+        while not self._stop.wait(0.01):
+            start = time.monotonic()
+            result = Database.get_all_status(self._gate_ids)
+            elapsed = time.monotonic() - start
+            with self._lock:
+                if result is None:
+                    self._failures += 1
+                else:
+                    self._samples.append(elapsed)
+
+    def take(self) -> tuple:
+        """取出目前累積的 (讀取延遲樣本, 失敗次數)"""
+        with self._lock:
+            samples, self._samples = self._samples, []
+            failures, self._failures = self._failures, 0
+        return samples, failures
+
+    def stop(self):
+        """停止讀取執行緒"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=1)
+
+def percentiles_ms(samples: List[float]) -> str:
+    """延遲樣本的 p50/p99（毫秒）文字，沒有樣本時為 "-" """
+    if not samples:
+        return "-"
+    p50, p99 = np.percentile(np.asarray(samples) * 1000, [50, 99])
+    return f"{p50:.1f}/{p99:.1f}"
+
+class LoadGenerator:
+    """合成負載產生類"""
+
+    def __init__(self, profile: LoadProfile, readers: int = 0):
+        self.profile = profile
+        rng = random.Random(profile.seed)
+        self.gates = [GateSimulator(gate_id, profile, rng) for gate_id in range(1, profile.gates + 1)]
+        gate_ids = [gate.gate_id for gate in self.gates]
+        self.writer = StatusWriter()
+        self.probe = LatencyProbe(gate_ids)
+        self.contention = ReadContention(readers, gate_ids)
+        self._last_bits: Dict[int, int] = {}
+
+    def frame(self, now: float, dt: float):
+        """
+        產生並送出所有閘口的一個畫面
+
+        Args:
+            now: 模擬開始後經過的秒數
+            dt: 畫面間隔秒數
+        """
+        sent = time.monotonic()
+        for gate in self.gates:
+            bits = gate.step(now, dt)
+            self.writer.submit(gate.gate_id, PackedStatus(bits))
+            if self._last_bits.get(gate.gate_id) != bits:
+                self._last_bits[gate.gate_id] = bits
+                self.probe.expect(gate.gate_id, bits, sent)
+
+    def report(self, elapsed: float, interval: float, last_stats: Dict[str, int]) -> str:
+        """
+        一段期間的統計文字
+
+        Args:
+            elapsed: 模擬開始後經過的秒數
+            interval: 統計期間秒數
+            last_stats: 上次統計時的 StatusWriter.stats()
+
+        Returns:
+            str: 人數、畫面/提交速率、端到端與讀取延遲、失敗次數
+        """
+        stats = self.writer.stats()
+        present = sum(gate.person is not None for gate in self.gates)
+        queued = sum(len(gate.queue) for gate in self.gates)
+        served = sum(gate.served for gate in self.gates)
+        reads, read_failures = self.contention.take()
+        return (
+            f"[{elapsed:7.1f}s] 在場 {present} 排隊 {queued} 完成 {served} | "
+            f"畫面 {(stats['frames'] - last_stats['frames']) / interval:.0f}/s "
+            f"提交 {(stats['commits'] - last_stats['commits']) / interval:.1f}/s "
+            f"失敗 {stats['failures'] - last_stats['failures']} | "
+            f"端到端 p50/p99 {percentiles_ms(self.probe.take_samples())} ms | "
+            f"讀取 p50/p99 {percentiles_ms(reads)} ms 失敗 {read_failures}"
+        )
+
+    def run(self, duration: float = 0.0, report_interval: float = 5.0):
+        """
+        以設定的畫面率執行模擬，定期輸出統計
+
+        Args:
+            duration: 執行秒數，0 表示直到中斷
+            report_interval: 統計輸出間隔秒數
+        """
+        dt = 1 / self.profile.fps
+        self.probe.start()
+        self.contention.start()
+        start = time.monotonic()
+        next_frame = start
+        next_report = start + report_interval
+        last_stats = self.writer.stats()
+        try:
+            while duration <= 0 or next_frame - start < duration:
+                self.frame(next_frame - start, dt)
+                next_frame += dt
+                now = time.monotonic()
+                if now >= next_report:
+                    print(self.report(now - start, report_interval, last_stats), flush=True)
+                    last_stats = self.writer.stats()
+                    next_report += report_interval
+                if next_frame > now:
+                    time.sleep(next_frame - now)
+                elif now - next_frame > 1:
+                    # 落後超過一秒時放棄追趕，避免一次送出大量過期畫面
+                    print(f"畫面落後 {now - next_frame:.1f} 秒", file=sys.stderr)
+                    next_frame = now
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.writer.flush()
+            self.contention.stop()
+            self.probe.stop()
@@ -0,0 +1,224 @@
+"""
+PPE 檢測系統日誌檔案模組
+負責日誌檔名規則、按日與大小輪替、gzip 壓縮封存、保留期限，以及透明讀取封存檔
+"""
+import gzip
+import io
+import logging
+import os
+import re
+import shutil
+from datetime import date, datetime, timedelta
+from typing import IO, List, Optional, Sequence
+from config.settings import Config
+
+LOG_PREFIX = "ppe_detection"
+
+# 日誌索引（core.log_index）的存放目錄
+INDEX_DIR = os.path.join(Config.LOG_DIR, ".index")
+
+# ppe_detection_2025-09-11.log / ppe_detection_2025-09-11.3.log.gz
+_LOG_NAME_PATTERN = re.compile(
+    rf"^{LOG_PREFIX}_(\d{{4}}-\d{{2}}-\d{{2}})(?:\.(\d+))?\.log(\.gz)?$"
+)
+
+def parse_log_name(name: str) -> Optional[tuple]:
+    """
+    解析日誌檔名
+
+    Args:
+        name: 檔名（不含目錄）
+
+    Returns:
+        tuple: (日期字串, 分段編號, 是否壓縮)，目前寫入中的檔案分段編號為None；
+        不是日誌檔時返回None
+    """
+    match = _LOG_NAME_PATTERN.match(name)
+    if not match:
+        return None
+    day, part, compressed = match.groups()
+    return day, int(part) if part else None, bool(compressed)
+
+def list_log_files() -> List[str]:
+    """
+    列出日誌目錄中的日誌檔（含封存檔），新的在前
+
+    同一天內目前寫入中的檔案排最前，其後依分段編號由大到小。
+
+    Returns:
+        List[str]: 檔名列表
+    """
+    if not os.path.isdir(Config.LOG_DIR):
+        return []
+
+    entries = []
+    for name in os.listdir(Config.LOG_DIR):
+        parsed = parse_log_name(name)
+        if parsed:
+            day, part, _ = parsed
+            entries.append(((day, float("inf") if part is None else part), name))
+    entries.sort(reverse=True)
+    return [name for _, name in entries]
+
+def open_log_file(name: str) -> IO[str]:
+    """
+    以文字模式開啟日誌檔，.gz 封存檔會自動解壓
+
+    Args:
+        name: 檔名（不含目錄）
+
+    Returns:
+        IO[str]: UTF-8 文字串流
+    """
+    path = os.path.join(Config.LOG_DIR, name)
+    if name.endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+def remove_log_index(name: str):
+    """
+    刪除日誌檔對應的索引檔（檔案被封存或刪除時呼叫）
+
+    Args:
+        name: 日誌檔名（不含目錄）
+    """
+    for suffix in (".idx", ".meta"):
+        path = os.path.join(INDEX_DIR, name + suffix)
+        if os.path.exists(path):
+            os.remove(path)
+
+def _next_archive_path(day: str) -> str:
+    """取得指定日期下一個封存分段的路徑"""
+    parts = [
+        parsed[1] for parsed in map(parse_log_name, os.listdir(Config.LOG_DIR))
+        if parsed and parsed[0] == day and parsed[1] is not None
+    ]
+    part = max(parts, default=0) + 1
+    return os.path.join(Config.LOG_DIR, f"{LOG_PREFIX}_{day}.{part}.log.gz")
+
+def archive_log_file(path: str, day: str):
+    """
+    將日誌檔壓縮為該日期的下一個封存分段並刪除原檔
+
+    Args:
+        path: 要封存的 .log 檔路徑
+        day: 日誌日期字串
+    """
+    if not os.path.exists(path):
+        return
+    remove_log_index(os.path.basename(path))
+    if os.path.getsize(path) == 0:
+        os.remove(path)
+        return
+    archive_path = _next_archive_path(day)
+    with open(path, "rb") as source, gzip.open(archive_path, "wb") as target:
+        shutil.copyfileobj(source, target)
+    os.remove(path)
+
+def apply_retention(today: Optional[date] = None):
+    """
+    刪除超過 LOG_RETENTION_DAYS 的日誌檔與封存檔
+
+    Args:
+        today: 計算保留期限的基準日，預設為今天
+    """
+    if today is None:
+        today = date.today()
+    cutoff = (today - timedelta(days=Config.LOG_RETENTION_DAYS)).isoformat()
+    for name in os.listdir(Config.LOG_DIR):
+        parsed = parse_log_name(name)
+        if parsed and parsed[0] < cutoff:
+            os.remove(os.path.join(Config.LOG_DIR, name))
+            remove_log_index(name)
+
+def maintain_log_dir(today: Optional[date] = None):
+    """
+    封存前幾天留下的未壓縮日誌，並刪除超過 LOG_RETENTION_DAYS 的日誌檔與封存檔
+
+    只在換日輪替時由 RotatingLogFileHandler 呼叫，或明確執行 python -m core.log_files；
+    建立處理器（例如啟動 Logger）不會封存或刪除任何檔案。只處理日誌目錄第一層的日誌檔，
+    子目錄（例如 logs/samples/）不受影響。
+
+    Args:
+        today: 基準日，早於此日的未壓縮日誌會被封存，預設為今天
+    """
+    if today is None:
+        today = date.today()
+    if not os.path.isdir(Config.LOG_DIR):
+        return
+    day = today.isoformat()
+    for name in os.listdir(Config.LOG_DIR):
+        parsed = parse_log_name(name)
+        if parsed and parsed[1] is None and not parsed[2] and parsed[0] < day:
+            archive_log_file(os.path.join(Config.LOG_DIR, name), parsed[0])
+    apply_retention(today)
+
+class RotatingLogFileHandler(logging.FileHandler):
+    """按日與大小輪替的批次日誌處理器
+
+    目前寫入 logs/ppe_detection_{日期}.log；換日或超過 LOG_MAX_BYTES 時
+    壓縮為 ppe_detection_{日期}.{分段}.log.gz；換日時另外執行 maintain_log_dir。
+    """
+
+    def __init__(self, encoding: str = "utf-8"):
+        os.makedirs(Config.LOG_DIR, exist_ok=True)
+        self._day = date.today().isoformat()
+        super().__init__(self._path_for(self._day), encoding=encoding, delay=True)
+        self._size = os.path.getsize(self.baseFilename) if os.path.exists(self.baseFilename) else 0
+
+    @staticmethod
+    def _path_for(day: str) -> str:
+        """取得指定日期寫入中的日誌檔路徑"""
+        return os.path.join(Config.LOG_DIR, f"{LOG_PREFIX}_{day}.log")
+
+    def _rollover(self, day: str):
+        """封存目前的日誌檔並切換到指定日期的檔案（需持有 handler 鎖）"""
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        archive_log_file(self.baseFilename, self._day)
+        if day != self._day:
+            maintain_log_dir(date.fromisoformat(day))
+        self._day = day
+        self.baseFilename = os.path.abspath(self._path_for(day))
+        self._size = 0
+
+    def _write_lines(self, lines: List[str]):
+        """寫入已格式化的日誌行並 flush 一次"""
+        if not lines:
+            return
+        if self.stream is None:
+            self.stream = self._open()
+        self.stream.write("".join(lines))
+        self.stream.flush()
+
+    def emit_batch(self, records: Sequence[logging.LogRecord]):
+        """批次寫入日誌，必要時在批次中途輪替"""
+        records = [record for record in records if record.levelno >= self.level]
+        if not records:
+            return
+        self.acquire()
+        try:
+            lines = []
+            for record in records:
+                day = datetime.fromtimestamp(record.created).date().isoformat()
+                line = self.format(record) + self.terminator
+                size = len(line.encode(self.encoding or "utf-8"))
+                if day > self._day or (self._size and self._size + size > Config.LOG_MAX_BYTES):
+                    self._write_lines(lines)
+                    lines = []
+                    self._rollover(max(day, self._day))
+                lines.append(line)
+                self._size += size
+            self._write_lines(lines)
+        except Exception:
+            self.handleError(records[0])
+        finally:
+            self.release()
+
+    def emit(self, record: logging.LogRecord):
+        self.emit_batch([record])
+
+if __name__ == "__main__":
+    # 手動整理日誌目錄：python -m core.log_files
+    maintain_log_dir()
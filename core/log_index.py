@@ -0,0 +1,334 @@
+"""
+PPE 檢測系統日誌索引模組
+為每個日誌檔維護持久化的位元組位移索引（時間、等級），讀取最後一頁、
+分頁、時間跳轉與等級篩選都直接 seek 到需要的行，不必讀取整個檔案
+"""
+import gzip
+import json
+import os
+import sys
+from datetime import datetime
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from config.settings import Config
+from core.log_files import INDEX_DIR, parse_log_name
+
+# 等級代碼（0 為其他等級；非標準格式的續行沿用上一行的時間與等級）
+LEVEL_CODES = {"INFO": 1, "SUCCESS": 2, "WARNING": 3, "ERROR": 4}
+
+# 每一行的索引記錄：行首位移、時間（epoch 秒，以日誌中的本地時間直接換算）、等級
+INDEX_DTYPE = np.dtype([("offset", "<u8"), ("ts", "<i8"), ("level", "u1")])
+
+_CHUNK_SIZE = 8 * 1024 * 1024
+
+# "2025-09-11 04:29:23,427 - INFO - ✅ ..." 各欄位的固定位置
+_LEVEL_POS = 26
+_SUCCESS_POS = 33
+_SUCCESS_MARK = "✅".encode("utf-8")
+_PROBE = 40  # 每行判斷格式需要的最少位元組
+
+@lru_cache(maxsize=2)
+def _decompress(path: str, mtime: float) -> bytes:
+    """解壓封存檔（快取最近使用的檔案；mtime 只用來讓快取在檔案變更時失效）"""
+    with gzip.open(path, "rb") as f:
+        return f.read()
+
+def read_archive(path: str) -> bytes:
+    """
+    讀取 .gz 封存檔解壓後的內容
+
+    Args:
+        path: 封存檔路徑
+
+    Returns:
+        bytes: 解壓後的內容
+    """
+    return _decompress(path, os.path.getmtime(path))
+
+def _parse_chunk(data: bytes, base: int) -> np.ndarray:
+    """
+    解析一段以換行結尾的日誌資料
+
+    Args:
+        data: 完整行組成的位元組
+        base: data 在檔案中的起始位移
+
+    Returns:
+        np.ndarray: INDEX_DTYPE 記錄，續行的 ts 為 -1、level 為 0
+    """
+    raw = np.frombuffer(data, dtype=np.uint8)
+    starts = np.concatenate(([0], np.flatnonzero(raw == ord("\n"))[:-1] + 1))
+
+    # 每行取前 _PROBE 個位元組（不足的補 0）組成矩陣，向量化判斷格式
+    padded = np.concatenate((raw, np.zeros(_PROBE, dtype=np.uint8)))
+    heads = padded[starts[:, None] + np.arange(_PROBE)]
+    digits = heads[:, [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18]].astype(np.int64) - ord("0")
+    valid = (
+        np.all((digits >= 0) & (digits <= 9), axis=1)
+        & (heads[:, 4] == ord("-")) & (heads[:, 10] == ord(" ")) & (heads[:, 13] == ord(":"))
+    )
+
+    records = np.zeros(len(starts), dtype=INDEX_DTYPE)
+    records["offset"] = starts + base
+    records["ts"] = -1
+
+    if valid.any():
+        d = digits[valid]
+        dates = (
+            (d[:, 0] * 1000 + d[:, 1] * 100 + d[:, 2] * 10 + d[:, 3] - 1970).astype("datetime64[Y]")
+            + (d[:, 4] * 10 + d[:, 5] - 1).astype("timedelta64[M]")
+        ).astype("datetime64[D]") + (d[:, 6] * 10 + d[:, 7] - 1).astype("timedelta64[D]")
+        seconds = (d[:, 8] * 10 + d[:, 9]) * 3600 + (d[:, 10] * 10 + d[:, 11]) * 60 + d[:, 12] * 10 + d[:, 13]
+        records["ts"][valid] = dates.astype("datetime64[s]").astype(np.int64) + seconds
+
+        first = heads[valid, _LEVEL_POS]
+        levels = np.zeros(len(first), dtype=np.uint8)
+        levels[first == ord("I")] = LEVEL_CODES["INFO"]
+        levels[first == ord("W")] = LEVEL_CODES["WARNING"]
+        levels[first == ord("E")] = LEVEL_CODES["ERROR"]
+        success = np.all(heads[valid, _SUCCESS_POS:_SUCCESS_POS + len(_SUCCESS_MARK)]
+                         == np.frombuffer(_SUCCESS_MARK, dtype=np.uint8), axis=1)
+        levels[(levels == LEVEL_CODES["INFO"]) & success] = LEVEL_CODES["SUCCESS"]
+        records["level"][valid] = levels
+    return records
+
+def iter_complete_chunks(path: str, position: int = 0) -> Iterator[Tuple[bytes, int]]:
+    """
+    從指定位移開始依序讀取日誌，每個區塊只含完整的行（最後未寫完的行不會返回）
+
+    Args:
+        path: 日誌檔路徑（.gz 為解壓後的位移）
+        position: 起始位移
+
+    Yields:
+        Tuple[bytes, int]: (區塊內容, 區塊在檔案中的起始位移)
+    """
+    if path.endswith(".gz"):
+        data = read_archive(path)[position:]
+        end = data.rfind(b"\n") + 1
+        if end:
+            yield data[:end], position
+        return
+    with open(path, "rb") as f:
+        f.seek(position)
+        while True:
+            data = f.read(_CHUNK_SIZE)
+            end = data.rfind(b"\n") + 1
+            if not end:
+                return
+            yield data[:end], position
+            position += end
+            f.seek(position)
+
+def parse_lines(data: bytes, base: int = 0, previous_ts: int = 0, previous_level: int = 0) -> np.ndarray:
+    """
+    解析一段以換行結尾的日誌資料為索引記錄
+
+    非標準格式的續行（例如例外堆疊）沿用上一行的時間與等級。
+
+    Args:
+        data: 完整行組成的位元組
+        base: data 在檔案中的起始位移
+        previous_ts: data 之前最後一行的時間（第一行就是續行時使用）
+        previous_level: data 之前最後一行的等級
+
+    Returns:
+        np.ndarray: INDEX_DTYPE 記錄，每行一筆
+    """
+    records = _parse_chunk(data, base)
+    missing = records["ts"] < 0
+    if not missing.any():
+        return records
+    # 每一行往前找最近的有效行
+    source = np.where(missing, -1, np.arange(len(records)))
+    np.maximum.accumulate(source, out=source)
+    orphan = missing & (source < 0)
+    records["ts"][orphan] = previous_ts
+    records["level"][orphan] = previous_level
+    fill = missing & (source >= 0)
+    records["ts"][fill] = records["ts"][source[fill]]
+    records["level"][fill] = records["level"][source[fill]]
+    return records
+
+def to_log_epoch(moment: datetime) -> int:
+    """
+    將時間換算成索引使用的秒數（與日誌中的本地時間相同基準）
+
+    Args:
+        moment: 不含時區的本地時間
+
+    Returns:
+        int: 索引時間
+    """
+    return int(np.datetime64(moment.replace(microsecond=0), "s").astype(np.int64))
+
+class LogIndex:
+    """單一日誌檔的位元組位移索引
+
+    索引存放在 logs/.index/<檔名>.idx（INDEX_DTYPE 記錄，只會附加）
+    與 <檔名>.meta（已索引的位元組數與檔頭指紋）。寫入中的 .log 每次 refresh
+    只解析新增的位元組；檔案變短或檔頭改變（輪替後重新建立）時重建索引。
+    .gz 封存檔以解壓後的位移建立索引，讀取時整檔解壓（封存檔不超過 LOG_MAX_BYTES）。
+    """
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name: 日誌檔名（list_log_files 的項目）
+        """
+        if parse_log_name(name) is None:
+            raise ValueError(f"不是日誌檔: {name}")
+        self.name = name
+        self.path = os.path.join(Config.LOG_DIR, name)
+        self.compressed = name.endswith(".gz")
+        self._index_path = os.path.join(INDEX_DIR, f"{name}.idx")
+        self._meta_path = os.path.join(INDEX_DIR, f"{name}.meta")
+        self.records = np.zeros(0, dtype=INDEX_DTYPE)
+        self.indexed = 0
+        self._head = ""
+        self._load()
+
+    def _content(self) -> bytes:
+        """封存檔解壓後的內容"""
+        return read_archive(self.path)
+
+    def _read_head(self, length: int) -> str:
+        """讀取檔頭 length 個位元組的十六進位字串，用來辨識檔案是否被重新建立"""
+        if self.compressed:
+            return self._content()[:length].hex()
+        with open(self.path, "rb") as f:
+            return f.read(length).hex()
+
+    def _load(self):
+        """載入持久化索引，檔案已被替換時丟棄"""
+        try:
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["head"] != self._read_head(len(meta["head"]) // 2):
+                return
+            records = np.fromfile(self._index_path, dtype=INDEX_DTYPE)
+        except (OSError, ValueError, KeyError):
+            return
+        if len(records) and int(records["offset"][-1]) >= meta["indexed"]:
+            return
+        self.records = records
+        self.indexed = meta["indexed"]
+        self._head = meta["head"]
+
+    def _save(self, new_records: np.ndarray, reset: bool):
+        """附加新的索引記錄並更新 meta"""
+        try:
+            os.makedirs(INDEX_DIR, exist_ok=True)
+            with open(self._index_path, "wb" if reset else "ab") as f:
+                new_records.tofile(f)
+            with open(self._meta_path, "w", encoding="utf-8") as f:
+                json.dump({"indexed": self.indexed, "head": self._head}, f)
+        except OSError as e:
+            # 索引只是加速用，寫不進去時下次重新建立即可
+            print(f"儲存日誌索引失敗: {str(e)}", file=sys.stderr)
+
+    def refresh(self) -> "LogIndex":
+        """
+        索引檔案中尚未索引的完整行
+
+        Returns:
+            LogIndex: self，方便串接
+        """
+        size = len(self._content()) if self.compressed else os.path.getsize(self.path)
+        reset = not self.indexed
+        if self.indexed and (size < self.indexed or self._read_head(len(self._head) // 2) != self._head):
+            self.records = np.zeros(0, dtype=INDEX_DTYPE)
+            self.indexed = 0
+            reset = True
+        if size == self.indexed:
+            return self
+
+        parts = []
+        position = self.indexed
+        previous_ts = int(self.records["ts"][-1]) if len(self.records) else 0
+        previous_level = int(self.records["level"][-1]) if len(self.records) else 0
+        for data, start in iter_complete_chunks(self.path, self.indexed):
+            records = parse_lines(data, start, previous_ts, previous_level)
+            parts.append(records)
+            previous_ts, previous_level = int(records["ts"][-1]), int(records["level"][-1])
+            position = start + len(data)
+        if not parts:
+            return self
+
+        new_records = np.concatenate(parts)
+        self.records = np.concatenate((self.records, new_records))
+        self.indexed = position
+        if reset:
+            self._head = self._read_head(min(64, position))
+        self._save(new_records, reset)
+        return self
+
+    def _select(self, levels: Optional[Iterable[str]], start: Optional[datetime],
+                end: Optional[datetime]) -> np.ndarray:
+        """依等級與時間範圍篩選，返回符合的行號"""
+        low, high = 0, len(self.records)
+        timestamps = self.records["ts"]
+        if start is not None:
+            low = int(np.searchsorted(timestamps, to_log_epoch(start), side="left"))
+        if end is not None:
+            high = int(np.searchsorted(timestamps, to_log_epoch(end), side="right"))
+        rows = np.arange(low, max(low, high))
+        if levels is not None:
+            codes = [LEVEL_CODES[level] for level in levels]
+            rows = rows[np.isin(self.records["level"][low:high], codes)]
+        return rows
+
+    def count(self, levels: Optional[Iterable[str]] = None, start: Optional[datetime] = None,
+              end: Optional[datetime] = None) -> int:
+        """
+        計算符合條件的行數
+
+        Args:
+            levels: 要顯示的等級（LEVEL_CODES 的鍵），None 表示全部
+            start: 起始時間（含）
+            end: 結束時間（含）
+
+        Returns:
+            int: 行數
+        """
+        return len(self._select(levels, start, end))
+
+    def page(self, page: int = 0, page_size: int = 100, levels: Optional[Iterable[str]] = None,
+             start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[str]:
+        """
+        讀取一頁日誌，第 0 頁為最新的 page_size 行
+
+        Args:
+            page: 頁碼（0 為最後一頁）
+            page_size: 每頁行數
+            levels: 要顯示的等級（LEVEL_CODES 的鍵），None 表示全部
+            start: 起始時間（含）
+            end: 結束時間（含）
+
+        Returns:
+            List[str]: 依時間排序的日誌行（含換行字元）
+        """
+        rows = self._select(levels, start, end)
+        stop = len(rows) - page * page_size
+        rows = rows[max(0, stop - page_size):max(0, stop)]
+        return self._read_rows(rows)
+
+    def _read_rows(self, rows: np.ndarray) -> List[str]:
+        """依行號讀取日誌內容"""
+        if not len(rows):
+            return []
+        offsets = self.records["offset"]
+        ends = np.append(offsets[1:], self.indexed)
+        spans: List[Tuple[int, int]] = [(int(offsets[row]), int(ends[row])) for row in rows]
+
+        if self.compressed:
+            content = self._content()
+            chunks = [content[begin:finish] for begin, finish in spans]
+        else:
+            chunks = []
+            with open(self.path, "rb") as f:
+                for begin, finish in spans:
+                    f.seek(begin)
+                    chunks.append(f.read(finish - begin))
+        return [chunk.decode("utf-8", errors="replace") for chunk in chunks]
@@ -0,0 +1,343 @@
+"""
+PPE 檢測系統日誌全文搜尋模組
+以 SQLite FTS5 為所有日誌檔（含封存檔）建立全文索引，每次只索引上次之後新增的行，
+可依關鍵字、等級與時間範圍跨檔案查詢
+"""
+import os
+import re
+import sqlite3
+import threading
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from config.settings import Config
+from core.log_files import INDEX_DIR, list_log_files
+from core.log_index import LEVEL_CODES, iter_complete_chunks, parse_lines, read_archive, to_log_epoch
+
+SEARCH_DB = os.path.join(INDEX_DIR, "search.db")
+
+# 中日韓文字沒有空白分詞，逐字切開後以片語查詢，任意長度的中文關鍵字都能比對
+_CJK_PATTERN = re.compile(r"([\u2e80-\u9fff\uf900-\ufaff\uff00-\uffef])")
+
+def segment(text: str) -> str:
+    """
+    在中日韓文字前後加上空白，讓 FTS5 的 unicode61 斷詞器逐字建立索引
+
+    Args:
+        text: 原始文字
+
+    Returns:
+        str: 斷詞用文字
+    """
+    return _CJK_PATTERN.sub(r" \1 ", text)
+
+@dataclass
+class LogHit:
+    """一筆搜尋結果"""
+    file: str  # 日誌檔名
+    line: str  # 原始日誌行
+
+@dataclass
+class _IndexedFile:
+    """search.db 中一個日誌檔的索引進度"""
+    file_id: int
+    indexed: int  # 已索引的位元組數（.gz 為解壓後）
+    head: str  # 檔頭指紋，用來辨識檔案被重新建立或封存改名
+    last_ts: int
+    last_level: int
+    stamp: str  # 上次檢查時的檔案大小與修改時間，未變更的檔案不必開啟
+
+class LogSearch:
+    """日誌全文搜尋類
+
+    索引存放在 logs/.index/search.db。寫入中的 .log 被封存為 .gz 時內容不變，
+    以檔頭指紋辨識後只更新檔名，不會重新索引；被刪除的日誌檔會一併移出索引。
+    lines_fts 以 lines 為外部內容表，只保存斷詞索引；索引內容是斷詞後的訊息
+    而非 lines.text，因此刪除時必須以 _fts_body 重新計算（不可使用 'rebuild'）。
+
+    行編號為 (時間 << _ID_SHIFT) | 同一秒內的序號，rowid 順序即時間順序：
+    時間範圍直接轉為 rowid 範圍交給 FTS5，由新到舊取前幾筆時找到足夠筆數即停止。
+    """
+
+    SCHEMA = '''
+        PRAGMA journal_mode = WAL;
+        PRAGMA synchronous = NORMAL;
+        CREATE TABLE IF NOT EXISTS files (
+            id INTEGER PRIMARY KEY,
+            name TEXT UNIQUE NOT NULL,
+            indexed INTEGER NOT NULL DEFAULT 0,
+            head TEXT NOT NULL DEFAULT '',
+            last_ts INTEGER NOT NULL DEFAULT 0,
+            last_level INTEGER NOT NULL DEFAULT 0,
+            stamp TEXT NOT NULL DEFAULT ''
+        );
+        CREATE TABLE IF NOT EXISTS lines (
+            id INTEGER PRIMARY KEY,
+            file_id INTEGER NOT NULL,
+            level INTEGER NOT NULL,
+            text TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_lines_level ON lines (level, id);
+        CREATE INDEX IF NOT EXISTS idx_lines_file ON lines (file_id);
+        CREATE VIRTUAL TABLE IF NOT EXISTS lines_fts USING fts5(
+            text, content = 'lines', content_rowid = 'id', tokenize = 'unicode61'
+        );
+    '''
+
+    # 行編號中同一秒內序號的位元數
+    _ID_SHIFT = 20
+
+    # 同一行程內只允許一個索引作業，避免重複寫入相同的行
+    _refresh_lock = threading.Lock()
+
+    @staticmethod
+    def _connect() -> sqlite3.Connection:
+        """開啟搜尋資料庫，必要時建立資料表"""
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        conn = sqlite3.connect(SEARCH_DB, timeout=Config.DB_TIMEOUT)
+        conn.executescript(LogSearch.SCHEMA)
+        return conn
+
+    @staticmethod
+    def _read_head(path: str, length: int) -> str:
+        """讀取檔頭 length 個位元組（.gz 為解壓後）的十六進位字串"""
+        if path.endswith(".gz"):
+            return read_archive(path)[:length].hex()
+        with open(path, "rb") as f:
+            return f.read(length).hex()
+
+    @staticmethod
+    def _stamp(path: str) -> str:
+        """檔案在磁碟上的大小與修改時間"""
+        stat = os.stat(path)
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    @staticmethod
+    def _size(path: str) -> int:
+        """日誌檔內容大小（.gz 為解壓後）"""
+        return len(read_archive(path)) if path.endswith(".gz") else os.path.getsize(path)
+
+    @staticmethod
+    def _matches(path: str, size: int, record: _IndexedFile) -> bool:
+        """判斷檔案內容是否為索引紀錄所描述的檔案（可能已被追加）"""
+        return size >= record.indexed and LogSearch._read_head(path, len(record.head) // 2) == record.head
+
+    @staticmethod
+    def _fts_body(text: str) -> str:
+        """全文索引的內容：只取訊息部分（時間與等級另有欄位）並斷詞"""
+        return segment(text.split(" - ", 2)[-1])
+
+    @staticmethod
+    def _remove_file(conn: sqlite3.Connection, file_id: int):
+        """將一個日誌檔的所有行移出索引"""
+        conn.executemany(
+            "INSERT INTO lines_fts (lines_fts, rowid, text) VALUES ('delete', ?, ?)",
+            ((row_id, LogSearch._fts_body(text)) for row_id, text in
+             conn.execute("SELECT id, text FROM lines WHERE file_id = ?", (file_id,)).fetchall())
+        )
+        conn.execute("DELETE FROM lines WHERE file_id = ?", (file_id,))
+        conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    @staticmethod
+    def _line_ids(conn: sqlite3.Connection, timestamps: np.ndarray) -> np.ndarray:
+        """依每行的時間配發行編號，同一秒接在已存在的行之後"""
+        shift = LogSearch._ID_SHIFT
+        # 同一秒內依出現順序編號
+        order = np.argsort(timestamps, kind="stable")
+        ordered = timestamps[order]
+        group_start = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+        rank = np.arange(len(ordered)) - np.repeat(group_start, np.diff(np.r_[group_start, len(ordered)]))
+        sequence = np.empty_like(rank)
+        sequence[order] = rank
+
+        # 同一秒已經有行時（例如接續寫入中的檔案）從下一個序號開始
+        existing = dict(conn.execute(
+            "SELECT id >> ?, MAX(id & ?) + 1 FROM lines WHERE id >= ? AND id < ? GROUP BY id >> ?",
+            (shift, (1 << shift) - 1, int(ordered[0]) << shift, (int(ordered[-1]) + 1) << shift, shift)
+        ).fetchall())
+        if existing:
+            sequence += np.array([existing.get(ts, 0) for ts in timestamps.tolist()], dtype=sequence.dtype)
+        return (timestamps << shift) + sequence
+
+    @staticmethod
+    def _index_file(conn: sqlite3.Connection, path: str, record: _IndexedFile):
+        """索引日誌檔中尚未索引的完整行，每個區塊提交一次"""
+        for data, start in iter_complete_chunks(path, record.indexed):
+            records = parse_lines(data, start, record.last_ts, record.last_level)
+            texts = [line.decode("utf-8", errors="replace") for line in data.split(b"\n")[:-1]]
+            ids = LogSearch._line_ids(conn, records["ts"]).tolist()
+
+            conn.executemany(
+                "INSERT INTO lines (id, file_id, level, text) VALUES (?, ?, ?, ?)",
+                zip(ids, [record.file_id] * len(texts), records["level"].tolist(), texts)
+            )
+            conn.executemany(
+                "INSERT INTO lines_fts (rowid, text) VALUES (?, ?)",
+                ((row_id, LogSearch._fts_body(text)) for row_id, text in zip(ids, texts))
+            )
+
+            if start == 0:
+                record.head = data[:64].hex()
+            record.indexed = start + len(data)
+            record.last_ts = int(records["ts"][-1])
+            record.last_level = int(records["level"][-1])
+            conn.execute(
+                "UPDATE files SET indexed = ?, head = ?, last_ts = ?, last_level = ? WHERE id = ?",
+                (record.indexed, record.head, record.last_ts, record.last_level, record.file_id)
+            )
+            conn.commit()
+
+    @staticmethod
+    def refresh():
+        """
+        將日誌目錄中所有日誌檔的新增內容加入索引
+
+        第一次執行會索引全部歷史日誌，之後只讀取上次之後新增的位元組；
+        大小與修改時間都沒變的檔案（例如已索引的封存檔）不會被開啟。
+        """
+        with LogSearch._refresh_lock, closing(LogSearch._connect()) as conn:
+            known: Dict[str, _IndexedFile] = {
+                name: _IndexedFile(*row)
+                for name, *row in conn.execute(
+                    "SELECT name, id, indexed, head, last_ts, last_level, stamp FROM files"
+                )
+            }
+            names = list_log_files()
+            paths = {name: os.path.join(Config.LOG_DIR, name) for name in names}
+            stamps = {name: LogSearch._stamp(path) for name, path in paths.items()}
+            changed = [name for name in names if name not in known or known[name].stamp != stamps[name]]
+            sizes = {name: LogSearch._size(paths[name]) for name in changed}
+
+            # 已不存在、被重新建立或被截斷的檔案，其索引可能屬於改名後的封存檔
+            stale = {
+                name: record for name, record in known.items()
+                if name not in paths or (name in sizes and not LogSearch._matches(paths[name], sizes[name], record))
+            }
+
+            # 舊的先處理，讓封存檔先認領寫入中檔案的舊索引
+            for name in reversed(changed):
+                path = paths[name]
+                record = None if name in stale else known.get(name)
+                if record is None:
+                    source = next((
+                        old for old, candidate in stale.items()
+                        if old != name and candidate.head and LogSearch._matches(path, sizes[name], candidate)
+                    ), None)
+                    if name in stale:
+                        LogSearch._remove_file(conn, stale.pop(name).file_id)
+                        del known[name]
+                    if source is not None:
+                        record = known.pop(source)
+                        del stale[source]
+                        conn.execute("UPDATE files SET name = ? WHERE id = ?", (name, record.file_id))
+                    else:
+                        file_id = conn.execute("INSERT INTO files (name) VALUES (?)", (name,)).lastrowid
+                        record = _IndexedFile(file_id, 0, "", 0, 0, "")
+                    conn.commit()
+                if sizes[name] > record.indexed:
+                    LogSearch._index_file(conn, path, record)
+                conn.execute("UPDATE files SET stamp = ? WHERE id = ?", (stamps[name], record.file_id))
+                conn.commit()
+
+            for record in stale.values():
+                LogSearch._remove_file(conn, record.file_id)
+            conn.commit()
+
+    @staticmethod
+    def _match_query(keyword: str) -> str:
+        """將使用者輸入轉為 FTS5 查詢：每個以空白分隔的詞都是一個片語，全部都要符合"""
+        phrases = []
+        for term in keyword.split():
+            tokens = segment(term).split()
+            if tokens:
+                phrases.append('"' + " ".join(tokens).replace('"', '""') + '"')
+        return " AND ".join(phrases)
+
+    @staticmethod
+    def _query(keyword: str, levels: Optional[Iterable[str]], start: Optional[datetime],
+               end: Optional[datetime]) -> Tuple[str, str, str, list]:
+        """
+        組出資料來源、行編號欄位、查詢條件與參數
+
+        有關鍵字時由 lines_fts 依 rowid（即時間）逐筆產生結果，時間範圍是 rowid 範圍，
+        配合 LIMIT 找到足夠筆數就停止，不必取出所有符合的行。
+        """
+        conditions, params = [], []
+        match = LogSearch._match_query(keyword)
+        if match:
+            # CROSS JOIN 固定由 lines_fts 驅動，避免改由等級索引逐行回查全文索引
+            source = "lines_fts CROSS JOIN lines ON lines.id = lines_fts.rowid"
+            row_id = "lines_fts.rowid"
+            conditions.append("lines_fts MATCH ?")
+            params.append(match)
+        else:
+            source = "lines"
+            row_id = "lines.id"
+        if levels is not None:
+            codes = [LEVEL_CODES[level] for level in levels]
+            conditions.append(f"lines.level IN ({','.join('?' * len(codes))})")
+            params.extend(codes)
+        if start is not None:
+            conditions.append(f"{row_id} >= ?")
+            params.append(to_log_epoch(start) << LogSearch._ID_SHIFT)
+        if end is not None:
+            conditions.append(f"{row_id} < ?")
+            params.append((to_log_epoch(end) + 1) << LogSearch._ID_SHIFT)
+        return source, row_id, " AND ".join(conditions) or "1", params
+
+    @staticmethod
+    def count(keyword: str = "", levels: Optional[Iterable[str]] = None,
+              start: Optional[datetime] = None, end: Optional[datetime] = None,
+              limit: Optional[int] = None) -> int:
+        """
+        計算符合條件的日誌行數（最多數到 limit）
+
+        Args:
+            keyword: 關鍵字，以空白分隔的多個詞必須全部出現
+            levels: 日誌等級（LEVEL_CODES 的鍵），None 表示全部
+            start: 起始時間（含）
+            end: 結束時間（含）
+            limit: 計數上限，預設為 LOG_SEARCH_COUNT_LIMIT
+
+        Returns:
+            int: 行數，等於 limit 時表示至少有這麼多筆
+        """
+        if limit is None:
+            limit = Config.LOG_SEARCH_COUNT_LIMIT
+        source, _, where, params = LogSearch._query(keyword, levels, start, end)
+        with closing(LogSearch._connect()) as conn:
+            return conn.execute(
+                f"SELECT COUNT(*) FROM (SELECT 1 FROM {source} WHERE {where} LIMIT ?)", params + [limit]
+            ).fetchone()[0]
+
+    @staticmethod
+    def search(keyword: str = "", levels: Optional[Iterable[str]] = None,
+               start: Optional[datetime] = None, end: Optional[datetime] = None,
+               limit: Optional[int] = None) -> List[LogHit]:
+        """
+        搜尋所有已索引的日誌
+
+        Args:
+            keyword: 關鍵字，以空白分隔的多個詞必須全部出現
+            levels: 日誌等級（LEVEL_CODES 的鍵），None 表示全部
+            start: 起始時間（含）
+            end: 結束時間（含）
+            limit: 最多返回筆數，預設為 LOG_SEARCH_LIMIT
+
+        Returns:
+            List[LogHit]: 符合的日誌行，新的在前
+        """
+        if limit is None:
+            limit = Config.LOG_SEARCH_LIMIT
+        source, row_id, where, params = LogSearch._query(keyword, levels, start, end)
+        with closing(LogSearch._connect()) as conn:
+            rows = conn.execute(f'''
+                SELECT files.name, lines.text
+                FROM {source} JOIN files ON files.id = lines.file_id
+                WHERE {where}
+                ORDER BY {row_id} DESC
+                LIMIT ?
+            ''', params + [limit]).fetchall()
+        return [LogHit(name, text) for name, text in rows]
@@ -0,0 +1,161 @@
+"""
+PPE 檢測系統非同步日誌寫入模組
+日誌先放入有界佇列，由背景執行緒批次寫入，磁碟延遲不會阻塞頁面刷新
+"""
+import atexit
+import logging
+import queue
+import sys
+import threading
+from typing import List, Sequence
+from config.settings import Config
+
+def _write_batch(handler: logging.StreamHandler, records: Sequence[logging.LogRecord]):
+    """將一批日誌格式化後一次寫入串流並只 flush 一次"""
+    records = [record for record in records if record.levelno >= handler.level]
+    if not records:
+        return
+    handler.acquire()
+    try:
+        handler.stream.write("".join(handler.format(record) + handler.terminator for record in records))
+        handler.flush()
+    except Exception:
+        handler.handleError(records[0])
+    finally:
+        handler.release()
+
+class BatchStreamHandler(logging.StreamHandler):
+    """支援批次寫入的串流日誌處理器"""
+
+    def emit_batch(self, records: Sequence[logging.LogRecord]):
+        """批次寫入日誌"""
+        _write_batch(self, records)
+
+class AsyncLogWriter:
+    """背景批次日誌寫入器
+
+    溢位策略：佇列已滿時丟棄新的日誌（呼叫端永不阻塞），
+    並在下一批寫入時補上一筆 WARNING 記錄捨棄數量。
+    """
+
+    def __init__(self, handlers: List[logging.Handler]):
+        """
+        Args:
+            handlers: 實際寫出日誌的處理器（需已設定 formatter）
+        """
+        self.handlers = handlers
+        self._queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=Config.LOG_QUEUE_SIZE)
+        self._dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="PPE_LogWriter", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def dropped(self) -> int:
+        """尚未回報的捨棄筆數"""
+        return self._dropped
+
+    def submit(self, record: logging.LogRecord):
+        """
+        非阻塞地加入一筆日誌
+
+        Args:
+            record: 日誌記錄
+        """
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self._dropped += 1
+
+    def _take_batch(self, timeout: float) -> List[logging.LogRecord]:
+        """等待第一筆日誌，再取出佇列中已有的日誌（最多 LOG_BATCH_SIZE 筆）"""
+        try:
+            batch = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while len(batch) < Config.LOG_BATCH_SIZE:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[logging.LogRecord]):
+        """將一批日誌寫入所有處理器"""
+        with self._dropped_lock:
+            dropped, self._dropped = self._dropped, 0
+        if dropped:
+            batch.append(logging.makeLogRecord({
+                "name": "PPE_Detection",
+                "levelno": logging.WARNING,
+                "levelname": "WARNING",
+                "msg": f"日誌佇列已滿，捨棄 {dropped} 筆日誌"
+            }))
+        if not batch:
+            return
+
+        for handler in self.handlers:
+            if hasattr(handler, "emit_batch"):
+                handler.emit_batch(batch)
+            else:
+                for record in batch:
+                    handler.handle(record)
+
+    def _drain(self, timeout: float) -> bool:
+        """取出並寫入一批日誌，返回是否有取到日誌"""
+        batch = self._take_batch(timeout)
+        count = len(batch)
+        try:
+            self._write(batch)
+        finally:
+            for _ in range(count):
+                self._queue.task_done()
+        return count > 0
+
+    def _run(self):
+        """背景寫入迴圈"""
+        while not self._stop.is_set():
+            self._drain(Config.LOG_FLUSH_INTERVAL)
+
+    def flush(self):
+        """阻塞直到目前佇列中的日誌都已寫出"""
+        if self._thread.is_alive():
+            self._queue.join()
+        else:
+            while self._drain(0):
+                pass
+        self._write([])
+
+    def close(self):
+        """停止背景執行緒，寫出剩餘日誌並關閉處理器"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join(timeout=Config.LOG_FLUSH_INTERVAL + 1)
+        try:
+            self.flush()
+        finally:
+            for handler in self.handlers:
+                handler.close()
+
+class QueueingHandler(logging.Handler):
+    """把日誌轉交給 AsyncLogWriter 的處理器"""
+
+    def __init__(self, writer: AsyncLogWriter):
+        super().__init__()
+        self.writer = writer
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            # 先組好訊息，避免背景執行緒格式化時參數已被修改
+            record.msg = record.getMessage()
+            record.args = None
+            if record.exc_info:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+                record.exc_info = None
+            self.writer.submit(record)
+        except Exception:
+            print("日誌寫入佇列失敗", file=sys.stderr)
@@ -3,42 +3,75 @@ PPE 檢測系統日誌模組
 """
 import streamlit as st
 import logging
-import os
+import threading
+import time
 from datetime import datetime
+from core.log_files import RotatingLogFileHandler
+from core.log_writer import AsyncLogWriter, BatchStreamHandler, QueueingHandler
+from core.metrics import Metrics
+
+ADD_LOG_SECONDS = Metrics.histogram("ppe_log_add_seconds", "Logger.add_log 執行時間", ("level",))
 
 class Logger:
     """日誌系統類 - 單例模式"""
     _instance = None
+    _instance_lock = threading.Lock()
+    
+    # 記憶體日誌時間字串快取（同一秒內重複使用）
+    _timestamp_second = -1
+    _timestamp_text = ""
     
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance.setup_logging()
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    instance.setup_logging()
+                    cls._instance = instance
         return cls._instance
     
     def setup_logging(self):
         """設定日誌系統"""
-        # 創建logs目錄
-        if not os.path.exists("logs"):
-            os.makedirs("logs")
-        
-        # 按日期命名日誌檔案
-        today = datetime.now().strftime("%Y-%m-%d")
-        log_file = f"logs/ppe_detection_{today}.log"
+        # 按日期命名日誌檔案，換日或超過大小上限時自動輪替並壓縮
+        # 實際寫檔由背景執行緒批次處理，呼叫端只把日誌放進佇列
+        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+        handlers = [RotatingLogFileHandler(encoding='utf-8'), BatchStreamHandler()]
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        self.writer = AsyncLogWriter(handlers)
         
         # 設定logging
         logging.basicConfig(
             level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_file, encoding='utf-8'),
-                logging.StreamHandler()
-            ],
+            handlers=[QueueingHandler(self.writer)],
             force=True
         )
         
         self.file_logger = logging.getLogger('PPE_Detection')
     
+    @staticmethod
+    def flush():
+        """立即寫出佇列中的日誌（例如測試或關閉前）"""
+        Logger().writer.flush()
+    
+    @staticmethod
+    def format_entry(message: str, level: str = "INFO") -> str:
+        """
+        格式化記憶體日誌條目
+        
+        Args:
+            message: 日誌訊息
+            level: 日誌等級 (INFO, SUCCESS, WARNING, ERROR)
+            
+        Returns:
+            str: 供畫面顯示的日誌字串
+        """
+        second = int(time.time())
+        if second != Logger._timestamp_second:
+            Logger._timestamp_text = datetime.fromtimestamp(second).strftime("%Y-%m-%d %H:%M:%S")
+            Logger._timestamp_second = second
+        return f"[{Logger._timestamp_text}] [{level}] {message}"
+    
     @staticmethod
     def add_log(message: str, level: str = "INFO"):
         """
@@ -48,19 +81,29 @@ class Logger:
             message: 日誌訊息
             level: 日誌等級 (INFO, SUCCESS, WARNING, ERROR)
         """
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_entry = f"[{timestamp}] [{level}] {message}"
-        
-        # 記憶體儲存 (供Streamlit顯示)
-        if 'logs' not in st.session_state:
-            st.session_state.logs = []
-        
-        st.session_state.logs.append(log_entry)
-        if len(st.session_state.logs) > 30:
-            st.session_state.logs.pop(0)
+        with ADD_LOG_SECONDS.time(level):
+            log_entry = Logger.format_entry(message, level)
+            
+            # 記憶體儲存 (供Streamlit顯示)
+            if 'logs' not in st.session_state:
+                st.session_state.logs = []
+            
+            st.session_state.logs.append(log_entry)
+            if len(st.session_state.logs) > 30:
+                st.session_state.logs.pop(0)
+            
+            Logger.write_file(message, level)
+    
+    @staticmethod
+    def write_file(message: str, level: str = "INFO"):
+        """
+        只寫入日誌檔案，可在非 Streamlit 執行緒中使用
         
-        # 檔案儲存
-        logger_instance = Logger()
+        Args:
+            message: 日誌訊息
+            level: 日誌等級 (INFO, SUCCESS, WARNING, ERROR)
+        """
+        logger_instance = Logger._instance or Logger()
         if level == "ERROR":
             logger_instance.file_logger.error(message)
         elif level == "SUCCESS":
@@ -68,4 +111,4 @@ class Logger:
         elif level == "WARNING":
             logger_instance.file_logger.warning(message)
         else:
-            logger_instance.file_logger.info(message)
\ No newline at end of file
+            logger_instance.file_logger.info(message)
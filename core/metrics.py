@@ -0,0 +1,269 @@
+"""
+PPE 檢測系統效能指標模組
+在記憶體中累計熱路徑的執行時間直方圖與計數器，
+定期以 Prometheus 文字格式寫入檔案，並可選擇開啟 HTTP /metrics 端點
+"""
+import functools
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from config.settings import Config
+
+# 直方圖區間上限（秒），涵蓋微秒級的狀態機推進到秒級的頁面渲染
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+def _format_labels(names: Tuple[str, ...], values: tuple, extra: str = "") -> str:
+    """將標籤轉為 {name="value",...}，沒有標籤時為空字串"""
+    parts = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class _Timer:
+    """Histogram.time() 返回的計時器"""
+    __slots__ = ("histogram", "values", "start")
+
+    def __init__(self, histogram: "Histogram", values: tuple):
+        self.histogram = histogram
+        self.values = values
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, *self.values)
+        return False
+
+class Histogram:
+    """執行時間直方圖，每組標籤值一條序列
+
+    標籤名稱在建立時固定，記錄時只傳標籤值；字串格式化延到輸出時才做，
+    每次記錄只有一次二分搜尋與一次加鎖。
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # 標籤值 -> [各區間次數（不累計，最後一格為 +Inf）, 總和, 次數]
+        self._series: Dict[tuple, list] = {}
+
+    def observe(self, seconds: float, *values):
+        """
+        記錄一次執行時間
+
+        Args:
+            seconds: 秒數
+            values: 標籤值，順序同 label_names
+        """
+        if not Config.METRICS_ENABLED:
+            return
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(values)
+            if series is None:
+                series = self._series[values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    def time(self, *values) -> _Timer:
+        """
+        以 with 區塊計時
+
+        Args:
+            values: 標籤值
+
+        Returns:
+            _Timer: 離開區塊時記錄執行時間
+        """
+        return _Timer(self, values)
+
+    def timed(self, *values) -> Callable:
+        """
+        計時裝飾器
+
+        Args:
+            values: 標籤值，可以是函式（以被裝飾函式的參數呼叫，返回標籤值）
+
+        Returns:
+            Callable: 裝飾器
+        """
+        def decorator(func: Callable) -> Callable:
+            if any(callable(value) for value in values):
+                @functools.wraps(func)
+                def wrapper(*args, **kwargs):
+                    start = time.perf_counter()
+                    try:
+                        return func(*args, **kwargs)
+                    finally:
+                        elapsed = time.perf_counter() - start
+                        self.observe(elapsed, *[
+                            value(*args, **kwargs) if callable(value) else value for value in values
+                        ])
+            else:
+                @functools.wraps(func)
+                def wrapper(*args, **kwargs):
+                    start = time.perf_counter()
+                    try:
+                        return func(*args, **kwargs)
+                    finally:
+                        self.observe(time.perf_counter() - start, *values)
+            return wrapper
+        return decorator
+
+    def render(self) -> List[str]:
+        """
+        Prometheus 文字格式
+
+        Returns:
+            List[str]: 每行一筆
+        """
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in sorted(series.items(), key=lambda item: tuple(map(str, item[0]))):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {count}")
+        return lines
+
+class Metrics:
+    """指標登錄類：直方圖與讀取既有統計的計數器"""
+    _lock = threading.Lock()
+    _histograms: List[Histogram] = []
+    _collectors: List[Tuple[str, str, str, Callable[[], float]]] = []
+
+    @staticmethod
+    def histogram(name: str, help_text: str, label_names: Tuple[str, ...] = ()) -> Histogram:
+        """
+        建立並登錄直方圖
+
+        Args:
+            name: 指標名稱（以 _seconds 結尾）
+            help_text: 說明
+            label_names: 標籤名稱
+
+        Returns:
+            Histogram: 直方圖
+        """
+        histogram = Histogram(name, help_text, label_names)
+        with Metrics._lock:
+            Metrics._histograms.append(histogram)
+        return histogram
+
+    @staticmethod
+    def collector(name: str, kind: str, help_text: str, read: Callable[[], float]):
+        """
+        登錄在輸出時才讀取的指標（例如快取命中次數）
+
+        Args:
+            name: 指標名稱
+            kind: "counter" 或 "gauge"
+            help_text: 說明
+            read: 返回目前數值
+        """
+        with Metrics._lock:
+            Metrics._collectors.append((name, kind, help_text, read))
+
+    @staticmethod
+    def render() -> str:
+        """
+        輸出所有指標
+
+        Returns:
+            str: Prometheus 文字格式
+        """
+        with Metrics._lock:
+            histograms = list(Metrics._histograms)
+            collectors = list(Metrics._collectors)
+        lines = []
+        for histogram in histograms:
+            lines.extend(histogram.render())
+        for name, kind, help_text, read in collectors:
+            try:
+                value = read()
+            except Exception:
+                continue
+            lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"])
+        return "\n".join(lines) + "\n"
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """HTTP /metrics 處理器"""
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = Metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 不輸出每次抓取的存取紀錄
+        pass
+
+class MetricsExporter:
+    """指標輸出類 - 單例模式
+
+    每 METRICS_EXPORT_INTERVAL 秒把指標寫入 METRICS_FILE（可給 node_exporter textfile collector 讀取），
+    METRICS_PORT 不為 0 時另外提供 HTTP /metrics 端點。
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance.setup_exporter()
+        return cls._instance
+
+    def setup_exporter(self):
+        """啟動檔案輸出執行緒與 HTTP 端點"""
+        self._server: Optional[ThreadingHTTPServer] = None
+        if Config.METRICS_PORT:
+            try:
+                self._server = ThreadingHTTPServer(("0.0.0.0", Config.METRICS_PORT), _MetricsHandler)
+                threading.Thread(target=self._server.serve_forever, name="PPE_MetricsServer", daemon=True).start()
+            except OSError as e:
+                # 多個行程共用設定時只有第一個能使用該連接埠
+                print(f"無法啟動指標端點: {str(e)}", file=sys.stderr)
+                self._server = None
+        self._stop = threading.Event()
+        if Config.METRICS_FILE:
+            threading.Thread(target=self._run, name="PPE_MetricsExporter", daemon=True).start()
+
+    def write_file(self):
+        """立即寫出指標檔（先寫暫存檔再改名，讀取端不會讀到一半的內容）"""
+        directory = os.path.dirname(Config.METRICS_FILE)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{Config.METRICS_FILE}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(Metrics.render())
+        os.replace(temp_path, Config.METRICS_FILE)
+
+    def _run(self):
+        """定期寫出指標檔"""
+        while not self._stop.wait(Config.METRICS_EXPORT_INTERVAL):
+            try:
+                self.write_file()
+            except OSError as e:
+                print(f"寫入指標檔失敗: {str(e)}", file=sys.stderr)
@@ -0,0 +1,239 @@
+"""
+PPE 檢測推論管線模組
+從影片檔或攝影機讀取畫面，經前處理、推論後以 StatusWriter 寫入 ppe_detection
+
+擷取、前處理、推論、寫入各自一個執行緒，之間以長度 PIPELINE_QUEUE_SIZE 的佇列串接：
+推論處理目前畫面時，下一個畫面已在讀取與前處理，CPU 不會閒置等待攝影機。
+即時來源（攝影機、串流）佇列滿時捨棄最舊的畫面，永遠推論最新畫面；影片檔則逐格處理。
+有排程（core/scheduler.py）時依推論時間跳過畫面，並只推論目前階段需要的項目。
+"""
+import queue
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+import numpy as np
+from models.ppe_status import PackedStatus
+from models.stage_config import SCORE_KEYS
+from config.settings import Config
+from core.inference import InferenceBackend, cv2, scores_to_bits
+from core.metrics import Metrics
+from core.scheduler import InferenceScheduler
+from core.status_writer import StatusWriter
+
+STAGE_SECONDS = Metrics.histogram("ppe_pipeline_stage_seconds", "推論管線各階段處理一個畫面的時間", ("stage",))
+LATENCY_SECONDS = Metrics.histogram("ppe_pipeline_latency_seconds", "畫面擷取到送出檢測結果的時間", ("gate",))
+
+@dataclass
+class Frame:
+    """在管線中傳遞的畫面"""
+    index: int
+    captured: float  # 擷取時間（epoch 秒，寫入 last_updated）
+    started: float  # 擷取時間（time.perf_counter()，計算延遲）
+    image: Optional[np.ndarray] = None
+    blob: Optional[np.ndarray] = None
+    scores: Optional[Dict[str, float]] = None
+
+def open_capture(source: str):
+    """
+    開啟影片來源
+
+    Args:
+        source: 攝影機編號（"0"）、影片檔路徑或串流網址
+
+    Returns:
+        cv2.VideoCapture: 已開啟的來源
+    """
+    if cv2 is None:
+        raise RuntimeError("攝影機推論需要 opencv-python（pip install -r requirements.txt）")
+    capture = cv2.VideoCapture(int(source) if source.isdigit() else source)
+    if not capture.isOpened():
+        raise RuntimeError(f"無法開啟影片來源: {source}")
+    return capture
+
+def is_live_source(source: str) -> bool:
+    """攝影機編號與串流網址是即時來源，影片檔不是"""
+    return source.isdigit() or "://" in source
+
+class DetectionPipeline:
+    """單一閘口的擷取/推論管線"""
+
+    def __init__(self, gate_id: int, source: str, backend: InferenceBackend,
+                 capture=None, drop_frames: Optional[bool] = None,
+                 scheduler: Optional[InferenceScheduler] = None):
+        """
+        Args:
+            gate_id: 寫入的閘口編號
+            source: 影片來源（見 open_capture）
+            backend: 推論後端
+            capture: 已開啟的來源（需提供 read() 與 release()），None 表示以 open_capture 開啟
+            drop_frames: 佇列滿時是否捨棄最舊的畫面，None 表示即時來源才捨棄
+            scheduler: 推論排程，None 表示每個畫面都推論全部項目
+        """
+        self.gate_id = gate_id
+        self.source = source
+        self.backend = backend
+        self.capture = capture if capture is not None else open_capture(source)
+        self.drop_frames = is_live_source(source) if drop_frames is None else drop_frames
+        self.scheduler = scheduler
+        self._queues = [queue.Queue(maxsize=Config.PIPELINE_QUEUE_SIZE) for _ in range(3)]
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._counts = {"captured": 0, "dropped": 0, "written": 0, "failures": 0}
+        self._threads = [
+            threading.Thread(target=self._capture, name="PPE_PipelineCapture", daemon=True),
+            threading.Thread(target=self._stage, args=("preprocess", self._preprocess, 0, 1),
+                             name="PPE_PipelinePreprocess", daemon=True),
+            threading.Thread(target=self._stage, args=("inference", self._infer, 1, 2),
+                             name="PPE_PipelineInference", daemon=True),
+            threading.Thread(target=self._stage, args=("write", self._write, 2, None),
+                             name="PPE_PipelineWrite", daemon=True),
+        ]
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counts[name] += amount
+
+    def _put(self, index: int, frame: Optional[Frame], drop: bool = False):
+        """放入下一階段的佇列；drop 時佇列滿就捨棄最舊的畫面，否則等待"""
+        target = self._queues[index]
+        if drop:
+            while True:
+                try:
+                    target.put_nowait(frame)
+                    return
+                except queue.Full:
+                    try:
+                        target.get_nowait()
+                        self._count("dropped")
+                    except queue.Empty:
+                        pass
+        while not self._stop.is_set():
+            try:
+                target.put(frame, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, index: int) -> Optional[Frame]:
+        """從佇列取出畫面，停止時返回None"""
+        while not self._stop.is_set():
+            try:
+                return self._queues[index].get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+
+    def _capture(self):
+        """擷取階段：讀到來源結束或停止為止，最後送出結束標記（None）"""
+        index = 0
+        try:
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                ok, image = self.capture.read()
+                if not ok:
+                    break
+                STAGE_SECONDS.observe(time.perf_counter() - start, "capture")
+                self._count("captured")
+                if self.scheduler is not None and not self.scheduler.should_process():
+                    continue
+                self._put(0, Frame(index, time.time(), start, image), drop=self.drop_frames)
+                index += 1
+        except Exception as e:
+            print(f"讀取影片來源失敗: {str(e)}", file=sys.stderr)
+            self._count("failures")
+        finally:
+            self.capture.release()
+            self._put(0, None)
+
+    def _stage(self, name: str, work: Callable[[Frame], bool], inbox: int, outbox: Optional[int]):
+        """
+        處理階段：逐一處理畫面並送到下一階段
+
+        Args:
+            name: 階段名稱（指標標籤）
+            work: 處理函式，返回 False 表示捨棄此畫面
+            inbox: 輸入佇列索引
+            outbox: 輸出佇列索引，None 表示最後一個階段
+        """
+        while True:
+            frame = self._get(inbox)
+            if frame is None:
+                if outbox is not None:
+                    self._put(outbox, None)
+                return
+            start = time.perf_counter()
+            try:
+                keep = work(frame)
+            except Exception as e:
+                print(f"推論管線 {name} 階段失敗: {str(e)}", file=sys.stderr)
+                self._count("failures")
+                continue
+            STAGE_SECONDS.observe(time.perf_counter() - start, name)
+            if keep and outbox is not None:
+                self._put(outbox, frame, drop=self.drop_frames)
+
+    def _preprocess(self, frame: Frame) -> bool:
+        frame.blob = self.backend.preprocess(frame.image)
+        frame.image = None
+        return True
+
+    def _infer(self, frame: Frame) -> bool:
+        if self.scheduler is None:
+            frame.scores = self.backend.infer(frame.blob)
+        else:
+            items = self.scheduler.items_for()
+            start = time.perf_counter()
+            frame.scores = self.backend.infer(frame.blob, items) if items else {}
+            if items:
+                self.scheduler.record_latency(time.perf_counter() - start)
+        frame.blob = None
+        return True
+
+    def _write(self, frame: Frame) -> bool:
+        if self.scheduler is None:
+            bits = scores_to_bits(frame.scores)
+        else:
+            bits = self.scheduler.update(frame.scores)
+        # 分數一併寫入 realtime_detection，檢測引擎以平滑後的分數判斷；沒有推論的項目寫入 0
+        StatusWriter().submit(self.gate_id, PackedStatus(bits), frame.captured,
+                              [frame.scores.get(item_key, 0.0) for item_key in SCORE_KEYS])
+        LATENCY_SECONDS.observe(time.perf_counter() - frame.started, self.gate_id)
+        self._count("written")
+        return True
+
+    def start(self):
+        """啟動所有階段"""
+        for thread in self._threads:
+            thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待管線處理完來源的所有畫面
+
+        Args:
+            timeout: 最長等待秒數，None 表示一直等待
+
+        Returns:
+            bool: 是否已結束
+        """
+        self._threads[-1].join(timeout)
+        return not self._threads[-1].is_alive()
+
+    def stop(self):
+        """停止所有階段（尚未處理的畫面會被捨棄）"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=1)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        取得處理統計
+
+        Returns:
+            Dict[str, int]: captured（擷取畫面數）、dropped（佇列滿而捨棄的畫面數）、
+            written（送出檢測結果的畫面數）與 failures（處理失敗次數）
+        """
+        with self._lock:
+            return dict(self._counts)
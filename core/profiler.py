@@ -0,0 +1,159 @@
+"""
+PPE 檢測系統效能剖析模組
+在執行中的系統剖析接下來 PROFILE_RUNS 次重新執行（app.main 的完整重新執行與即時區塊 fragment 中實際重繪區塊的執行），
+結果寫入 PROFILE_DIR：
+- sample 模式：背景執行緒定期取樣腳本執行緒的堆疊，輸出 folded 格式
+  （flamegraph.pl、speedscope、inferno 可直接讀取），對被剖析的程式影響很小
+- cprofile 模式：cProfile 記錄每次函式呼叫，輸出 .prof（snakeviz、flameprof 可讀取）與前幾名的文字摘要
+關閉時每次重新執行只多一次設定值比較
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from types import CodeType, FrameType
+from typing import Callable, List, Optional, Tuple
+from config.settings import Config
+
+class _StackSampler:
+    """在背景執行緒中定期取樣指定執行緒的堆疊"""
+
+    def __init__(self, thread_id: int, root: CodeType, stacks: Counter):
+        self.thread_id = thread_id
+        self.root = root
+        self.stacks = stacks
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="PPE_ProfileSampler", daemon=True)
+
+    @staticmethod
+    def _frame_name(frame: FrameType) -> str:
+        """堆疊中一層的名稱：函式 (路徑:定義行號)，同一函式的取樣合併為一格"""
+        code = frame.f_code
+        path = code.co_filename
+        if "site-packages" + os.sep in path:
+            path = path.split("site-packages" + os.sep, 1)[1]
+        elif path.startswith(os.getcwd() + os.sep):
+            path = os.path.relpath(path)
+        return f"{code.co_name} ({path}:{code.co_firstlineno})".replace(";", ",")
+
+    def _run(self):
+        while not self._stop.wait(Config.PROFILE_SAMPLE_INTERVAL):
+            frame: Optional[FrameType] = sys._current_frames().get(self.thread_id)
+            names: List[str] = []
+            # 由內往外走到被剖析的函式為止，略過 Streamlit 執行腳本的外層堆疊
+            while frame is not None:
+                names.append(self._frame_name(frame))
+                if frame.f_code is self.root:
+                    break
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+class RunProfiler:
+    """頁面重新執行剖析類
+
+    同一時間只剖析一個工作階段的重新執行，其他工作階段照常執行；
+    累計 PROFILE_RUNS 次後寫出一份結果並停止剖析，直到行程重新啟動。
+    """
+    _lock = threading.Lock()
+    _busy = threading.Lock()
+    _finished = False
+    _durations: List[Tuple[str, float]] = []  # (重新執行類型, 秒數)
+    _stacks: Counter = Counter()
+    _profile: Optional[cProfile.Profile] = None
+
+    @staticmethod
+    def run(main: Callable, kind: str = "main", *args):
+        """
+        執行 main，剖析模式開啟且尚未取樣完畢時一併剖析
+
+        完整重新執行中呼叫的 fragment 已包含在外層的剖析中，不會重複計算。
+
+        Args:
+            main: 頁面主函式或 fragment 的內容函式（sample 模式的堆疊以此函式為根）
+            kind: 重新執行類型（"main" 或 "fragment"），分別統計時間
+            *args: 傳給 main 的參數
+
+        Returns:
+            main 的返回值
+        """
+        if Config.PROFILE_RUNS <= 0 or RunProfiler._finished:
+            return main(*args)
+        if not RunProfiler._busy.acquire(blocking=False):
+            return main(*args)
+        try:
+            return RunProfiler._profiled(main, kind, args)
+        finally:
+            RunProfiler._busy.release()
+
+    @staticmethod
+    def _profiled(main: Callable, kind: str, args: tuple):
+        """剖析一次 main 的執行"""
+        sampler = None
+        if Config.PROFILE_MODE == "cprofile":
+            if RunProfiler._profile is None:
+                RunProfiler._profile = cProfile.Profile()
+            RunProfiler._profile.enable()
+        else:
+            sampler = _StackSampler(threading.get_ident(), main.__code__, RunProfiler._stacks)
+            sampler.start()
+        start = time.perf_counter()
+        try:
+            return main(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            if sampler is not None:
+                sampler.stop()
+            else:
+                RunProfiler._profile.disable()
+            with RunProfiler._lock:
+                RunProfiler._durations.append((kind, elapsed))
+                if len(RunProfiler._durations) >= Config.PROFILE_RUNS and not RunProfiler._finished:
+                    RunProfiler._finished = True
+                    RunProfiler._write_results()
+
+    @staticmethod
+    def _write_results():
+        """寫出剖析結果"""
+        os.makedirs(Config.PROFILE_DIR, exist_ok=True)
+        base = os.path.join(Config.PROFILE_DIR, f"profile-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}")
+        summary = [f"模式: {Config.PROFILE_MODE}", f"重新執行次數: {len(RunProfiler._durations)}"]
+        for kind in sorted({kind for kind, _ in RunProfiler._durations}):
+            durations = [d for k, d in RunProfiler._durations if k == kind]
+            summary += [
+                f"{kind}: {len(durations)} 次，平均 {sum(durations) / len(durations) * 1000:.1f} ms，"
+                f"最長 {max(durations) * 1000:.1f} ms",
+                "  每次 (ms): " + ", ".join(f"{d * 1000:.1f}" for d in durations),
+            ]
+        summary.append("")
+        try:
+            if RunProfiler._profile is not None:
+                output = f"{base}.prof"
+                RunProfiler._profile.dump_stats(output)
+                stream = io.StringIO()
+                pstats.Stats(RunProfiler._profile, stream=stream).sort_stats("cumulative").print_stats(30)
+                summary.append(stream.getvalue())
+            else:
+                output = f"{base}.folded"
+                with open(output, "w", encoding="utf-8") as f:
+                    for stack, count in RunProfiler._stacks.most_common():
+                        f.write(f"{stack} {count}\n")
+                summary.append(f"取樣數: {sum(RunProfiler._stacks.values())}"
+                               f"（每 {Config.PROFILE_SAMPLE_INTERVAL * 1000:g} ms）")
+            with open(f"{base}.txt", "w", encoding="utf-8") as f:
+                f.write("\n".join(summary) + "\n")
+            print(f"效能剖析結果已寫入 {output}", file=sys.stderr)
+        except OSError as e:
+            print(f"寫入效能剖析結果失敗: {str(e)}", file=sys.stderr)
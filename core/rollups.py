@@ -0,0 +1,128 @@
+"""
+PPE 檢測事件彙總模組
+事件寫入時同步累加到分鐘、小時、日彙總表，統計頁面只讀取彙總表，不必重新掃描原始事件
+"""
+import sqlite3
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+from models.ppe_event import PPEEvent
+
+# 彙總粒度（表名為 ppe_rollup_<粒度>），時間區段以本地時間切齊
+GRANULARITIES = ("minute", "hour", "day")
+
+# 彙總表欄位：區段起點（epoch 秒）、閘口、事件類型、階段、事件數與經過時間統計
+ROLLUP_COLUMNS = (
+    "bucket", "gate_id", "event_type", "stage",
+    "events", "duration_sum", "duration_count", "duration_min", "duration_max"
+)
+
+class EventRollups:
+    """事件增量彙總類"""
+
+    SCHEMA = "".join(f'''
+        CREATE TABLE IF NOT EXISTS ppe_rollup_{granularity} (
+            bucket REAL NOT NULL,
+            gate_id INTEGER NOT NULL,
+            event_type TEXT NOT NULL,
+            stage INTEGER NOT NULL,
+            events INTEGER NOT NULL,
+            duration_sum REAL NOT NULL,
+            duration_count INTEGER NOT NULL,
+            duration_min REAL,
+            duration_max REAL,
+            PRIMARY KEY (bucket, gate_id, event_type, stage)
+        );
+    ''' for granularity in GRANULARITIES)
+
+    @staticmethod
+    def bucket(timestamp: float, granularity: str) -> float:
+        """
+        取得時間所屬區段的起點
+
+        Args:
+            timestamp: epoch 秒
+            granularity: "minute" / "hour" / "day"
+
+        Returns:
+            float: 區段起點（本地時間切齊後的 epoch 秒）
+        """
+        moment = datetime.fromtimestamp(timestamp).replace(second=0, microsecond=0)
+        if granularity in ("hour", "day"):
+            moment = moment.replace(minute=0)
+        if granularity == "day":
+            moment = moment.replace(hour=0)
+        return moment.timestamp()
+
+    @staticmethod
+    def aggregate(events: Iterable[PPEEvent], granularity: str) -> Dict[Tuple, List]:
+        """
+        在記憶體中先彙總一批事件
+
+        Args:
+            events: 檢測事件
+            granularity: 彙總粒度
+
+        Returns:
+            Dict[Tuple, List]: (區段, 閘口, 事件類型, 階段) 對應
+            [事件數, 經過時間總和, 有經過時間的事件數, 最小值, 最大值]
+        """
+        totals: Dict[Tuple, List] = defaultdict(lambda: [0, 0.0, 0, None, None])
+        for event in events:
+            key = (EventRollups.bucket(event.timestamp, granularity),
+                   event.gate_id, event.event_type, event.stage)
+            total = totals[key]
+            total[0] += 1
+            if event.duration is not None:
+                total[1] += event.duration
+                total[2] += 1
+                total[3] = event.duration if total[3] is None else min(total[3], event.duration)
+                total[4] = event.duration if total[4] is None else max(total[4], event.duration)
+        return totals
+
+    @staticmethod
+    def apply(conn: sqlite3.Connection, events: List[PPEEvent]):
+        """
+        將一批事件累加到所有彙總表（在呼叫端的交易中執行）
+
+        Args:
+            conn: 可寫入的資料庫連線
+            events: 剛寫入 ppe_events 的事件
+        """
+        for granularity in GRANULARITIES:
+            rows = [key + tuple(total) for key, total in EventRollups.aggregate(events, granularity).items()]
+            conn.executemany(f'''
+                INSERT INTO ppe_rollup_{granularity} ({", ".join(ROLLUP_COLUMNS)})
+                VALUES ({", ".join("?" * len(ROLLUP_COLUMNS))})
+                ON CONFLICT (bucket, gate_id, event_type, stage) DO UPDATE SET
+                    events = events + excluded.events,
+                    duration_sum = duration_sum + excluded.duration_sum,
+                    duration_count = duration_count + excluded.duration_count,
+                    duration_min = COALESCE(MIN(duration_min, excluded.duration_min),
+                                            duration_min, excluded.duration_min),
+                    duration_max = COALESCE(MAX(duration_max, excluded.duration_max),
+                                            duration_max, excluded.duration_max)
+            ''', rows)
+
+    @staticmethod
+    def backfill(conn: sqlite3.Connection, batch_size: int = 10000):
+        """
+        彙總表為空但已有事件時（例如升級前記錄的事件），從 ppe_events 重建一次
+
+        Args:
+            conn: 可寫入的資料庫連線
+            batch_size: 每次讀取的事件數
+        """
+        if conn.execute(f"SELECT 1 FROM ppe_rollup_{GRANULARITIES[0]} LIMIT 1").fetchone():
+            return
+        last_id = 0
+        with conn:
+            while True:
+                rows = conn.execute('''
+                    SELECT id, gate_id, event_type, stage, items, timestamp, duration, detail
+                    FROM ppe_events WHERE id > ? ORDER BY id LIMIT ?
+                ''', (last_id, batch_size)).fetchall()
+                if not rows:
+                    break
+                EventRollups.apply(conn, [PPEEvent(*row[1:]) for row in rows])
+                last_id = rows[-1][0]
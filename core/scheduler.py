@@ -0,0 +1,171 @@
+"""
+PPE 推論排程模組
+讓只有 CPU 的閘口電腦跟上攝影機畫面率：
+- 依量測到的推論時間按比例跳過畫面，平均每個擷取畫面的推論時間不超過 INFERENCE_FRAME_BUDGET
+- 依檢測引擎目前的階段只推論需要的項目（目前與下一階段，例如第一階段不推論防護衣），
+  has_person 在檢測階段中以較低頻率確認
+- 寫入的結果只包含本次推論的項目，沒有推論的項目視為 "fail"（分數 0），不沿用舊的分數
+"""
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from models.stage_config import ITEM_KEYS, STAGE_CONFIG
+from models.stage_rules import PERSON_BIT
+from config.settings import Config
+from core.database import Database
+from core.inference import scores_to_bits
+
+# 各檢測階段需要推論的項目
+STAGE_ITEMS: Dict[int, List[str]] = {
+    stage["id"]: [item_key for _, item_key in stage["items"]] for stage in STAGE_CONFIG
+}
+
+class EventStageSource:
+    """從 ppe_events 最新事件取得檢測引擎目前的階段
+
+    攝影機推論與儀表板（檢測引擎）在不同行程執行時使用；事件由 EventStore 批次寫入，
+    階段改變最多延遲 EVENT_FLUSH_INTERVAL 秒。
+    """
+
+    def __init__(self, gate_id: int):
+        """
+        Args:
+            gate_id: 閘口編號
+        """
+        self.gate_id = gate_id
+
+    def __call__(self) -> Optional[int]:
+        """
+        Returns:
+            Optional[int]: 目前階段，沒有事件或讀取失敗時為None
+        """
+        event = Database.get_latest_event(self.gate_id)
+        return None if event is None else event.stage_after()
+
+class InferenceScheduler:
+    """單一閘口的推論排程
+
+    階段由 stage_source 提供（檢測引擎的階段），排程本身不推進狀態機；
+    階段未知時推論全部項目。
+    """
+
+    def __init__(self, budget: Optional[float] = None,
+                 stage_source: Optional[Callable[[], Optional[int]]] = None):
+        """
+        Args:
+            budget: 每個畫面的推論時間預算（秒），預設 INFERENCE_FRAME_BUDGET
+            stage_source: 返回檢測引擎目前階段的函式（例如 EventStageSource，或同一行程中
+                lambda: DetectionEngine().snapshot(gate_id).current_stage），None 表示一律推論全部項目
+        """
+        self.budget = Config.INFERENCE_FRAME_BUDGET if budget is None else budget
+        self.stage_source = stage_source
+        self._lock = threading.Lock()
+        self._latency = 0.0  # 推論時間的指數移動平均（秒）
+        self._stride = 1  # 每幾個畫面推論一次
+        self._since_processed = 0
+        self.stage: Optional[int] = None
+        self._stage_read = -math.inf
+        self._person = False  # 最近一次確認的 has_person
+        self._last_person_check = 0.0
+        self._counts = {"processed": 0, "skipped": 0, "inferred_items": 0}
+
+    def should_process(self) -> bool:
+        """
+        擷取到新畫面時呼叫，決定是否推論此畫面
+
+        Returns:
+            bool: False 表示跳過此畫面
+        """
+        with self._lock:
+            self._since_processed += 1
+            if self._since_processed < self._stride:
+                self._counts["skipped"] += 1
+                return False
+            self._since_processed = 0
+            self._counts["processed"] += 1
+            return True
+
+    def _current_stage(self, now: float) -> Optional[int]:
+        """每 SCHEDULER_STAGE_INTERVAL 秒向 stage_source 讀取一次階段"""
+        if self.stage_source is not None and now - self._stage_read >= Config.SCHEDULER_STAGE_INTERVAL:
+            # 讀取可能查詢資料庫，不持有鎖
+            stage = self.stage_source()
+            with self._lock:
+                self.stage = stage
+                self._stage_read = now
+        return self.stage
+
+    def items_for(self, now: Optional[float] = None) -> List[str]:
+        """
+        目前畫面需要推論的項目
+
+        除了目前階段，也推論下一階段的項目：階段改變傳到排程之前，下一階段的項目已有結果，
+        不會因為等待階段更新而停頓。
+
+        Args:
+            now: 目前時間（time.monotonic()），預設為現在
+
+        Returns:
+            List[str]: 項目列表，空列表表示此畫面不需要推論
+        """
+        if now is None:
+            now = time.monotonic()
+        stage = self._current_stage(now)
+        with self._lock:
+            if stage is None:
+                items = list(ITEM_KEYS)
+            elif stage == 0:
+                # 等待人員；已看到人員時檢測引擎即將進入第一階段
+                items = ["has_person"] + (STAGE_ITEMS[1] if self._person else [])
+            else:
+                items = STAGE_ITEMS.get(stage, []) + STAGE_ITEMS.get(stage + 1, [])
+                if now - self._last_person_check >= Config.SCHEDULER_PERSON_INTERVAL:
+                    items.append("has_person")
+            if "has_person" in items:
+                self._last_person_check = now
+            self._counts["inferred_items"] += len(items)
+            return items
+
+    def record_latency(self, seconds: float):
+        """
+        記錄一次推論時間並調整跳過畫面的比例
+
+        Args:
+            seconds: 推論時間（秒）
+        """
+        with self._lock:
+            self._latency = seconds if self._latency == 0.0 else 0.8 * self._latency + 0.2 * seconds
+            stride = math.ceil(self._latency / self.budget) if self.budget > 0 else 1
+            self._stride = max(1, min(Config.SCHEDULER_MAX_STRIDE, stride))
+
+    def update(self, scores: Dict[str, float]) -> int:
+        """
+        將本次推論的分數轉為寫入 ppe_detection 的位元
+
+        沒有推論的項目為 "fail"；has_person 例外，沿用最近一次確認的結果
+        （檢測階段中每 SCHEDULER_PERSON_INTERVAL 秒確認一次，不會讓任何 PPE 項目通過）。
+
+        Args:
+            scores: 本次推論的項目分數（可以只有部分項目）
+
+        Returns:
+            int: 項目位元
+        """
+        bits = scores_to_bits(scores)
+        with self._lock:
+            if "has_person" in scores:
+                self._person = bool(bits & PERSON_BIT)
+            return bits | (PERSON_BIT if self._person else 0)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        取得排程統計
+
+        Returns:
+            Dict[str, float]: processed/skipped（推論/跳過的畫面數）、inferred_items（推論的項目數）、
+            stride（目前每幾個畫面推論一次）、latency_ms（推論時間移動平均）與 stage（檢測引擎的階段，未知時為None）
+        """
+        with self._lock:
+            return dict(self._counts, stride=self._stride,
+                        latency_ms=round(self._latency * 1000, 2), stage=self.stage)
@@ -2,19 +2,91 @@
 PPE 檢測系統會話狀態管理模組
 """
 import streamlit as st
+from typing import Callable, Optional
+from models.gate_state import GateState
+from models.ppe_status import AnyStatus
+from config.settings import Config
+from core.engine import DetectionEngine
+from core.metrics import Metrics
+
+RENDER_SECONDS = Metrics.histogram("ppe_render_seconds", "UI組件渲染時間", ("component", "gate"))
 
 def init_session_state():
     """初始化 Streamlit session state"""
     defaults = {
-        'current_stage': 0,  # 0=等待, 1=第一階段, 2=第二階段, 3=第三階段, 4=完成
-        'stage_start_time': None,
-        'last_person_seen': None,
-        'completion_time': None,
-        'logs': [],
-        'manual_override': False,
-        'system_started': False
+        'gate_id': _default_gate_id(),  # 本會話顯示的閘口
+        'gate_state': None,  # 檢測引擎發布的閘口狀態快照
+        'manual_override': False
     }
     
     for key, value in defaults.items():
         if key not in st.session_state:
-            st.session_state[key] = value
\ No newline at end of file
+            st.session_state[key] = value
+
+def _default_gate_id() -> int:
+    """網址參數 ?gate=N 指定的閘口，未指定或無效時使用第一個閘口"""
+    try:
+        gate_id = int(st.query_params.get("gate", Config.GATE_IDS[0]))
+    except ValueError:
+        return Config.GATE_IDS[0]
+    return gate_id if gate_id in Config.GATE_IDS else Config.GATE_IDS[0]
+
+def refresh_gate_state() -> GateState:
+    """
+    從檢測引擎取得最新快照並存為本次重新執行的狀態
+    
+    完整重新執行時由 app.main 呼叫，即時區塊的 fragment 每次執行開始時由 render_live_sections 呼叫。
+    
+    Returns:
+        GateState: 閘口狀態快照
+    """
+    st.session_state.gate_state = DetectionEngine().snapshot(st.session_state.gate_id)
+    return st.session_state.gate_state
+
+def wait_for_gate_state(timeout: float) -> GateState:
+    """
+    等待檢測引擎發布比本次快照新的版本（或逾時），並存為本次重新執行的狀態
+    
+    Args:
+        timeout: 最長等待秒數
+    
+    Returns:
+        GateState: 閘口狀態快照（逾時時與原快照相同）
+    """
+    st.session_state.gate_state = DetectionEngine().wait_for_update(
+        st.session_state.gate_id, st.session_state.gate_state.version, timeout
+    )
+    return st.session_state.gate_state
+
+def get_gate_state() -> GateState:
+    """
+    取得本次重新執行的閘口狀態快照
+    
+    Returns:
+        GateState: 閘口狀態快照
+    """
+    return st.session_state.gate_state
+
+def get_status_snapshot() -> Optional[AnyStatus]:
+    """
+    取得本次重新執行的檢測狀態快照
+    
+    Returns:
+        AnyStatus: 檢測狀態物件，讀取失敗返回None
+    """
+    return st.session_state.gate_state.status
+
+def timed_render(render: Callable) -> Callable:
+    """
+    以 ppe_render_seconds{component, gate} 記錄UI組件的渲染時間
+
+    Args:
+        render: 渲染函式
+
+    Returns:
+        Callable: 包裝後的渲染函式
+    """
+    return RENDER_SECONDS.timed(
+        render.__name__,
+        lambda *args, **kwargs: st.session_state.get("gate_id", "all")
+    )(render)
@@ -0,0 +1,104 @@
+"""
+PPE 檢測分數平滑模組
+將 realtime_detection 的分數流轉為去除閃爍的 pass/fail 判斷：
+最近 SMOOTHING_WINDOW 筆分數取中位數（單一畫面的誤判不會影響結果），
+再以指數移動平均平滑，最後以上下兩個門檻判斷（分數在兩個門檻之間時維持原判斷）
+"""
+from typing import Dict, Hashable, Optional, Sequence, Tuple
+import numpy as np
+from models.ppe_status import PackedStatus
+from models.stage_config import SCORE_KEYS
+from models.stage_rules import ITEM_BITS
+from config.settings import Config
+
+# 有分數的項目位元，平滑後的判斷取代這些位元
+SCORE_BITS = np.array([ITEM_BITS[item_key] for item_key in SCORE_KEYS])
+SCORE_MASK = int(SCORE_BITS.sum())
+
+class ScoreSmoother:
+    """單一閘口的分數平滑器
+
+    每個項目一個固定長度的環狀緩衝區，記憶體用量不隨執行時間增加。
+    """
+
+    def __init__(self, window: Optional[int] = None):
+        """
+        Args:
+            window: 取中位數的分數筆數，預設 SMOOTHING_WINDOW
+        """
+        window = Config.SMOOTHING_WINDOW if window is None else window
+        self._buffer = np.zeros((len(SCORE_KEYS), max(1, window)))
+        self._next = 0  # 下一筆寫入的欄位
+        self._filled = 0  # 已寫入的筆數（最多 window）
+        self._ema = np.zeros(len(SCORE_KEYS))
+        self._passed = np.zeros(len(SCORE_KEYS), dtype=bool)
+        self._last_sample: Optional[Hashable] = None
+
+    def add(self, scores: Sequence[float], sample_id: Hashable = None) -> int:
+        """
+        加入一筆分數並更新判斷
+
+        Args:
+            scores: 各項目分數，順序同 SCORE_KEYS
+            sample_id: 分數的識別（分數列的內容與毫秒時間），與上一筆相同時不重複加入
+
+        Returns:
+            int: 平滑後判斷為 pass 的項目位元
+        """
+        if sample_id is not None and sample_id == self._last_sample:
+            return self.bits()
+        self._last_sample = sample_id
+
+        self._buffer[:, self._next] = scores
+        self._next = (self._next + 1) % self._buffer.shape[1]
+        first = self._filled == 0
+        self._filled = min(self._filled + 1, self._buffer.shape[1])
+
+        median = np.median(self._buffer[:, :self._filled], axis=1)
+        if first:
+            self._ema = median
+        else:
+            self._ema = Config.SMOOTHING_ALPHA * median + (1 - Config.SMOOTHING_ALPHA) * self._ema
+        self._passed = np.where(self._ema >= Config.SMOOTHING_PASS_THRESHOLD, True,
+                                np.where(self._ema <= Config.SMOOTHING_FAIL_THRESHOLD, False, self._passed))
+        return self.bits()
+
+    def bits(self) -> int:
+        """
+        目前判斷為 pass 的項目位元
+
+        Returns:
+            int: 只包含 SCORE_KEYS 的位元
+        """
+        return int(SCORE_BITS[self._passed].sum())
+
+def smooth_statuses(smoothers: Dict[int, ScoreSmoother], statuses: Optional[Dict[int, PackedStatus]],
+                    scores: Optional[Dict[int, Tuple[Tuple[float, ...], float]]]) -> Optional[Dict[int, PackedStatus]]:
+    """
+    以平滑後的分數判斷取代檢測結果中有分數的項目
+
+    沒有分數、分數讀取失敗或分數比檢測結果舊超過 SMOOTHING_STALE_AFTER 秒的閘口維持原結果。
+    每筆分數以分數列本身識別，只有分數列改變（新的畫面）時才加入平滑器，
+    與檢測結果或其他閘口是否改變無關。
+
+    Args:
+        smoothers: 閘口編號 -> 平滑器（不存在時建立）
+        statuses: 閘口編號 -> 檢測結果
+        scores: 閘口編號 -> (各項目分數, 分數時間 epoch 秒)
+
+    Returns:
+        Dict[int, PackedStatus]: 取代後的檢測結果（不修改傳入的物件）
+    """
+    if not statuses or not scores:
+        return statuses
+    smoothed = dict(statuses)
+    for gate_id, status in statuses.items():
+        score_row = scores.get(gate_id)
+        if score_row is None or status.timestamp - score_row[1] > Config.SMOOTHING_STALE_AFTER:
+            continue
+        smoother = smoothers.get(gate_id)
+        if smoother is None:
+            smoother = smoothers[gate_id] = ScoreSmoother()
+        bits = smoother.add(score_row[0], score_row)
+        smoothed[gate_id] = PackedStatus((status.bits & ~SCORE_MASK) | bits, status.timestamp)
+    return smoothed
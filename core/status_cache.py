@@ -0,0 +1,128 @@
+"""
+PPE 檢測狀態快取模組
+整個行程共用的 ppe_detection 與 realtime_detection 讀取快取，以 StatusWatcher 對應資料表的版本
+（PRAGMA data_version 偵測後比對內容）失效，並以 STATUS_CACHE_TTL 作為保底
+"""
+import threading
+import time
+from typing import Callable, Dict, Hashable, Iterable, Optional, Tuple
+from models.ppe_status import PPEStatus, PackedStatus
+from config.settings import Config
+from core.database import Database
+from core.metrics import Metrics
+from core.watcher import StatusWatcher
+
+class StatusCache:
+    """檢測狀態讀取快取類
+
+    快取項目在資料版本改變或超過 STATUS_CACHE_TTL 秒後失效；讀取失敗的結果不快取。
+    同一時間只有一個執行緒讀取資料庫，其他執行緒等待後直接使用新結果。
+    """
+    _lock = threading.Lock()
+    _entries: Dict[Hashable, Tuple[int, float, object]] = {}  # 鍵 -> (資料版本, 讀取時間, 結果)
+    _hits = 0
+    _misses = 0
+
+    @staticmethod
+    def _cached(key: Hashable, load: Callable[[], object], version: Optional[int] = None):
+        """
+        取得快取結果，失效時以 load 重新讀取
+
+        Args:
+            key: 快取鍵（已包含資料庫路徑）
+            load: 讀取函式，失敗時返回None
+            version: 資料版本，預設為 ppe_detection 的 any_version
+
+        Returns:
+            讀取結果
+        """
+        if version is None:
+            version = StatusWatcher().any_version()
+        with StatusCache._lock:
+            entry = StatusCache._entries.get(key)
+            if entry and entry[0] == version and time.monotonic() - entry[1] < Config.STATUS_CACHE_TTL:
+                StatusCache._hits += 1
+                return entry[2]
+            StatusCache._misses += 1
+            result = load()
+            if result is not None:
+                StatusCache._entries[key] = (version, time.monotonic(), result)
+            return result
+
+    @staticmethod
+    def get_status(gate_id: int = 1) -> Optional[PPEStatus]:
+        """
+        Database.get_status 的快取版本
+
+        Args:
+            gate_id: 閘口編號 (ppe_detection.id)
+
+        Returns:
+            PPEStatus: 檢測狀態物件，如果讀取失敗返回None
+        """
+        return StatusCache._cached(
+            ("status", Config.DB_PATH, gate_id),
+            lambda: Database.get_status(gate_id)
+        )
+
+    @staticmethod
+    def get_all_status(gate_ids: Iterable[int]) -> Optional[Dict[int, PackedStatus]]:
+        """
+        Database.get_all_status 的快取版本
+
+        Args:
+            gate_ids: 閘口編號列表
+
+        Returns:
+            Dict[int, PackedStatus]: 閘口編號對應的緊湊檢測狀態，如果讀取失敗返回None
+        """
+        gate_ids = tuple(gate_ids)
+        return StatusCache._cached(
+            ("all_status", Config.DB_PATH, gate_ids),
+            lambda: Database.get_all_status(gate_ids)
+        )
+
+    @staticmethod
+    def get_all_scores(gate_ids: Iterable[int]) -> Optional[Dict[int, Tuple[Tuple[float, ...], float]]]:
+        """
+        Database.get_all_scores 的快取版本（以 realtime_detection 自己的版本失效）
+
+        Args:
+            gate_ids: 閘口編號列表
+
+        Returns:
+            Dict[int, Tuple[Tuple[float, ...], float]]: 閘口編號對應 (分數, 分數時間)，如果讀取失敗返回None
+        """
+        gate_ids = tuple(gate_ids)
+        return StatusCache._cached(
+            ("all_scores", Config.DB_PATH, gate_ids),
+            lambda: Database.get_all_scores(gate_ids),
+            StatusWatcher().score_version()
+        )
+
+    @staticmethod
+    def stats() -> Dict[str, float]:
+        """
+        取得快取命中統計
+
+        Returns:
+            Dict[str, float]: hits、misses 與 hit_rate（沒有讀取時為 0）
+        """
+        with StatusCache._lock:
+            total = StatusCache._hits + StatusCache._misses
+            return {
+                "hits": StatusCache._hits,
+                "misses": StatusCache._misses,
+                "hit_rate": StatusCache._hits / total if total else 0.0,
+            }
+
+    @staticmethod
+    def clear():
+        """清除所有快取項目（例如資料庫被外部替換時）"""
+        with StatusCache._lock:
+            StatusCache._entries.clear()
+
+Metrics.collector("ppe_status_cache_hits_total", "counter", "檢測狀態快取命中次數",
+                  lambda: StatusCache.stats()["hits"])
+Metrics.collector("ppe_status_cache_misses_total", "counter", "檢測狀態快取未命中次數",
+                  lambda: StatusCache.stats()["misses"])
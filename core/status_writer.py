@@ -0,0 +1,217 @@
+"""
+PPE 檢測結果寫入模組
+供檢測器（攝影機推論、模擬器）寫入 ppe_detection：資料庫使用 WAL 模式，
+高頻率的檢測畫面在記憶體中合併，每個閘口只保留最新一筆，最多每 STATUS_COMMIT_INTERVAL 秒提交一次；
+有分數的畫面同時寫入 realtime_detection（檢測引擎以分數平滑判斷，last_updated 精確到毫秒，
+作為每筆分數的識別）
+"""
+import atexit
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Sequence, Tuple
+from models.ppe_status import AnyStatus, PackedStatus
+from models.stage_config import ITEM_KEYS, SCORE_KEYS
+from config.settings import Config
+from core.metrics import Metrics
+
+class StatusWriter:
+    """檢測結果寫入類 - 單例模式
+
+    WAL 模式下讀取不會被寫入阻擋，儀表板與檢測引擎的唯讀連線不會遇到 database is locked。
+    所有提交使用同一條連線與同一段 UPSERT 語句，sqlite3 會重複使用已編譯的語句。
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    SCHEMA = f'''
+        PRAGMA journal_mode = WAL;
+        PRAGMA synchronous = NORMAL;
+        CREATE TABLE IF NOT EXISTS ppe_detection (
+            id INTEGER PRIMARY KEY,
+            {"".join(f"{item_key} TEXT DEFAULT 'fail', " for item_key in ITEM_KEYS)}
+            last_updated DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE IF NOT EXISTS realtime_detection (
+            id INTEGER PRIMARY KEY,
+            {"".join(f"{item_key}_score REAL DEFAULT 0, " for item_key in SCORE_KEYS)}
+            last_updated DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+    '''
+
+    COLUMNS = ["id"] + ITEM_KEYS + ["last_updated"]
+
+    UPSERT = f'''
+        INSERT INTO ppe_detection ({", ".join(COLUMNS)})
+        VALUES ({", ".join("?" * len(COLUMNS))})
+        ON CONFLICT (id) DO UPDATE SET
+            {", ".join(f"{column} = excluded.{column}" for column in COLUMNS[1:])}
+    '''
+
+    SCORE_COLUMNS = ["id"] + [f"{item_key}_score" for item_key in SCORE_KEYS] + ["last_updated"]
+
+    UPSERT_SCORES = f'''
+        INSERT INTO realtime_detection ({", ".join(SCORE_COLUMNS)})
+        VALUES ({", ".join("?" * len(SCORE_COLUMNS))})
+        ON CONFLICT (id) DO UPDATE SET
+            {", ".join(f"{column} = excluded.{column}" for column in SCORE_COLUMNS[1:])}
+    '''
+
+    @staticmethod
+    def score_time(timestamp: float) -> str:
+        """
+        realtime_detection.last_updated 的時間字串（UTC，精確到毫秒，SQLite julianday 可直接解析）
+
+        Args:
+            timestamp: epoch 秒
+
+        Returns:
+            str: 例如 "2024-01-01 08:00:00.125"
+        """
+        return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+    def __new__(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance.setup_writer()
+        return cls._instance
+
+    def setup_writer(self):
+        """建立合併緩衝區並啟動背景提交執行緒"""
+        self._latest: Dict[int, Tuple[int, float, Optional[tuple]]] = {}  # 閘口編號 -> (項目位元, epoch 秒, 分數)
+        self._latest_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._arrived = threading.Event()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_path: Optional[str] = None
+        self._frames = 0
+        self._commits = 0
+        self._rows = 0
+        self._failures = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="PPE_StatusWriter", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, gate_id: int, status: AnyStatus, timestamp: Optional[float] = None,
+               scores: Optional[Sequence[float]] = None):
+        """
+        非阻塞地加入一個檢測畫面的結果，同一閘口尚未提交的結果會被取代
+
+        Args:
+            gate_id: 閘口編號 (ppe_detection.id)
+            status: 檢測結果（PPEStatus 或 PackedStatus）
+            timestamp: 畫面時間（epoch 秒），None 表示現在
+            scores: 各項目分數（順序同 SCORE_KEYS），None 表示不寫入 realtime_detection
+        """
+        frame = (status.to_bits(), time.time() if timestamp is None else timestamp,
+                 None if scores is None else tuple(scores))
+        with self._latest_lock:
+            self._latest[gate_id] = frame
+            self._frames += 1
+        self._arrived.set()
+
+    def _connection(self) -> sqlite3.Connection:
+        """取得寫入連線，第一次使用時切換為 WAL 模式並建立資料表"""
+        if self._conn is None or self._db_path != Config.DB_PATH:
+            if self._conn is not None:
+                self._conn.close()
+            self._db_path = Config.DB_PATH
+            self._conn = sqlite3.connect(self._db_path, timeout=Config.DB_TIMEOUT, check_same_thread=False)
+            self._conn.executescript(StatusWriter.SCHEMA)
+        return self._conn
+
+    def flush(self) -> bool:
+        """
+        立即以單一交易提交所有閘口的最新結果
+
+        Returns:
+            bool: 是否成功（沒有待提交的結果也視為成功）
+        """
+        with self._write_lock:
+            with self._latest_lock:
+                pending, self._latest = self._latest, {}
+            if not pending:
+                return True
+
+            rows = []
+            score_rows = []
+            for gate_id, (bits, timestamp, scores) in pending.items():
+                row = PackedStatus(bits, timestamp).to_row()
+                rows.append((gate_id,) + row)
+                if scores is not None:
+                    score_rows.append((gate_id,) + scores + (StatusWriter.score_time(timestamp),))
+            try:
+                conn = self._connection()
+                with conn:
+                    conn.executemany(StatusWriter.UPSERT, rows)
+                    if score_rows:
+                        conn.executemany(StatusWriter.UPSERT_SCORES, score_rows)
+            except Exception as e:
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+                print(f"寫入檢測結果失敗: {str(e)}", file=sys.stderr)
+                # 放回尚未被新結果取代的閘口，下一輪重試
+                with self._latest_lock:
+                    self._failures += 1
+                    for gate_id, frame in pending.items():
+                        self._latest.setdefault(gate_id, frame)
+                self._arrived.set()
+                return False
+
+            with self._latest_lock:
+                self._commits += 1
+                self._rows += len(rows)
+            return True
+
+    def _run(self):
+        """背景提交迴圈：有新結果時提交，但兩次提交至少相隔 STATUS_COMMIT_INTERVAL 秒"""
+        last_commit = 0.0
+        while not self._stop.is_set():
+            if not self._arrived.wait(timeout=1.0):
+                continue
+            delay = Config.STATUS_COMMIT_INTERVAL - (time.monotonic() - last_commit)
+            if delay > 0 and self._stop.wait(delay):
+                break
+            self._arrived.clear()
+            self.flush()
+            last_commit = time.monotonic()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        取得寫入統計
+
+        Returns:
+            Dict[str, int]: frames（收到的畫面數）、commits（提交次數）、rows（寫入列數）
+            與 failures（提交失敗次數）
+        """
+        with self._latest_lock:
+            return {"frames": self._frames, "commits": self._commits,
+                    "rows": self._rows, "failures": self._failures}
+
+    def close(self):
+        """停止背景執行緒，提交剩餘結果並關閉連線"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join(timeout=Config.STATUS_COMMIT_INTERVAL + 1)
+        self.flush()
+        with self._write_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+def _writer_stat(name: str) -> int:
+    """同一行程中有檢測器寫入時的統計，沒有時為 0"""
+    return StatusWriter._instance.stats()[name] if StatusWriter._instance else 0
+
+Metrics.collector("ppe_status_writer_frames_total", "counter", "檢測器送出的畫面數",
+                  lambda: _writer_stat("frames"))
+Metrics.collector("ppe_status_writer_commits_total", "counter", "檢測結果提交次數",
+                  lambda: _writer_stat("commits"))
+Metrics.collector("ppe_status_writer_failures_total", "counter", "檢測結果提交失敗次數",
+                  lambda: _writer_stat("failures"))
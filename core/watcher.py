@@ -0,0 +1,215 @@
+"""
+PPE 檢測系統資料變更監看模組
+"""
+import sqlite3
+import sys
+import threading
+from typing import Dict, Optional, Tuple
+from config.settings import Config
+from core.database import Database
+
+class StatusWatcher:
+    """ppe_detection 與 realtime_detection 資料變更監看類 - 單例模式
+
+    背景執行緒以 PRAGMA data_version 偵測其他連線的提交，
+    只有在某一列內容真的改變時才遞增該列版本並喚醒等待該列的會話。
+    realtime_detection（檢測分數）另有自己的版本（score_version），分數改變而檢測結果沒變時也會遞增。
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance.setup_watcher()
+        return cls._instance
+
+    def setup_watcher(self):
+        """設定監看狀態並啟動背景執行緒"""
+        self._lock = threading.Lock()
+        self._conditions: Dict[int, threading.Condition] = {}
+        self._versions: Dict[int, int] = {}
+        self._rows: Dict[int, Tuple] = {}
+        self._any_changed = threading.Condition(self._lock)
+        self._any_version = 0
+        self._score_rows: Dict[int, Tuple] = {}
+        self._score_version = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+        self._last_error: Optional[str] = None  # 最近一次的錯誤訊息，相同錯誤只輸出一次
+        self._stop = threading.Event()
+
+        # 先同步檢查一次，讓第一次重新執行就拿到有效版本
+        self._poll()
+
+        self._thread = threading.Thread(target=self._run, name="PPE_StatusWatcher", daemon=True)
+        self._thread.start()
+
+    def _condition(self, row_id: int) -> threading.Condition:
+        """取得指定資料列的條件變數（需持有 self._lock）"""
+        if row_id not in self._conditions:
+            self._conditions[row_id] = threading.Condition(self._lock)
+        return self._conditions[row_id]
+
+    def _poll(self):
+        """檢查資料版本，若 ppe_detection 或 realtime_detection 有變更則通知對應的等待者"""
+        try:
+            if self._conn is None:
+                self._conn = Database.connect(Config.DB_PATH)
+                self._data_version = None
+
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self._data_version:
+                return
+            self._data_version = data_version
+
+            rows = self._conn.execute(f'''
+                SELECT id, {Database.STATUS_COLUMNS}
+                FROM ppe_detection
+            ''').fetchall()
+            try:
+                score_rows = self._conn.execute("SELECT * FROM realtime_detection").fetchall()
+            except sqlite3.OperationalError as e:
+                # 只寫入 ppe_detection 的檢測器不會建立 realtime_detection
+                if "no such table" not in str(e):
+                    raise
+                score_rows = []
+        except Exception as e:
+            # 資料庫暫時不可用時下次重新連線
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            if str(e) != self._last_error:
+                self._last_error = str(e)
+                print(f"監看資料庫失敗: {str(e)}", file=sys.stderr)
+            return
+
+        if self._last_error is not None:
+            self._last_error = None
+            print("監看資料庫已恢復", file=sys.stderr)
+
+        with self._lock:
+            changed = False
+            for row in rows:
+                row_id = row[0]
+                if self._rows.get(row_id) != row:
+                    self._rows[row_id] = row
+                    self._versions[row_id] = self._versions.get(row_id, 0) + 1
+                    self._condition(row_id).notify_all()
+                    changed = True
+            score_changed = False
+            for row in score_rows:
+                if self._score_rows.get(row[0]) != row:
+                    self._score_rows[row[0]] = row
+                    score_changed = True
+            if score_changed:
+                self._score_version += 1
+            if changed:
+                self._any_version += 1
+            if changed or score_changed:
+                self._any_changed.notify_all()
+
+    def _run(self):
+        """背景監看迴圈"""
+        while not self._stop.wait(Config.WATCH_INTERVAL):
+            self._poll()
+
+    def version(self, row_id: int = 1) -> int:
+        """
+        取得指定資料列目前的版本
+
+        Args:
+            row_id: ppe_detection 資料列編號（即閘口編號）
+
+        Returns:
+            int: 版本號，每次內容變更遞增
+        """
+        with self._lock:
+            return self._versions.get(row_id, 0)
+
+    def wait_for_change(self, row_id: int, since_version: int, timeout: float) -> int:
+        """
+        阻塞直到指定資料列版本不同於 since_version 或逾時
+
+        Args:
+            row_id: ppe_detection 資料列編號（即閘口編號）
+            since_version: 呼叫端最後看到的版本
+            timeout: 最長等待秒數
+
+        Returns:
+            int: 返回時的版本號
+        """
+        with self._lock:
+            self._condition(row_id).wait_for(
+                lambda: self._versions.get(row_id, 0) != since_version,
+                timeout
+            )
+            return self._versions.get(row_id, 0)
+
+    def any_version(self) -> int:
+        """
+        取得整張 ppe_detection 表的版本
+
+        Returns:
+            int: 版本號，任一資料列內容變更時遞增
+        """
+        with self._lock:
+            return self._any_version
+
+    def wait_for_any_change(self, since_version: int, timeout: float) -> int:
+        """
+        阻塞直到任一資料列變更或逾時
+
+        Args:
+            since_version: 呼叫端最後看到的 any_version
+            timeout: 最長等待秒數
+
+        Returns:
+            int: 返回時的 any_version
+        """
+        with self._lock:
+            self._any_changed.wait_for(lambda: self._any_version != since_version, timeout)
+            return self._any_version
+
+    def score_version(self) -> int:
+        """
+        取得整張 realtime_detection 表的版本
+
+        Returns:
+            int: 版本號，任一閘口的分數列內容變更時遞增
+        """
+        with self._lock:
+            return self._score_version
+
+    def data_versions(self) -> Tuple[int, int]:
+        """
+        同時取得 any_version 與 score_version
+
+        Returns:
+            Tuple[int, int]: (any_version, score_version)
+        """
+        with self._lock:
+            return self._any_version, self._score_version
+
+    def wait_for_data_change(self, since_versions: Tuple[int, int], timeout: float) -> Tuple[int, int]:
+        """
+        阻塞直到檢測結果或檢測分數任一變更或逾時
+
+        Args:
+            since_versions: 呼叫端最後看到的 data_versions()
+            timeout: 最長等待秒數
+
+        Returns:
+            Tuple[int, int]: 返回時的 (any_version, score_version)
+        """
+        with self._lock:
+            self._any_changed.wait_for(
+                lambda: (self._any_version, self._score_version) != since_versions, timeout
+            )
+            return self._any_version, self._score_version
+
+    def stop(self):
+        """停止背景監看執行緒"""
+        self._stop.set()
+        self._thread.join()
@@ -0,0 +1,32 @@
+"""
+PPE 檢測閘口狀態資料模型
+"""
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Deque, Optional
+from models.ppe_status import AnyStatus
+
+@dataclass
+class RepeatRecord:
+    """最近一則日誌的重複狀態，用來合併連續相同的日誌"""
+    level: str = ""
+    message: str = ""
+    window_start: Optional[datetime] = None  # 本次統計區間開始時間
+    last_time: Optional[datetime] = None
+    repeats: int = 0  # 區間內被略過的重複次數
+
+@dataclass
+class GateState:
+    """單一檢測閘口的狀態機資料結構"""
+    gate_id: int = 1
+    current_stage: int = 0  # 0=等待, 1=第一階段, 2=第二階段, 3=第三階段, 4=完成
+    stage_start_time: Optional[datetime] = None
+    stage_entered_time: Optional[datetime] = None  # 進入目前階段的時間（計算階段停留時間）
+    last_person_seen: Optional[datetime] = None
+    completion_time: Optional[datetime] = None
+    status: Optional[AnyStatus] = None  # 最近一次讀取的檢測結果
+    logs: Deque[str] = field(default_factory=lambda: deque(maxlen=30))
+    repeat: RepeatRecord = field(default_factory=RepeatRecord)
+    failed_items: Optional[int] = None  # 目前階段最近一次記錄失敗事件時的項目位元
+    version: int = 0  # 每次發布遞增
@@ -0,0 +1,45 @@
+"""
+PPE 檢測事件資料模型
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+# 事件類型
+EVENT_ENTER = "enter"  # 檢測到人員，進入第一階段
+EVENT_STAGE_PASS = "stage_pass"  # 階段自動通過
+EVENT_STAGE_FAIL = "stage_fail"  # 階段檢測失敗（未通過的項目改變時才記錄一次）
+EVENT_COMPLETE = "complete"  # 所有階段完成
+EVENT_MANUAL_PASS = "manual_pass"  # 手動通過階段
+EVENT_RESET = "reset"  # 系統重置（逾時或手動）
+
+EVENT_TYPES = (
+    EVENT_ENTER, EVENT_STAGE_PASS, EVENT_STAGE_FAIL,
+    EVENT_COMPLETE, EVENT_MANUAL_PASS, EVENT_RESET
+)
+
+@dataclass
+class PPEEvent:
+    """單筆檢測事件（ppe_events 的一列）"""
+    gate_id: int
+    event_type: str
+    stage: int  # 事件發生時所在的階段
+    items: int  # 事件發生時的檢測項目位元遮罩（同 PPEStatus.to_bits）
+    timestamp: float  # epoch 秒數
+    duration: Optional[float] = None  # 階段或整次檢測經過的秒數，不適用時為None
+    detail: str = ""  # 補充說明（例如重置原因）
+
+    def stage_after(self) -> int:
+        """
+        事件發生後閘口所在的階段
+
+        Returns:
+            int: 進入為第一階段，通過為下一階段，重置為 0，失敗與完成維持事件記錄的階段
+        """
+        if self.event_type == EVENT_RESET:
+            return 0
+        if self.event_type == EVENT_ENTER:
+            # 舊版記錄的進入事件階段為 1，一律視為進入第一階段
+            return 1
+        if self.event_type in (EVENT_STAGE_PASS, EVENT_MANUAL_PASS):
+            return self.stage + 1
+        return self.stage
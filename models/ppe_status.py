@@ -1,16 +1,148 @@
 """
 PPE 狀態資料模型
 """
-from dataclasses import dataclass
+from dataclasses import field, make_dataclass
+from datetime import datetime, timezone
+from typing import Sequence, Tuple, Union
+from models.stage_config import ITEM_KEYS
+from models.stage_rules import ITEM_BITS
 
-@dataclass
-class PPEStatus:
-    """PPE 檢測狀態資料結構"""
-    has_person: str = "fail"
-    helmet: str = "fail"
-    goggles: str = "fail"
-    gloves: str = "fail"
-    boots: str = "fail"
-    suit: str = "fail"
-    mask: str = "fail"
-    last_updated: str = ""
\ No newline at end of file
+def _to_bits(self) -> int:
+    """
+    將各檢測項目壓成位元遮罩
+    
+    Returns:
+        int: "pass" 的項目對應位元為1
+    """
+    bits = 0
+    for item_key, bit in ITEM_BITS.items():
+        if getattr(self, item_key) == "pass":
+            bits |= bit
+    return bits
+
+# PPE 檢測狀態資料結構：欄位由 ITEM_KEYS 產生（順序相同，預設 "fail"），最後為 last_updated，
+# STAGE_CONFIG 新增項目時不需要修改此處
+PPEStatus = make_dataclass(
+    "PPEStatus",
+    [(item_key, str, field(default="fail")) for item_key in ITEM_KEYS] + [("last_updated", str, field(default=""))],
+    namespace={"__doc__": "PPE 檢測狀態資料結構", "to_bits": _to_bits}
+)
+
+class PackedStatus:
+    """
+    PPE 檢測狀態的緊湊表示
+    
+    所有檢測項目壓成一個整數位元欄位，時間戳記存為 epoch 秒數，
+    適合大量保存（狀態歷史、多閘口表格、事件緩衝）。
+    項目屬性（status.helmet 等）與 last_updated 仍以字串讀取，與 PPEStatus 相容。
+    """
+    __slots__ = ("bits", "timestamp")
+    
+    _TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+    
+    def __init__(self, bits: int = 0, timestamp: float = 0.0):
+        self.bits = bits
+        self.timestamp = timestamp
+    
+    @staticmethod
+    def _parse_time(value: Union[str, float, None]) -> float:
+        """
+        將 last_updated 轉為 epoch 秒數
+        
+        字串視為UTC（與 SQLite CURRENT_TIMESTAMP 相同），數字視為 epoch 秒數；
+        無法解析時為 0.0，單一格式錯誤的資料列不會讓整批讀取失敗。
+        """
+        if not value:
+            return 0.0
+        if isinstance(value, (int, float)):
+            return float(value)
+        try:
+            return datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp()
+        except (TypeError, ValueError):
+            return 0.0
+    
+    @classmethod
+    def from_row(cls, row: Sequence) -> "PackedStatus":
+        """
+        由 ppe_detection 資料列建立（欄位順序同 ITEM_KEYS，最後為 last_updated）
+        
+        Args:
+            row: 資料庫查詢結果
+            
+        Returns:
+            PackedStatus: 緊湊狀態
+        """
+        bits = 0
+        for bit, value in zip(ITEM_BITS.values(), row):
+            if value == "pass":
+                bits |= bit
+        return cls(bits, cls._parse_time(row[len(ITEM_BITS)]))
+    
+    @classmethod
+    def from_status(cls, status: PPEStatus) -> "PackedStatus":
+        """
+        由 PPEStatus 建立
+        
+        Args:
+            status: PPE狀態物件
+            
+        Returns:
+            PackedStatus: 緊湊狀態
+        """
+        return cls(status.to_bits(), cls._parse_time(status.last_updated))
+    
+    def to_row(self) -> Tuple[str, ...]:
+        """
+        轉為 ppe_detection 資料列（順序同 ITEM_KEYS，最後為 last_updated）
+        
+        Returns:
+            Tuple[str, ...]: "pass"/"fail" 欄位值與時間字串
+        """
+        items = tuple("pass" if self.bits & bit else "fail" for bit in ITEM_BITS.values())
+        return items + (self.last_updated,)
+    
+    def to_status(self) -> PPEStatus:
+        """
+        轉為 PPEStatus 資料類別
+        
+        Returns:
+            PPEStatus: PPE狀態物件
+        """
+        return PPEStatus(*self.to_row())
+    
+    def to_bits(self) -> int:
+        """
+        取得位元遮罩（與 PPEStatus.to_bits 相同介面）
+        
+        Returns:
+            int: "pass" 的項目對應位元為1
+        """
+        return self.bits
+    
+    @property
+    def last_updated(self) -> str:
+        """最後更新時間字串，沒有時間時為空字串"""
+        if not self.timestamp:
+            return ""
+        return datetime.fromtimestamp(self.timestamp, timezone.utc).strftime(self._TIME_FORMAT)
+    
+    def __getattr__(self, name: str) -> str:
+        # 只有找不到一般屬性時才會呼叫，用來提供 status.helmet 等項目屬性
+        bit = ITEM_BITS.get(name)
+        if bit is None:
+            raise AttributeError(name)
+        return "pass" if self.bits & bit else "fail"
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, PackedStatus):
+            return NotImplemented
+        return self.bits == other.bits and self.timestamp == other.timestamp
+    
+    def __hash__(self) -> int:
+        return hash((self.bits, self.timestamp))
+    
+    def __repr__(self) -> str:
+        return f"PackedStatus(bits={self.bits:#x}, last_updated={self.last_updated!r})"
+
+# 檢測邏輯可接受的狀態型別（兩者都提供 to_bits 與項目屬性）
+AnyStatus = Union[PPEStatus, PackedStatus]
@@ -1,23 +1,36 @@
 """
 PPE 檢測階段配置資料
+新增階段或檢測項目只需修改此處，檢測邏輯會在啟動時編譯成規則表
 """
 
 STAGE_CONFIG = [
     {
         "id": 1,
+        "title": "第一階段",
         "name": "頭部防護",
         "items": [("👷‍♂️ 安全帽", "helmet"), ("🥽 護目鏡", "goggles")]
     },
     {
         "id": 2, 
+        "title": "第二階段",
         "name": "手足防護",
         "items": [("🧤 手套", "gloves"), ("👢 安全靴", "boots")]
     },
     {
         "id": 3,
+        "title": "第三階段",
         "name": "身體防護", 
         "items": [("🦺 防護衣", "suit"), ("😷 防護面罩", "mask")]
     }
 ]
 
-STAGE_NAMES = ["等待人員", "頭部防護", "手足防護", "身體防護", "檢測完成"]
\ No newline at end of file
+STAGE_NAMES = ["等待人員"] + [stage["name"] for stage in STAGE_CONFIG] + ["檢測完成"]
+
+# 全部階段通過時的公告
+COMPLETION_MESSAGE = "🎉 所有PPE檢測完成！可以進入工作區域"
+
+# 檢測項目欄位順序（批次陣列的欄位順序，也是 ppe_detection 的欄位順序）
+ITEM_KEYS = ["has_person"] + [item_key for stage in STAGE_CONFIG for _, item_key in stage["items"]]
+
+# realtime_detection 中有分數欄位（{項目}_score）的項目，has_person 沒有分數
+SCORE_KEYS = [item_key for item_key in ITEM_KEYS if item_key != "has_person"]
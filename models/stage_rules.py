@@ -0,0 +1,53 @@
+"""
+PPE 檢測階段規則表
+啟動時由 STAGE_CONFIG 編譯而成，每個階段的判斷只是一次位元遮罩比較
+"""
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from models.stage_config import STAGE_CONFIG, ITEM_KEYS
+
+@dataclass(frozen=True)
+class StageRule:
+    """單一檢測階段的編譯後規則"""
+    stage_id: int
+    name: str
+    mask: int  # 本階段必須全部通過的項目位元
+    enter_message: str
+    pass_message: str
+    fail_message: str
+
+# 各檢測項目對應的位元
+ITEM_BITS = {item_key: 1 << index for index, item_key in enumerate(ITEM_KEYS)}
+PERSON_BIT = ITEM_BITS["has_person"]
+
+# 檢測完成的階段編號（最後一個階段的下一個）
+COMPLETE_STAGE = len(STAGE_CONFIG) + 1
+
+def _item_label(item_name: str) -> str:
+    """去掉項目名稱前的圖示，例如 "👷‍♂️ 安全帽" -> "安全帽" """
+    return item_name.split(" ", 1)[-1]
+
+def compile_stage_rules() -> Tuple[Optional[StageRule], ...]:
+    """
+    將 STAGE_CONFIG 編譯為以階段編號為索引的規則表
+
+    Returns:
+        Tuple[Optional[StageRule], ...]: 索引 0（等待）與 COMPLETE_STAGE（完成）為None
+    """
+    rules: List[Optional[StageRule]] = [None] * (COMPLETE_STAGE + 1)
+    for stage in STAGE_CONFIG:
+        mask = 0
+        for _, item_key in stage["items"]:
+            mask |= ITEM_BITS[item_key]
+        labels = "和".join(_item_label(item_name) for item_name, _ in stage["items"])
+        rules[stage["id"]] = StageRule(
+            stage_id=stage["id"],
+            name=stage["name"],
+            mask=mask,
+            enter_message=f"檢測到人員，進入{stage['title']}",
+            pass_message=f"{stage['title']}通過 - {labels}",
+            fail_message=f"{stage['title']}失敗 - 請檢查{labels}"
+        )
+    return tuple(rules)
+
+STAGE_RULES = compile_stage_rules()
@@ -0,0 +1,15 @@
+"""
+PPE 檢測統計分析頁面
+讀取事件彙總表，顯示通過人次、完成時間與各階段停留時間/失敗率
+"""
+import streamlit as st
+from ui.components.analytics import render_analytics
+
+# 設定頁面
+st.set_page_config(
+    page_title="PPE檢測統計",
+    page_icon="📊",
+    layout="wide"
+)
+
+render_analytics()
@@ -0,0 +1,274 @@
+"""
+PPE 檢測系統效能基準測試
+量測資料庫讀取、狀態機推進、日誌寫入與完整頁面重新執行的 p50/p99 延遲與每秒次數，
+結果存為 JSON，可與其他版本的結果比較
+
+用法：
+    python ppe_benchmark.py run                       # 執行全部，結果寫入 logs/benchmarks/
+    python ppe_benchmark.py run --only detector_tick app_render
+    python ppe_benchmark.py compare 舊結果.json 新結果.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+GATES = 4
+
+def summarize(samples: List[float], elapsed: float, **params) -> Dict:
+    """
+    彙整一項基準測試的結果
+
+    Args:
+        samples: 每次操作的秒數
+        elapsed: 整段測試的秒數（計算每秒次數）
+        params: 測試參數，原樣存入結果
+
+    Returns:
+        Dict: count、p50_ms、p99_ms、mean_ms、ops_per_sec 與 params
+    """
+    values = np.asarray(samples) * 1000
+    p50, p99 = np.percentile(values, [50, 99])
+    return {
+        "count": len(samples),
+        "p50_ms": round(float(p50), 4),
+        "p99_ms": round(float(p99), 4),
+        "mean_ms": round(float(values.mean()), 4),
+        "ops_per_sec": round(len(samples) / elapsed, 1),
+        "params": params,
+    }
+
+def create_database():
+    """在目前目錄建立測試資料庫（GATES 個閘口）"""
+    from core.status_writer import StatusWriter
+    from models.ppe_status import PackedStatus
+    writer = StatusWriter()
+    for gate_id in range(1, GATES + 1):
+        writer.submit(gate_id, PackedStatus())
+    writer.flush()
+
+def bench_db_get_status(args) -> Dict:
+    """多個執行緒同時以 Database.get_status 讀取，同時有檢測器以固定畫面率寫入"""
+    from core.database import Database
+    from core.status_writer import StatusWriter
+    from models.ppe_status import PackedStatus
+
+    stop = threading.Event()
+    samples: List[List[float]] = [[] for _ in range(args.readers)]
+
+    def reader(index: int):
+        rng = random.Random(index)
+        while not stop.is_set():
+            start = time.perf_counter()
+            Database.get_status(rng.randint(1, GATES))
+            samples[index].append(time.perf_counter() - start)
+
+    def writer():
+        rng = random.Random(0)
+        while not stop.wait(1 / args.writer_fps):
+            for gate_id in range(1, GATES + 1):
+                StatusWriter().submit(gate_id, PackedStatus(rng.getrandbits(7)))
+
+    threads = [threading.Thread(target=reader, args=(index,)) for index in range(args.readers)]
+    threads.append(threading.Thread(target=writer))
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return summarize([s for reader_samples in samples for s in reader_samples], elapsed,
+                     readers=args.readers, writer_fps=args.writer_fps, gates=GATES)
+
+def bench_detector_tick(args) -> Dict:
+    """以模擬器產生的畫面逐一呼叫 PPEDetector.update_detection_state（每畫面 1/30 秒）"""
+    from core.detector import PPEDetector
+    from core.load_generator import GateSimulator, LoadProfile
+    from models.gate_state import GateState
+    from models.ppe_status import PackedStatus
+
+    profile = LoadProfile(arrival_rate=6.0, miss_rate=0.01, seed=1)
+    gate = GateSimulator(1, profile, random.Random(1))
+    dt = 1 / profile.fps
+    statuses = [PackedStatus(gate.step(index * dt, dt)) for index in range(args.ticks)]
+
+    state = GateState(gate_id=1)
+    base = datetime.now()
+    samples = []
+    start = time.perf_counter()
+    for index, status in enumerate(statuses):
+        current_time = base + timedelta(seconds=index * dt)
+        tick_start = time.perf_counter()
+        PPEDetector.update_detection_state(state, status, current_time)
+        samples.append(time.perf_counter() - tick_start)
+    return summarize(samples, time.perf_counter() - start, ticks=args.ticks)
+
+def _logger_script(count: int):
+    """在 Streamlit 腳本中呼叫 Logger.add_log（st.session_state 需要腳本執行環境）"""
+    import time
+    import streamlit as st
+    from core.logger import Logger
+
+    Logger()
+    levels = ["INFO", "SUCCESS", "WARNING", "ERROR"]
+    samples = []
+    start = time.perf_counter()
+    for index in range(count):
+        call_start = time.perf_counter()
+        Logger.add_log(f"基準測試日誌 {index}", levels[index % len(levels)])
+        samples.append(time.perf_counter() - call_start)
+    Logger.flush()
+    st.session_state.benchmark = (samples, time.perf_counter() - start)
+
+def bench_logger_add_log(args) -> Dict:
+    """Logger.add_log 呼叫延遲；每秒次數包含最後把佇列寫入檔案的時間"""
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_function(_logger_script, args=(args.logs,), default_timeout=600)
+    app.run()
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+    samples, elapsed = app.session_state.benchmark
+    return summarize(samples, elapsed, logs=args.logs)
+
+def bench_app_render(args) -> Dict:
+    """以 Streamlit AppTest 完整重新執行 app.py（包含 AppUI.render 與所有即時區塊）"""
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)
+    app.run()  # 暖身：啟動檢測引擎與建立索引
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+    samples = []
+    start = time.perf_counter()
+    for _ in range(args.renders):
+        run_start = time.perf_counter()
+        app.run()
+        samples.append(time.perf_counter() - run_start)
+    return summarize(samples, time.perf_counter() - start, renders=args.renders)
+
+BENCHMARKS: Dict[str, Callable] = {
+    "db_get_status": bench_db_get_status,
+    "detector_tick": bench_detector_tick,
+    "logger_add_log": bench_logger_add_log,
+    "app_render": bench_app_render,
+}
+
+def git_revision() -> str:
+    """目前的 git 版本，無法取得時為 "unknown" """
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def run(args):
+    """在暫存目錄中執行基準測試並寫出 JSON 結果"""
+    revision = git_revision()
+    output = args.output or os.path.join(
+        ROOT, "logs", "benchmarks", f"benchmark-{datetime.now():%Y%m%d-%H%M%S}-{revision}.json"
+    )
+    output = os.path.abspath(output)
+
+    # 資料庫與日誌都是相對路徑，切換到暫存目錄避免影響正式資料；
+    # 系統日誌的終端輸出導向檔案，只在終端顯示測試結果
+    workdir = tempfile.mkdtemp(prefix="ppe_benchmark_")
+    os.chdir(workdir)
+    stderr_path = os.path.join(workdir, "stderr.log")
+    sys.stderr = open(stderr_path, "w", encoding="utf-8")
+    try:
+        create_database()
+
+        report = {
+            "revision": revision,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "results": {},
+        }
+        for name in args.only or BENCHMARKS:
+            print(f"執行 {name} ...", flush=True)
+            result = BENCHMARKS[name](args)
+            report["results"][name] = result
+            print(f"  p50 {result['p50_ms']:.3f} ms  p99 {result['p99_ms']:.3f} ms  "
+                  f"{result['ops_per_sec']:.1f} 次/秒", flush=True)
+
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    except BaseException:
+        print(f"基準測試中斷（系統輸出: {stderr_path}）", file=sys.__stderr__)
+        raise
+    finally:
+        # 還原終端輸出，例外追蹤才會顯示在終端；背景執行緒的日誌處理器仍持有暫存檔，因此不關閉檔案
+        sys.stderr = sys.__stderr__
+    print(f"結果已寫入 {output}（系統輸出: {stderr_path}）")
+
+def compare(args):
+    """比較兩份結果，顯示各項指標的變化百分比"""
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+    print(f"{baseline['revision']} -> {current['revision']}")
+
+    def change(old: float, new: float) -> str:
+        return f"{(new - old) / old * 100:+.1f}%" if old else "-"
+
+    for name, result in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            print(f"{name}: 基準結果中沒有此項")
+            continue
+        print(
+            f"{name}: p50 {old['p50_ms']:.3f} -> {result['p50_ms']:.3f} ms ({change(old['p50_ms'], result['p50_ms'])}), "
+            f"p99 {old['p99_ms']:.3f} -> {result['p99_ms']:.3f} ms ({change(old['p99_ms'], result['p99_ms'])}), "
+            f"{old['ops_per_sec']:.1f} -> {result['ops_per_sec']:.1f} 次/秒 "
+            f"({change(old['ops_per_sec'], result['ops_per_sec'])})"
+        )
+
+def build_parser() -> argparse.ArgumentParser:
+    """建立命令列參數解析器"""
+    parser = argparse.ArgumentParser(description="PPE 檢測系統效能基準測試")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    bench = commands.add_parser("run", help="執行基準測試")
+    bench.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="只執行指定項目")
+    bench.add_argument("--output", help="結果 JSON 路徑（預設 logs/benchmarks/）")
+    bench.add_argument("--duration", type=float, default=5.0, help="db_get_status 執行秒數")
+    bench.add_argument("--readers", type=int, default=4, help="db_get_status 讀取執行緒數")
+    bench.add_argument("--writer-fps", type=float, default=30.0, help="db_get_status 寫入畫面率")
+    bench.add_argument("--ticks", type=int, default=20000, help="detector_tick 畫面數")
+    bench.add_argument("--logs", type=int, default=20000, help="logger_add_log 日誌數")
+    bench.add_argument("--renders", type=int, default=20, help="app_render 重新執行次數")
+
+    diff = commands.add_parser("compare", help="比較兩份結果")
+    diff.add_argument("baseline", help="基準結果 JSON")
+    diff.add_argument("current", help="目前結果 JSON")
+    return parser
+
+def main():
+    """主程式入口點"""
+    args = build_parser().parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        compare(args)
+
+if __name__ == "__main__":
+    main()
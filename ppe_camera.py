@@ -0,0 +1,94 @@
+"""
+PPE 攝影機推論程式
+從攝影機或影片檔讀取畫面，以 CPU 模型推論後寫入 ppe_detection（取代外部檢測程式）
+
+用法：
+    python ppe_camera.py --gate 1 --source 0                      # 攝影機 0，模型依 INFERENCE_MODELS
+    python ppe_camera.py --gate 2 --source rtsp://camera-2/stream --backend onnx
+    python ppe_camera.py --source 測試影片.mp4 --model weights/ppe.onnx
+    python ppe_camera.py --source 0 --model weights/head.onnx=helmet,goggles --model weights/body.onnx
+"""
+import argparse
+import sys
+import time
+from config.settings import Config
+from core.inference import BACKENDS, create_backend
+from core.pipeline import DetectionPipeline
+from core.scheduler import EventStageSource, InferenceScheduler
+from core.status_writer import StatusWriter
+
+def parse_models(values: list) -> dict:
+    """
+    解析 --model 參數
+
+    Args:
+        values: "模型路徑" 或 "模型路徑=項目,項目" 字串列表
+
+    Returns:
+        dict: 模型路徑 -> 輸出項目（None 表示依 ITEM_KEYS 順序）
+    """
+    models = {}
+    for value in values:
+        path, _, items = value.partition("=")
+        models[path] = [item.strip() for item in items.split(",")] if items else None
+    return models
+
+def format_schedule(stats: dict) -> str:
+    """排程統計文字"""
+    return (f"每 {stats['stride']} 畫面推論一次（推論 {stats['latency_ms']:.1f} ms），"
+            f"跳過 {stats['skipped']}，階段 {'未知' if stats['stage'] is None else stats['stage']}")
+
+def build_parser() -> argparse.ArgumentParser:
+    """建立命令列參數解析器"""
+    parser = argparse.ArgumentParser(description="PPE 攝影機推論程式")
+    parser.add_argument("--db", default=Config.DB_PATH, help="資料庫路徑")
+    parser.add_argument("--gate", type=int, default=Config.GATE_IDS[0], help="寫入的閘口編號")
+    parser.add_argument("--source", default="0", help="攝影機編號、影片檔路徑或串流網址")
+    parser.add_argument("--backend", choices=list(BACKENDS), default=Config.INFERENCE_BACKEND, help="推論後端")
+    parser.add_argument("--model", action="append", default=[], metavar="路徑[=項目,...]",
+                        help="模型與其輸出項目（可重複），預設 INFERENCE_MODELS")
+    parser.add_argument("--threshold", type=float, default=Config.INFERENCE_THRESHOLD, help="pass 門檻")
+    parser.add_argument("--budget", type=float, default=Config.INFERENCE_FRAME_BUDGET,
+                        help="每個畫面的推論時間預算（秒），推論較慢時按比例跳過畫面")
+    parser.add_argument("--no-schedule", action="store_true", help="每個畫面都推論全部項目")
+    parser.add_argument("--duration", type=float, default=0, help="執行秒數，0 表示直到來源結束或 Ctrl+C")
+    parser.add_argument("--report-interval", type=float, default=5.0, help="統計輸出間隔秒數")
+    return parser
+
+def main():
+    """主程式入口點"""
+    args = build_parser().parse_args()
+    Config.DB_PATH = args.db
+    Config.INFERENCE_THRESHOLD = args.threshold
+
+    try:
+        backend = create_backend(args.backend, parse_models(args.model) or None)
+        scheduler = None if args.no_schedule else InferenceScheduler(args.budget, EventStageSource(args.gate))
+        pipeline = DetectionPipeline(args.gate, args.source, backend, scheduler=scheduler)
+    except (RuntimeError, ValueError) as e:
+        sys.exit(str(e))
+
+    print(f"閘口 {args.gate}: 讀取 {args.source}，後端 {args.backend}（Ctrl+C 停止）")
+    start = time.monotonic()
+    last = pipeline.stats()
+    pipeline.start()
+    try:
+        while not pipeline.wait(args.report_interval):
+            elapsed = time.monotonic() - start
+            stats = pipeline.stats()
+            print(f"[{elapsed:7.1f}s] 擷取 {(stats['captured'] - last['captured']) / args.report_interval:.1f} fps，"
+                  f"推論 {(stats['written'] - last['written']) / args.report_interval:.1f} fps，"
+                  f"捨棄 {stats['dropped']}，失敗 {stats['failures']}"
+                  + (f"，{format_schedule(scheduler.stats())}" if scheduler else ""))
+            last = stats
+            if args.duration and elapsed >= args.duration:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pipeline.stop()
+        StatusWriter().close()
+    print(f"結束: {pipeline.stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+ppe_events 推得的階段（PPEEvent.stage_after）與檢測狀態機一致的回歸測試
+"""
+from datetime import datetime, timedelta
+import pytest
+from config.settings import Config
+from core.database import Database
+from core.detector import PPEDetector
+from core.event_store import EventStore
+from models.gate_state import GateState
+from models.ppe_status import PackedStatus
+from models.stage_rules import COMPLETE_STAGE, PERSON_BIT, STAGE_RULES
+
+@pytest.fixture
+def event_db(tmp_path, monkeypatch):
+    """在暫存目錄中寫入事件與日誌"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Config, "DB_PATH", str(tmp_path / "ppe_detection.db"))
+    yield
+    EventStore().flush()
+    Database.close_all()
+
+def latest_stage(gate_id: int) -> int:
+    """寫出佇列中的事件後，以最新事件推得的階段"""
+    EventStore().flush()
+    return Database.get_latest_event(gate_id).stage_after()
+
+def test_stage_after_matches_state_machine(event_db):
+    state = GateState(gate_id=1)
+    # 模擬的畫面時間早於現在，手動操作（以現在時間記錄）才會是最新事件
+    now = datetime.now() - timedelta(hours=1)
+
+    def tick(bits: int):
+        nonlocal now
+        now += timedelta(seconds=1)
+        PPEDetector.update_detection_state(state, PackedStatus(bits, now.timestamp()), now)
+
+    tick(PERSON_BIT)
+    assert state.current_stage == 1
+    assert latest_stage(1) == state.current_stage
+
+    # 第一階段失敗（沒有任何 PPE）
+    tick(PERSON_BIT)
+    assert state.current_stage == 1
+    assert latest_stage(1) == state.current_stage
+
+    for stage in range(1, COMPLETE_STAGE):
+        tick(PERSON_BIT | STAGE_RULES[stage].mask)
+        assert state.current_stage == stage + 1
+        assert latest_stage(1) == state.current_stage
+
+    # 完成後逾時重置
+    now += timedelta(seconds=Config.COMPLETION_TIMEOUT + 1)
+    tick(PERSON_BIT)
+    assert state.current_stage == 0
+    assert latest_stage(1) == state.current_stage
+
+    # 重新進入後手動通過
+    tick(PERSON_BIT)
+    PPEDetector.manual_pass_stage(state)
+    assert state.current_stage == 2
+    assert latest_stage(1) == state.current_stage
+
+    PPEDetector.reset_system(state, "手動重置")
+    assert latest_stage(1) == state.current_stage == 0
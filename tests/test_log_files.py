@@ -0,0 +1,25 @@
+"""
+日誌目錄維護（封存與保留期限）只在明確呼叫或換日輪替時執行的回歸測試
+"""
+from datetime import date, timedelta
+from config.settings import Config
+from core.log_files import RotatingLogFileHandler, list_log_files, maintain_log_dir
+
+def test_handler_does_not_touch_old_logs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Config, "LOG_DIR", str(tmp_path / "logs"))
+    (tmp_path / "logs" / "samples").mkdir(parents=True)
+    old_day = (date.today() - timedelta(days=Config.LOG_RETENTION_DAYS + 5)).isoformat()
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    for day in (old_day, yesterday):
+        (tmp_path / "logs" / f"ppe_detection_{day}.log").write_text("line\n", encoding="utf-8")
+    sample = tmp_path / "logs" / "samples" / f"ppe_detection_{old_day}.log"
+    sample.write_text("line\n", encoding="utf-8")
+
+    handler = RotatingLogFileHandler()
+    handler.close()
+    assert list_log_files() == [f"ppe_detection_{yesterday}.log", f"ppe_detection_{old_day}.log"]
+
+    maintain_log_dir()
+    assert list_log_files() == [f"ppe_detection_{yesterday}.1.log.gz"]
+    assert sample.exists()
@@ -7,13 +7,19 @@ from ui.components.person_status import render_person_status
 from ui.components.stages import render_stages
 from ui.components.control_panel import render_control_panel
 from ui.components.debug_info import render_debug_info
+from ui.live_sections import begin_live_sections, render_live_sections
 
 class AppUI:
     """應用程式UI主控制器"""
     
     @staticmethod
     def render():
-        """渲染完整的應用程式介面"""
+        """渲染完整的應用程式介面
+
+        各組件只建立即時區塊的佔位元素，最後由 render_live_sections 填入內容，並在檢測引擎發布新快照時刷新。
+        """
+        begin_live_sections()
+        
         # 渲染各個UI組件
         render_header()
         render_person_status()
@@ -23,4 +29,6 @@ class AppUI:
         
         # 頁腳
         st.markdown("---")
-        st.markdown("*PPE自動檢測系統 v6.0 - 模組化架構 | 增強版日誌系統*")
\ No newline at end of file
+        st.markdown("*PPE自動檢測系統 v6.0 - 模組化架構 | 增強版日誌系統*")
+        
+        render_live_sections()
\ No newline at end of file
@@ -0,0 +1,78 @@
+"""
+PPE 檢測系統統計分析組件
+"""
+import streamlit as st
+from datetime import date, datetime, time, timedelta
+from config.settings import Config
+from core.analytics import Analytics
+from core.session_manager import timed_render
+
+# 彙總粒度顯示名稱
+GRANULARITY_LABELS = {"minute": "每分鐘", "hour": "每小時", "day": "每日"}
+
+@timed_render
+def render_analytics():
+    """渲染統計分析頁面（只讀取事件彙總表）"""
+    st.title("📊 PPE檢測統計")
+
+    col_gate, col_granularity, col_days = st.columns([1, 1, 2])
+    with col_gate:
+        gate_id = st.selectbox(
+            "檢測閘口",
+            [None] + list(Config.GATE_IDS),
+            format_func=lambda gate_id: "全部閘口" if gate_id is None else f"閘口 {gate_id}"
+        )
+    with col_granularity:
+        granularity = st.selectbox(
+            "統計區間", list(GRANULARITY_LABELS), index=1,
+            format_func=GRANULARITY_LABELS.get
+        )
+    with col_days:
+        today = date.today()
+        days = st.date_input("日期範圍", value=(today - timedelta(days=6), today))
+
+    if not days:
+        st.info("請選擇日期範圍")
+        return
+    start = datetime.combine(days[0], time.min)
+    end = datetime.combine(days[-1] + timedelta(days=1), time.min)
+
+    frame = Analytics.load(granularity, start, end, gate_id)
+    if frame is None:
+        st.error("❌ 無法讀取統計資料，請確認檢測系統已啟動並記錄過事件")
+        return
+    if frame.empty:
+        st.info("此期間沒有檢測紀錄")
+        return
+
+    # 整體完成統計
+    summary = Analytics.completion_summary(frame)
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("完成人次", summary["completed"])
+    col2.metric("平均完成時間", _format_seconds(summary["average"]))
+    col3.metric("最短完成時間", _format_seconds(summary["shortest"]))
+    col4.metric("最長完成時間", _format_seconds(summary["longest"]))
+
+    # 通過人次與完成時間趨勢
+    throughput = Analytics.throughput(frame)
+    st.subheader("🚶 通過人次")
+    st.bar_chart(throughput[["進入人次", "完成人次"]])
+    st.subheader("⏱️ 平均完成時間 (秒)")
+    st.line_chart(throughput["平均完成時間(秒)"].dropna())
+
+    # 各階段停留時間與失敗率
+    stages = Analytics.stage_summary(frame)
+    st.subheader("🧩 各階段統計")
+    st.bar_chart(stages["平均停留(秒)"])
+    st.dataframe(
+        stages.style.format({
+            "平均停留(秒)": "{:.1f}",
+            "每人失敗提示": "{:.2f}",
+            "未通過率": "{:.1%}",
+        }, na_rep="-"),
+        use_container_width=True
+    )
+
+def _format_seconds(seconds) -> str:
+    """將秒數格式化為顯示文字"""
+    return "-" if seconds is None else f"{seconds:.1f} 秒"
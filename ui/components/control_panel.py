@@ -2,14 +2,22 @@
 PPE 檢測系統控制面板組件
 """
 import streamlit as st
-import os
-from datetime import datetime
+from datetime import date, datetime, time
+from typing import Optional
 from models.stage_config import STAGE_NAMES
-from core.database import Database
-from core.detector import PPEDetector
+from core.session_manager import get_gate_state, get_status_snapshot, timed_render
+from core.engine import DetectionEngine
+from config.settings import Config
+from core.log_files import list_log_files, parse_log_name
+from core.log_index import LEVEL_CODES, LogIndex
+from core.log_search import LogSearch
+from models.gate_state import GateState
+from ui.live_sections import live_section
 
+@timed_render
 def render_control_panel():
     """渲染控制面板"""
+    gate_state = get_gate_state()
     st.markdown("---")
     col1, col2 = st.columns([1, 2])
     
@@ -17,8 +25,7 @@ def render_control_panel():
         st.subheader("🎛️ 控制面板")
         
         # 當前階段信息
-        current_stage_name = STAGE_NAMES[st.session_state.current_stage]
-        st.info(f"當前階段: {current_stage_name}")
+        live_section(render_stage_info)
         
         # 手動控制
         st.markdown("### 🔧 手動控制")
@@ -27,56 +34,160 @@ def render_control_panel():
         
         with col_manual1:
             if st.button("✅ 手動通過", use_container_width=True):
-                if st.session_state.current_stage in [1, 2, 3]:
-                    PPEDetector.manual_pass_stage()
+                if DetectionEngine().manual_pass(gate_state.gate_id):
                     st.rerun()
                 else:
                     st.warning("當前無可通過的階段")
         
         with col_manual2:
             if st.button("🔄 重置系統", use_container_width=True):
-                PPEDetector.reset_system("手動重置")
+                DetectionEngine().reset(gate_state.gate_id, "手動重置")
                 st.rerun()
         
         # 系統信息
         st.markdown("### 📊 系統信息")
-        status = Database.get_status()
-        if status and status.last_updated:
-            st.write(f"📅 最後更新: {status.last_updated}")
-        
-        # 計時器
-        if st.session_state.stage_start_time:
-            elapsed = (datetime.now() - st.session_state.stage_start_time).total_seconds()
-            st.write(f"⏱️ 檢測時間: {elapsed:.0f}秒")
+        live_section(render_system_info, detection_elapsed)
     
     with col2:
         # 加入標籤頁
-        tab1, tab2 = st.tabs(["即時日誌", "歷史日誌"])
+        tab1, tab2, tab3 = st.tabs(["即時日誌", "歷史日誌", "搜尋日誌"])
         
         with tab1:
             # 原有的即時日誌顯示
             st.subheader("📝 系統日誌")
-            logs = st.session_state.get('logs', [])
-            st.text_area("即時日誌", '\n'.join(logs[-30:]), height=300)
+            live_section(render_live_log)
         
         with tab2:
             # 新增歷史日誌檢視
             st.subheader("📚 歷史日誌")
             
-            log_files = []
-            if os.path.exists("logs"):
-                log_files = [f for f in os.listdir("logs") if f.endswith('.log')]
-                log_files.sort(reverse=True)
+            # 包含輪替後的 .log.gz 封存檔，新的在前
+            log_files = list_log_files()
             
             if log_files:
                 selected_file = st.selectbox("選擇日誌檔案", log_files)
-                
-                if st.button("載入歷史日誌"):
-                    try:
-                        with open(f"logs/{selected_file}", 'r', encoding='utf-8') as f:
-                            content = f.readlines()[-100:]  # 最後100行
-                            st.text_area("歷史日誌", ''.join(content), height=300)
-                    except Exception as e:
-                        st.error(f"讀取失敗: {e}")
+                render_log_history(selected_file)
             else:
-                st.info("暫無歷史日誌檔案")
\ No newline at end of file
+                st.info("暫無歷史日誌檔案")
+        
+        with tab3:
+            st.subheader("🔍 搜尋日誌")
+            render_log_search()
+
+@timed_render
+def render_stage_info():
+    """渲染當前階段（即時區塊）"""
+    st.info(f"當前階段: {STAGE_NAMES[get_gate_state().current_stage]}")
+
+def detection_elapsed(gate_state: GateState) -> Optional[int]:
+    """本次檢測經過的秒數（已取整），尚未開始檢測時返回None"""
+    if not gate_state.stage_start_time:
+        return None
+    return round((datetime.now() - gate_state.stage_start_time).total_seconds())
+
+@timed_render
+def render_system_info():
+    """渲染最後更新時間與檢測計時器（即時區塊）"""
+    status = get_status_snapshot()
+    if status and status.last_updated:
+        st.write(f"📅 最後更新: {status.last_updated}")
+    
+    # 計時器
+    elapsed = detection_elapsed(get_gate_state())
+    if elapsed is not None:
+        st.write(f"⏱️ 檢測時間: {elapsed}秒")
+
+@timed_render
+def render_live_log():
+    """渲染最近 30 行即時日誌（即時區塊，以唯讀文字區塊顯示）"""
+    logs = list(get_gate_state().logs)
+    st.code('\n'.join(logs[-30:]), language=None, height=300)
+
+@timed_render
+def render_log_history(name: str):
+    """
+    以日誌索引分頁顯示歷史日誌，支援等級篩選與時間跳轉
+
+    st.tabs 每次重新執行都會執行所有標籤頁，因此只在按下「載入歷史日誌」時更新索引，
+    之後切換頁碼與篩選條件沿用 session_state 中已載入的索引。
+
+    Args:
+        name: 日誌檔名
+    """
+    if st.button("載入歷史日誌"):
+        try:
+            st.session_state.log_history_index = LogIndex(name).refresh()
+        except Exception as e:
+            st.error(f"讀取失敗: {e}")
+            return
+
+    index = st.session_state.get("log_history_index")
+    if index is None or index.name != name:
+        st.info("按「載入歷史日誌」讀取所選檔案")
+        return
+
+    col_level, col_time = st.columns(2)
+    with col_level:
+        levels = st.multiselect("日誌等級", list(LEVEL_CODES), default=list(LEVEL_CODES))
+    with col_time:
+        jump_time = st.time_input("跳至時間（顯示此時間之前的日誌）", value=None, step=60)
+
+    end = None
+    if jump_time is not None:
+        end = datetime.combine(date.fromisoformat(parse_log_name(name)[0]), jump_time)
+
+    total = index.count(levels, end=end)
+    pages = max(1, -(-total // Config.LOG_PAGE_SIZE))
+    page = st.number_input("頁碼（1 為最新）", min_value=1, max_value=pages, value=1, step=1)
+    st.caption(f"第 {page} / {pages} 頁，共 {total} 行")
+
+    try:
+        lines = index.page(page - 1, Config.LOG_PAGE_SIZE, levels, end=end)
+    except Exception as e:
+        # 載入後檔案已輪替或刪除
+        st.error(f"讀取失敗: {e}（請重新載入）")
+        return
+    st.text_area("歷史日誌", ''.join(lines), height=300)
+
+@timed_render
+def render_log_search():
+    """
+    以全文索引跨所有日誌檔搜尋，支援關鍵字、等級與日期範圍
+
+    條件放在表單中，只在按下「搜尋」時更新索引並查詢（st.tabs 每次重新執行都會執行所有標籤頁），
+    結果保存在 session_state 供之後的重新執行顯示。
+    """
+    with st.form("log_search"):
+        keyword = st.text_input("關鍵字（以空白分隔多個關鍵字）", key="log_search_keyword")
+        col_level, col_date = st.columns(2)
+        with col_level:
+            levels = st.multiselect("日誌等級", list(LEVEL_CODES), default=list(LEVEL_CODES),
+                                    key="log_search_levels")
+        with col_date:
+            days = st.date_input("日期範圍", value=(), key="log_search_days")
+        submitted = st.form_submit_button("搜尋")
+
+    if submitted:
+        start = end = None
+        if days:
+            start = datetime.combine(days[0], time.min)
+            end = datetime.combine(days[-1], time.max)
+
+        try:
+            with st.spinner("更新日誌索引..."):
+                LogSearch.refresh()
+            total = LogSearch.count(keyword, levels, start, end)
+            hits = LogSearch.search(keyword, levels, start, end)
+        except Exception as e:
+            st.error(f"搜尋失敗: {e}")
+            return
+        st.session_state.log_search_result = (total, hits)
+
+    result = st.session_state.get("log_search_result")
+    if result is None:
+        st.info("輸入條件後按「搜尋」")
+        return
+    total, hits = result
+    more = "以上" if total >= Config.LOG_SEARCH_COUNT_LIMIT else ""
+    st.caption(f"符合 {total} 筆{more}，顯示最新 {len(hits)} 筆")
+    st.text_area("搜尋結果", ''.join(f"[{hit.file}] {hit.line}\n" for hit in hits), height=300)
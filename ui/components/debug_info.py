@@ -2,22 +2,29 @@
 PPE 檢測系統調試信息組件
 """
 import streamlit as st
-from core.database import Database
+from models.stage_config import ITEM_KEYS
+from core.session_manager import get_gate_state, get_status_snapshot, timed_render
+from core.status_cache import StatusCache
+from ui.live_sections import RenderStats, live_section
 
+@timed_render
 def render_debug_info():
     """渲染調試信息（可選顯示）"""
     with st.expander("🔍 調試信息"):
-        status = Database.get_status()
-        if status:
-            st.json({
-                "current_stage": st.session_state.current_stage,
-                "has_person": status.has_person,
-                "helmet": status.helmet,
-                "goggles": status.goggles,
-                "gloves": status.gloves,
-                "boots": status.boots,
-                "suit": status.suit,
-                "mask": status.mask,
-                "last_person_seen": str(st.session_state.last_person_seen),
-                "completion_time": str(st.session_state.completion_time)
-            })
\ No newline at end of file
+        live_section(render_debug_json)
+
+@timed_render
+def render_debug_json():
+    """渲染狀態機與檢測狀態（即時區塊）"""
+    status = get_status_snapshot()
+    gate_state = get_gate_state()
+    if status:
+        st.json({
+            "current_stage": gate_state.current_stage,
+            **{item_key: getattr(status, item_key) for item_key in ITEM_KEYS},
+            "last_person_seen": str(gate_state.last_person_seen),
+            "completion_time": str(gate_state.completion_time),
+            "version": gate_state.version,
+            "live_render_stats": RenderStats.snapshot(),
+            "status_cache": StatusCache.stats()
+        })
\ No newline at end of file
@@ -0,0 +1,17 @@
+"""
+PPE 檢測系統閘口選擇組件
+"""
+import streamlit as st
+from config.settings import Config
+from core.session_manager import timed_render
+
+@timed_render
+def render_gate_selector():
+    """渲染側邊欄閘口選擇（只有一個閘口時不顯示）"""
+    if len(Config.GATE_IDS) > 1:
+        st.sidebar.selectbox(
+            "🚪 檢測閘口",
+            Config.GATE_IDS,
+            key="gate_id",
+            format_func=lambda gate_id: f"閘口 {gate_id}"
+        )
@@ -3,21 +3,43 @@ PPE 檢測系統標題組件
 """
 import streamlit as st
 from datetime import datetime
+from typing import Optional
 from config.settings import Config
+from models.gate_state import GateState
+from models.stage_rules import COMPLETE_STAGE
+from core.session_manager import get_gate_state, timed_render
+from ui.live_sections import live_section
 
+@timed_render
 def render_header():
     """渲染頁面標題"""
+    gate_state = get_gate_state()
     col1, col2 = st.columns([3, 1])
     
     with col1:
-        st.title("🦺 PPE 個人防護設備檢測系統")
+        if len(Config.GATE_IDS) > 1:
+            st.title(f"🦺 PPE 個人防護設備檢測系統 - 閘口 {gate_state.gate_id}")
+        else:
+            st.title("🦺 PPE 個人防護設備檢測系統")
     
     with col2:
-        if st.session_state.current_stage == 4:
-            st.success("✅ 已完成檢查")
-            if st.session_state.completion_time:
-                remaining = Config.COMPLETION_TIMEOUT - (datetime.now() - st.session_state.completion_time).total_seconds()
-                if remaining > 0:
-                    st.write(f"⏰ {remaining:.0f}秒後重置")
+        live_section(render_completion, completion_countdown)
     
-    st.markdown("---")
\ No newline at end of file
+    st.markdown("---")
+
+def completion_countdown(gate_state: GateState) -> Optional[int]:
+    """完成檢查後距離自動重置的秒數（已取整），不適用時返回None"""
+    if gate_state.current_stage != COMPLETE_STAGE or not gate_state.completion_time:
+        return None
+    remaining = Config.COMPLETION_TIMEOUT - (datetime.now() - gate_state.completion_time).total_seconds()
+    return round(remaining) if remaining > 0 else None
+
+@timed_render
+def render_completion():
+    """渲染完成狀態與重置倒數（即時區塊）"""
+    gate_state = get_gate_state()
+    if gate_state.current_stage == COMPLETE_STAGE:
+        st.success("✅ 已完成檢查")
+        remaining = completion_countdown(gate_state)
+        if remaining is not None:
+            st.write(f"⏰ {remaining}秒後重置")
@@ -3,20 +3,35 @@ PPE 檢測系統人員狀態組件
 """
 import streamlit as st
 from datetime import datetime
+from typing import Optional
 from config.settings import Config
-from core.database import Database
+from models.gate_state import GateState
+from core.session_manager import get_gate_state, get_status_snapshot, timed_render
+from ui.live_sections import live_section
 
+@timed_render
 def render_person_status():
     """渲染人員狀態區域"""
-    status = Database.get_status()
+    live_section(render_person_detail, person_absence)
+    st.markdown("---")
+
+def person_absence(gate_state: GateState) -> Optional[int]:
+    """人員離開後經過的秒數（已取整），人員在場或已逾時返回None"""
+    status = gate_state.status
+    if not status or status.has_person != "fail" or not gate_state.last_person_seen:
+        return None
+    time_since = (datetime.now() - gate_state.last_person_seen).total_seconds()
+    return round(time_since) if time_since < Config.PERSON_TIMEOUT else None
+
+@timed_render
+def render_person_detail():
+    """渲染人員狀態與離開倒數（即時區塊）"""
+    status = get_status_snapshot()
     if status:
         person_status = "🟢 檢測到人員" if status.has_person == "pass" else "🔴 無人員"
         st.markdown(f"### 👤 人員狀態: {person_status}")
         
-        if st.session_state.last_person_seen:
-            time_since = (datetime.now() - st.session_state.last_person_seen).total_seconds()
-            if status.has_person == "fail" and time_since < Config.PERSON_TIMEOUT:
-                remaining = Config.PERSON_TIMEOUT - time_since
-                st.warning(f"⏰ 人員離開 {time_since:.0f}秒，{remaining:.0f}秒後重置系統")
-    
-    st.markdown("---")
\ No newline at end of file
+        time_since = person_absence(get_gate_state())
+        if time_since is not None:
+            remaining = Config.PERSON_TIMEOUT - time_since
+            st.warning(f"⏰ 人員離開 {time_since}秒，{remaining}秒後重置系統")
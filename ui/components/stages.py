@@ -2,23 +2,30 @@
 PPE 檢測系統階段組件
 """
 import streamlit as st
-from core.database import Database
+from core.session_manager import get_gate_state, get_status_snapshot, timed_render
 from models.stage_config import STAGE_CONFIG
+from ui.live_sections import live_section
 
+@timed_render
 def render_stages():
     """渲染PPE檢測階段"""
     st.subheader("🔍 PPE檢測階段")
-    
+    live_section(render_stage_grid)
+
+@timed_render
+def render_stage_grid():
+    """渲染各階段燈號與設備檢測狀態（即時區塊）"""
     # 獲取當前狀態
-    status = Database.get_status()
+    status = get_status_snapshot()
+    current_stage = get_gate_state().current_stage
     
-    cols = st.columns(3)
+    cols = st.columns(len(STAGE_CONFIG))
     
     for i, stage in enumerate(STAGE_CONFIG):
         with cols[i]:
             # 決定階段狀態
-            stage_active = st.session_state.current_stage == stage["id"]
-            stage_completed = st.session_state.current_stage > stage["id"]
+            stage_active = current_stage == stage["id"]
+            stage_completed = current_stage > stage["id"]
             
             # 階段標題
             st.markdown(f"### 階段 {stage['id']}: {stage['name']}")
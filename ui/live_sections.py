@@ -0,0 +1,142 @@
+"""
+PPE 檢測系統即時區塊模組
+完整重新執行時在各即時區塊的位置建立佔位元素，之後由單一 fragment 等待檢測引擎發布新快照，
+只重繪內容有變化的區塊；沒有重繪的佔位元素會保留瀏覽器上原本的內容
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+import streamlit as st
+from streamlit.delta_generator import DeltaGenerator
+from models.gate_state import GateState
+from config.settings import Config
+from core.metrics import Metrics
+from core.profiler import RunProfiler
+from core.session_manager import get_gate_state, refresh_gate_state, wait_for_gate_state
+
+@dataclass
+class LiveSection:
+    """單一即時區塊"""
+    placeholder: DeltaGenerator  # 完整重新執行時建立的 st.empty()
+    render: Callable[[], None]  # 渲染函式（從 get_gate_state() 讀取快照）
+    timer: Optional[Callable[[GateState], Optional[int]]] = None  # 區塊顯示的計時秒數
+    signature: Optional[Tuple] = None  # 上次渲染時的簽章，None 表示尚未渲染
+
+class RenderStats:
+    """即時區塊渲染統計（整個行程共用）"""
+    _lock = threading.Lock()
+    _rendered = 0
+    _skipped = 0
+
+    @staticmethod
+    def add(rendered: int, skipped: int):
+        """
+        累加一次刷新的結果
+
+        Args:
+            rendered: 重繪的區塊數
+            skipped: 內容未變而略過的區塊數
+        """
+        with RenderStats._lock:
+            RenderStats._rendered += rendered
+            RenderStats._skipped += skipped
+
+    @staticmethod
+    def snapshot() -> Dict[str, int]:
+        """
+        取得目前的統計
+
+        Returns:
+            Dict[str, int]: rendered（重繪次數）與 skipped（略過次數）
+        """
+        with RenderStats._lock:
+            return {"rendered": RenderStats._rendered, "skipped": RenderStats._skipped}
+
+Metrics.collector("ppe_live_sections_rendered_total", "counter", "即時區塊重繪次數",
+                  lambda: RenderStats.snapshot()["rendered"])
+Metrics.collector("ppe_live_sections_skipped_total", "counter", "即時區塊內容未變而略過的次數",
+                  lambda: RenderStats.snapshot()["skipped"])
+
+def begin_live_sections():
+    """完整重新執行開始時清除上一次建立的即時區塊"""
+    st.session_state.live_sections = []
+    st.session_state.live_full_run = True
+
+def live_section(render: Callable[[], None],
+                 timer: Optional[Callable[[GateState], Optional[int]]] = None):
+    """
+    在目前位置建立即時區塊，實際內容由 render_live_sections 渲染
+
+    區塊內只能使用顯示元素，不能使用輸入元件（fragment 不允許在範圍外建立元件）。
+
+    Args:
+        render: 渲染函式
+        timer: 取得區塊顯示的計時秒數（已取整），秒數改變時才重繪；沒有計時器時為None
+    """
+    st.session_state.live_sections.append(LiveSection(st.empty(), render, timer))
+
+def section_signature(section: LiveSection, gate_state: GateState) -> Tuple:
+    """
+    區塊內容的簽章：閘口、引擎發布的版本（涵蓋檢測結果、階段與日誌）與區塊的計時秒數
+
+    Args:
+        section: 即時區塊
+        gate_state: 最新快照
+
+    Returns:
+        Tuple: 簽章相同代表畫面不會改變
+    """
+    countdown = section.timer(gate_state) if section.timer else None
+    return (gate_state.gate_id, gate_state.version, countdown)
+
+@st.fragment(run_every=Config.LIVE_REFRESH_INTERVAL)
+def render_live_sections():
+    """
+    重繪有變化的即時區塊，之後等待檢測引擎發布新版本，發布時立即重繪
+
+    run_every 只負責在等待結束後重新排入下一次執行（fragment 執行中收到的定時請求會排隊，
+    結束後立即執行），因此資料變更到重繪只有喚醒的延遲。每次執行的等待時間：
+    檢測中或上一次執行有新版本時為 LIVE_REFRESH_INTERVAL 秒（計時器每秒更新）；
+    等待人員且沒有新版本時退避為 LIVE_IDLE_INTERVAL 秒，閒置的工作階段每秒重新執行不超過一次。
+    等待中不會處理其他重新執行請求，操作元件最多延遲一個等待時間。完整重新執行中只渲染一次，不等待。
+    """
+    gate_state = refresh_gate_state()
+    _redraw_sections()
+    if st.session_state.pop("live_full_run", False):
+        return
+    version = gate_state.version
+    idle = gate_state.current_stage == 0 and st.session_state.get("live_idle", False)
+    deadline = time.monotonic() + (Config.LIVE_IDLE_INTERVAL if idle else Config.LIVE_REFRESH_INTERVAL)
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        gate_state = wait_for_gate_state(remaining)
+        _redraw_sections()
+    st.session_state.live_idle = gate_state.version == version
+
+def _redraw_sections():
+    """重繪簽章有變化的即時區塊；有區塊需要重繪時才剖析並計入 PROFILE_RUNS"""
+    gate_state = get_gate_state()
+    sections: List[LiveSection] = st.session_state.get("live_sections", [])
+    changed = []
+    for section in sections:
+        signature = section_signature(section, gate_state)
+        if signature != section.signature:
+            changed.append((section, signature))
+    if changed:
+        RunProfiler.run(_render_sections, "fragment", changed)
+    RenderStats.add(len(changed), len(sections) - len(changed))
+
+def _render_sections(changed: List[Tuple[LiveSection, Tuple]]):
+    """
+    重繪區塊並記錄新的簽章
+
+    Args:
+        changed: (即時區塊, 新簽章) 列表
+    """
+    for section, signature in changed:
+        section.signature = signature
+        with section.placeholder.container():
+            section.render()